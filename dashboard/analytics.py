@@ -0,0 +1,267 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.db.models import FloatField, Func, Q, Sum
+from django.utils import timezone
+
+from menu.models import MenuItem
+from orders.models import Order, OrderStatusEvent
+from .models import ItemDailySales
+
+
+# States a ticket waits in, in kitchen order
+TRACKED_STATES = ['pending', 'confirmed', 'preparing', 'ready']
+PERCENTILES = [50, 90]
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Menu-engineering quadrants: (popular?, earns above average per portion?)
+QUADRANTS = {
+    (True, True): ('star', 'Stars', 'Popular and high-earning — keep them prominent.'),
+    (True, False): ('plowhorse', 'Plowhorses', 'Popular but earn less per portion — try a small price rise or add-ons.'),
+    (False, True): ('puzzle', 'Puzzles', 'Earn well but rarely ordered — reposition or promote.'),
+    (False, False): ('dog', 'Dogs', 'Neither popular nor high-earning — rework or retire.'),
+}
+POPULARITY_FACTOR = 0.7  # a dish is popular at 70% of an equal share of portions sold
+
+
+class EpochSeconds(Func):
+    """Seconds since 1970 for a datetime column, computed by the database rather than per row in Python."""
+    template = 'EXTRACT(EPOCH FROM %(expressions)s)'
+    output_field = FloatField()
+
+    def as_sqlite(self, compiler, connection, **extra):
+        # Stored as UTC text. julianday() only keeps milliseconds, so it gives the whole
+        # seconds and the microseconds are read straight off the end of the string.
+        template = (
+            "(ROUND((julianday(substr(%(expressions)s, 1, 19)) - 2440587.5) * 86400.0)"
+            " + CAST(substr(%(expressions)s, 20) AS REAL))"
+        )
+        return self.as_sql(compiler, connection, template=template, **extra)
+
+    def as_mysql(self, compiler, connection, **extra):
+        return self.as_sql(compiler, connection, template='UNIX_TIMESTAMP(%(expressions)s)', **extra)
+
+
+def _status_codes(statuses, codes):
+    """Map an array of status strings to their codes with one sorted lookup."""
+    names = np.array(sorted(codes))
+    lookup = np.array([codes[name] for name in names], dtype=np.int8)
+    return lookup[np.searchsorted(names, statuses)]
+
+
+def _load_events(since):
+    """Every logged transition for orders placed since `since`, as column arrays."""
+    rows = list(
+        OrderStatusEvent.objects
+        .filter(order__created_at__gte=since)
+        .order_by('order_id', 'created_at', 'id')
+        .values_list('order_id', 'from_status', 'to_status', EpochSeconds('created_at'), EpochSeconds('order__created_at'))
+    )
+    if not rows:
+        return None
+    codes = {status: i for i, (status, _) in enumerate(Order.STATUS_CHOICES)}
+
+    order_ids, from_status, to_status, ts, placed_ts = zip(*rows)
+    ts = np.array(ts, dtype=float)
+    placed_ts = np.array(placed_ts, dtype=float)
+    day, hour = _local_day_hour(ts)
+    placed_day, placed_hour = _local_day_hour(placed_ts)
+    return {
+        'order': np.array(order_ids, dtype=np.int64),
+        'from': _status_codes(np.array(from_status), codes),
+        'to': _status_codes(np.array(to_status), codes),
+        'ts': ts,
+        'day': day,
+        'hour': hour,
+        'placed_ts': placed_ts,
+        'placed_day': placed_day,
+        'placed_hour': placed_hour,
+        'codes': codes,
+    }
+
+
+def _local_day_hour(ts):
+    """Local date ordinal and hour for epoch seconds — one tz lookup per distinct UTC hour."""
+    utc_hours, inverse = np.unique((ts // 3600).astype(np.int64), return_inverse=True)
+    zone = timezone.get_current_timezone()
+    offsets = np.array([
+        datetime.fromtimestamp(h * 3600, dt_timezone.utc).astimezone(zone).utcoffset().total_seconds()
+        for h in utc_hours
+    ])
+    local = (ts + offsets[inverse]) // 3600
+    return (local // 24).astype(np.int64) + EPOCH_ORDINAL, (local % 24).astype(np.int64)
+
+
+def time_in_state(since):
+    """
+    Seconds each ticket spent in each state, keyed by the day and hour it entered.
+
+    A state is entered by the previous event of the same order (when that event
+    moved it into the state this one leaves), or — for pending — by the order
+    being placed. Returns (state, duration, day, hour) arrays.
+    """
+    events = _load_events(since)
+    if events is None:
+        return None
+
+    order, frm, to, ts = events['order'], events['from'], events['to'], events['ts']
+
+    # Shift by one row: did the previous event put this order into the state we leave now?
+    chained = np.zeros(len(order), dtype=bool)
+    chained[1:] = (order[1:] == order[:-1]) & (to[:-1] == frm[1:])
+    from_placed = ~chained & (frm == events['codes']['pending'])
+
+    entered_ts = np.full(len(order), np.nan)
+    entered_day = np.zeros(len(order), dtype=np.int64)
+    entered_hour = np.zeros(len(order), dtype=np.int64)
+
+    entered_ts[1:][chained[1:]] = ts[:-1][chained[1:]]
+    entered_day[1:][chained[1:]] = events['day'][:-1][chained[1:]]
+    entered_hour[1:][chained[1:]] = events['hour'][:-1][chained[1:]]
+
+    entered_ts[from_placed] = events['placed_ts'][from_placed]
+    entered_day[from_placed] = events['placed_day'][from_placed]
+    entered_hour[from_placed] = events['placed_hour'][from_placed]
+
+    known = ~np.isnan(entered_ts)
+    return {
+        'state': frm[known],
+        'duration': ts[known] - entered_ts[known],
+        'day': entered_day[known],
+        'hour': entered_hour[known],
+        'codes': events['codes'],
+    }
+
+
+def _grouped_percentiles(keys, values):
+    """{key: (count, p50, p90)} without looping over individual tickets."""
+    order = np.argsort(keys, kind='stable')
+    keys, values = keys[order], values[order]
+    unique, starts = np.unique(keys, return_index=True)
+    groups = np.split(values, starts[1:])
+    return {
+        int(key): (len(group), *np.percentile(group, PERCENTILES))
+        for key, group in zip(unique, groups)
+    }
+
+
+def throughput_report(days=14):
+    """Median and p90 minutes per state, overall, by hour of day and by day."""
+    since = timezone.now() - timedelta(days=days)
+    data = time_in_state(since)
+    if data is None:
+        return {'states': [], 'summary': [], 'hours': [], 'days': [], 'bottleneck': None}
+
+    codes = data['codes']
+    labels = dict(Order.STATUS_CHOICES)
+    minutes = data['duration'] / 60
+    tracked = [(state, codes[state]) for state in TRACKED_STATES]
+    by_state = {}
+    for state, code in tracked:
+        mask = data['state'] == code
+        by_state[state] = {
+            'overall': _grouped_percentiles(np.zeros(mask.sum(), dtype=np.int64), minutes[mask]),
+            'hour': _grouped_percentiles(data['hour'][mask], minutes[mask]),
+            'day': _grouped_percentiles(data['day'][mask], minutes[mask]),
+        }
+
+    def row(label, key, scope):
+        cells = [by_state[state][scope].get(key) for state, _ in tracked]
+        return {
+            'label': label,
+            'tickets': max((cell[0] for cell in cells if cell), default=0),
+            'cells': [
+                {'median': cell[1], 'p90': cell[2], 'count': cell[0]} if cell else None
+                for cell in cells
+            ],
+        }
+
+    hours = sorted({hour for state, _ in tracked for hour in by_state[state]['hour']})
+    day_keys = sorted({day for state, _ in tracked for day in by_state[state]['day']}, reverse=True)
+
+    overall = row('All hours', 0, 'overall')['cells']
+    slowest = max(
+        (i for i, cell in enumerate(overall) if cell),
+        key=lambda i: overall[i]['median'], default=None,
+    )
+    return {
+        'states': [labels[state] for state, _ in tracked],
+        'summary': [
+            {'state': labels[state], 'cell': cell}
+            for (state, _), cell in zip(tracked, overall)
+        ],
+        'bottleneck': labels[tracked[slowest][0]] if slowest is not None else None,
+        'hours': [row(f'{hour:02d}:00', hour, 'hour') for hour in hours],
+        'days': [row(date.fromordinal(day).strftime('%a %b %d'), day, 'day') for day in day_keys],
+    }
+
+
+def menu_engineering(start, end):
+    """
+    Classify dishes into popularity / earnings quadrants for start..end, from the daily rollup.
+
+    Popular means selling at least 70% of an equal share of portions; earnings
+    are revenue per portion, add-ons included, against the menu-wide average.
+    Dishes on the menu that sold nothing are included — they are the first
+    candidates to retire.
+    """
+    sales = {
+        row['menu_item']: row for row in
+        ItemDailySales.objects.filter(date__range=(start, end)).values('menu_item')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'), addon_revenue=Sum('addon_revenue'))
+    }
+    items = list(
+        MenuItem.objects.filter(Q(pk__in=sales) | Q(is_available=True))
+        .order_by('category__order_position', 'name')
+        .values_list('pk', 'name', 'category__name', 'price', 'is_available')
+    )
+    if not items:
+        return {'rows': [], 'quadrants': [], 'portions': 0, 'revenue': 0, 'popular_at': 0, 'average': None}
+
+    sold = [sales.get(pk, {}) for pk, *_ in items]
+    quantity = np.array([row.get('quantity', 0) for row in sold], dtype=np.int64)
+    revenue = np.array([float(row.get('revenue', 0)) for row in sold])
+    addon_revenue = np.array([float(row.get('addon_revenue', 0)) for row in sold])
+    list_price = np.array([float(price) for _, _, _, price, _ in items])
+
+    portions = int(quantity.sum())
+    popular_at = portions / len(items) * POPULARITY_FACTOR
+    # Unsold dishes are judged on their menu price
+    per_portion = np.where(quantity > 0, revenue / np.maximum(quantity, 1), list_price)
+    average = revenue.sum() / portions if portions else list_price.mean()
+    popular = quantity >= popular_at if portions else np.zeros(len(items), dtype=bool)
+    earning = per_portion >= average
+
+    rows = []
+    for i, (pk, name, category, _, is_available) in enumerate(items):
+        key, label, _ = QUADRANTS[(bool(popular[i]), bool(earning[i]))]
+        rows.append({
+            'id': pk,
+            'name': name,
+            'category': category,
+            'is_available': is_available,
+            'quantity': int(quantity[i]),
+            'revenue': revenue[i],
+            'addon_revenue': addon_revenue[i],
+            'per_portion': per_portion[i],
+            'mix': quantity[i] / portions * 100 if portions else 0,
+            'quadrant': key,
+            'quadrant_label': label,
+        })
+    rows.sort(key=lambda row: (-row['revenue'], row['name']))
+
+    quadrants = []
+    for key, label, hint in QUADRANTS.values():
+        members = [row for row in rows if row['quadrant'] == key]
+        quadrants.append({
+            'key': key, 'label': label, 'hint': hint, 'count': len(members),
+            'revenue': sum(row['revenue'] for row in members),
+        })
+    return {
+        'rows': rows,
+        'quadrants': quadrants,
+        'portions': portions,
+        'revenue': float(revenue.sum()),
+        'popular_at': popular_at,
+        'average': average,
+    }
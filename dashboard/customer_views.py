@@ -1,31 +1,24 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Sum, Count, Q, Max
+from django.db.models import Sum, Count, Q
 from django.core.paginator import Paginator
 from datetime import date
 
 from .decorators import staff_required, manager_required
+from .models import Customer
 from orders.models import Order
 from reservations.models import Reservation
+from restaurant_site.search import normalize_email
 
 
 @staff_required
 def customers_list(request):
-    """All unique customers aggregated by email."""
+    """All unique customers, read from the Customer rollup."""
     search = request.GET.get('search', '').strip()
     sort   = request.GET.get('sort', '-last_order')
     page   = request.GET.get('page', 1)
 
-    # Aggregate orders by email
-    customers_qs = Order.objects.filter(
-        status__in=['confirmed', 'preparing', 'ready', 'completed']
-    ).values('email').annotate(
-        name=Max('name'),
-        phone=Max('phone'),
-        total_spent=Sum('total'),
-        order_count=Count('id'),
-        last_order=Max('created_at'),
-    )
+    customers_qs = Customer.objects.all()
 
     if search:
         customers_qs = customers_qs.filter(
@@ -35,32 +28,34 @@ def customers_list(request):
 
     # Sorting
     sort_map = {
-        '-last_order': '-last_order',
-        'last_order':  'last_order',
+        '-last_order': '-last_order_at',
+        'last_order':  'last_order_at',
         '-total_spent': '-total_spent',
         'total_spent':  'total_spent',
         '-order_count': '-order_count',
         'name':         'name',
     }
-    customers_qs = customers_qs.order_by(sort_map.get(sort, '-last_order'))
+    customers_qs = customers_qs.order_by(sort_map.get(sort, '-last_order_at'), 'id')
 
     # Pagination
     paginator = Paginator(customers_qs, 20)
     customers_page = paginator.get_page(page)
 
     # Summary stats
-    total_customers  = customers_qs.count()
-    total_revenue    = customers_qs.aggregate(t=Sum('total_spent'))['t'] or 0
-    repeat_customers = customers_qs.filter(order_count__gt=1).count()
+    summary = customers_qs.aggregate(
+        total_customers=Count('id'),
+        total_revenue=Sum('total_spent'),
+        repeat_customers=Count('id', filter=Q(order_count__gt=1)),
+    )
 
     context = {
         'customers': customers_page,
         'paginator': paginator,
         'search': search,
         'sort': sort,
-        'total_customers': total_customers,
-        'total_revenue': total_revenue,
-        'repeat_customers': repeat_customers,
+        'total_customers': summary['total_customers'],
+        'total_revenue': summary['total_revenue'] or 0,
+        'repeat_customers': summary['repeat_customers'],
         'pending_orders': Order.objects.filter(status='pending').count(),
         'pending_reservations': Reservation.objects.filter(status='pending').count(),
     }
@@ -70,14 +65,16 @@ def customers_list(request):
 @staff_required
 def customer_detail(request, email):
     """Full customer profile — orders + reservations."""
+    email_key = normalize_email(email)
+
     # Get all orders for this email
     orders = Order.objects.filter(
-        email__iexact=email
-    ).prefetch_related('items').order_by('-created_at')
+        email_normalized=email_key
+    ).order_by('-created_at')
 
     # Get all reservations for this email
     reservations = Reservation.objects.filter(
-        email__iexact=email
+        email_normalized=email_key
     ).order_by('-date', '-time')
 
     if not orders.exists() and not reservations.exists():
@@ -98,13 +95,13 @@ def customer_detail(request, email):
 
     # Check if blocked
     from .models import BlockedCustomer
-    is_blocked = BlockedCustomer.objects.filter(email__iexact=email).exists()
+    is_blocked = BlockedCustomer.objects.filter(email_normalized=email_key).exists()
 
     context = {
         'email': email,
         'customer_name': customer_name,
         'customer_phone': customer_phone,
-        'orders': orders,
+        'orders': orders.with_item_counts(),
         'reservations': reservations,
         'total_spent': total_spent,
         'order_count': order_count,
@@ -127,10 +124,12 @@ def customer_block(request, email):
     from .models import BlockedCustomer
     reason = request.POST.get('reason', '').strip()
 
+    email_key = normalize_email(email)
     blocked, created = BlockedCustomer.objects.get_or_create(
-        email__iexact=email,
+        email_normalized=email_key,
         defaults={'email': email, 'reason': reason}
     )
+    Customer.objects.filter(email=email_key).update(is_blocked=True)
     if created:
         messages.success(request, f'{email} has been blocked.')
     else:
@@ -147,6 +146,8 @@ def customer_unblock(request, email):
         return redirect('dashboard:customer_detail', email=email)
 
     from .models import BlockedCustomer
-    BlockedCustomer.objects.filter(email__iexact=email).delete()
+    email_key = normalize_email(email)
+    BlockedCustomer.objects.filter(email_normalized=email_key).delete()
+    Customer.objects.filter(email=email_key).update(is_blocked=False)
     messages.success(request, f'{email} has been unblocked.')
     return redirect('dashboard:customer_detail', email=email)
\ No newline at end of file
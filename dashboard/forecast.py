@@ -0,0 +1,140 @@
+from datetime import datetime, time, timedelta
+from itertools import chain
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from menu.cache import off_menu
+from orders.models import Order, OrderItem
+from .analytics import _local_day_hour
+from .models import ItemForecast
+
+
+HISTORY_DAYS = 364  # 52 whole weeks, so every weekday is seen equally often
+ALPHAS = np.array([0.05, 0.1, 0.2, 0.3, 0.5])  # smoothing constants tried for every series
+MIN_QUANTITY = 0.05  # smaller forecasts aren't stored
+CHUNK = 5000  # rows fetched per round trip while reading history
+
+
+def _aware(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def window_names():
+    return [name for name, _ in settings.SERVICE_WINDOWS]
+
+
+def load_history(start, end):
+    """
+    Portions sold per (service window, dish) series per day, start..end inclusive, by local pickup date.
+
+    Two plain queries — paid orders' pickup times, then their lines as
+    integers — joined and binned with NumPy, so no per-row date functions
+    run in the database. Returns (dish ids, series × day array); series i
+    is dish i // W, window i % W.
+    """
+    window = {
+        'status__in': Order.PAID_STATUSES,
+        'pickup_time__gte': _aware(start),
+        'pickup_time__lt': _aware(end + timedelta(days=1)),
+    }
+    length = (end - start).days + 1
+    width = len(settings.SERVICE_WINDOWS)
+    order_ids, stamps = [], []
+    for pk, pickup_time in Order.objects.filter(**window).order_by('pk').values_list('pk', 'pickup_time').iterator(chunk_size=CHUNK):
+        order_ids.append(pk)
+        stamps.append(pickup_time.timestamp())
+    if not order_ids:
+        return np.array([], dtype=np.int64), np.zeros((0, length))
+    order_ids = np.array(order_ids, dtype=np.int64)
+    local_day, local_hour = _local_day_hour(np.array(stamps, dtype=float))
+
+    lines = OrderItem.objects.filter(
+        menu_item__isnull=False, **{f'order__{field}': value for field, value in window.items()},
+    ).values_list('order_id', 'menu_item_id', 'quantity')
+    lines = np.fromiter(chain.from_iterable(lines.iterator(chunk_size=CHUNK)), dtype=np.int64).reshape(-1, 3)
+
+    # Join each line to its order; lines of an order paid between the two queries wait for tomorrow
+    index = np.minimum(np.searchsorted(order_ids, lines[:, 0]), len(order_ids) - 1)
+    day = local_day[index] - start.toordinal()
+    known = (order_ids[index] == lines[:, 0]) & (day >= 0) & (day < length)
+    lines, day, hour = lines[known], day[known], local_hour[index[known]]
+
+    ids, dish = np.unique(lines[:, 1], return_inverse=True)
+    starts = np.array([first_hour for _, first_hour in settings.SERVICE_WINDOWS])
+    series = dish * width + np.maximum(np.searchsorted(starts, hour, side='right') - 1, 0)
+    history = np.bincount(
+        series * length + day, weights=lines[:, 2].astype(float), minlength=len(ids) * width * length,
+    ).reshape(len(ids) * width, length)
+    return ids, history
+
+
+def predict(history, weekdays, target_weekday):
+    """
+    Next-day forecast for every row of `history` (series × day), with `weekdays` giving each column's weekday.
+
+    Each series gets a day-of-week index (that weekday's mean over the series'
+    overall mean, counted from its first sale) and a level smoothed over the
+    deseasonalised history. Every smoothing constant in ALPHAS runs side by
+    side, and each series keeps the one with the smallest one-step-ahead error.
+    The loop is over days only; all series move together.
+    """
+    count, length = history.shape
+    started = np.cumsum(history > 0, axis=1) > 0  # a dish added mid-year isn't judged on days before it sold
+    by_weekday = np.eye(7)[weekdays]
+    live = history * started
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weekday_mean = (live @ by_weekday) / (started @ by_weekday)
+        overall = live.sum(axis=1) / started.sum(axis=1)
+        season = weekday_mean / overall[:, None]
+    season = np.nan_to_num(season, nan=1.0, posinf=1.0)
+
+    daily_season = season[:, weekdays]
+    deseasonalised = np.divide(history, daily_season, out=np.zeros_like(history), where=daily_season > 0)
+    level = np.full((len(ALPHAS), count), np.nan)
+    error = np.zeros((len(ALPHAS), count))
+    alphas = ALPHAS[:, None]
+    for day in range(length):
+        # Weekdays a series never sells on say nothing about its level
+        informative = started[:, day] & (daily_season[:, day] > 0)
+        seen = ~np.isnan(level) & informative
+        error += np.where(seen, history[:, day] - level * daily_season[:, day], 0) ** 2
+        z = deseasonalised[:, day]
+        level = np.where(seen, level + alphas * (z - level), np.where(informative, z, level))
+
+    best = np.argmin(error, axis=0)
+    forecast = level[best, np.arange(count)] * season[:, target_weekday]
+    return np.nan_to_num(forecast, nan=0.0)
+
+
+def forecast_demand(day=None):
+    """
+    Forecast portions per dish and service window for `day` (default tomorrow) and store them.
+
+    Trains on the HISTORY_DAYS before `day`. Dishes that won't be on the menu
+    in a window — switched off or outside their schedule — are left
+    out, as is a day with no pickup hours. Returns a summary.
+    """
+    day = day or timezone.localdate() + timedelta(days=1)
+    start = day - timedelta(days=HISTORY_DAYS)
+    ids, history = load_history(start, day - timedelta(days=1))
+    width = len(settings.SERVICE_WINDOWS)
+
+    rows = []
+    if len(ids) and day.weekday() in settings.PICKUP_HOURS:
+        weekdays = (start.weekday() + np.arange(history.shape[1])) % 7
+        quantity = predict(history, weekdays, day.weekday()).reshape(len(ids), width)
+        for index, (name, hour) in enumerate(settings.SERVICE_WINDOWS):
+            hidden = off_menu(ids.tolist(), _aware(day) + timedelta(hours=hour))
+            rows.extend(
+                ItemForecast(date=day, window=name, menu_item_id=pk, quantity=round(value, 1))
+                for pk, value in zip(ids.tolist(), quantity[:, index].tolist())
+                if value >= MIN_QUANTITY and pk not in hidden
+            )
+
+    with transaction.atomic():
+        ItemForecast.objects.filter(date=day).delete()
+        ItemForecast.objects.bulk_create(rows, batch_size=1000)
+    return {'date': day, 'days': history.shape[1], 'series': history.shape[0], 'forecasts': len(rows)}
@@ -0,0 +1,92 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from orders.models import Order, OrderSearchToken
+from restaurant_site.search import (
+    build_search_document, document_tokens, filter_search, uses_trigram_index,
+)
+
+FIRST_NAMES = ['Juan', 'Maria', 'Jose', 'Ana', 'Carlo', 'Bea', 'Miguel', 'Liza', 'Paolo', 'Grace']
+LAST_NAMES = ['dela Cruz', 'Santos', 'Reyes', 'Garcia', 'Mendoza', 'Torres', 'Flores', 'Ramos']
+DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'warmvibe.ph']
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic orders inside a rolled-back transaction and time the dashboard search box'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=500_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        backend = 'pg_trgm GIN index' if uses_trigram_index() else 'token table'
+        self.stdout.write(f'Seeding {options["orders"]:,} orders (search backend: {backend})...')
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            sample = self._seed(options['orders'])
+            self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+            queries = {
+                'name': sample.name.split()[0],
+                'full email': sample.email,
+                'email prefix': sample.email[:6],
+                'phone suffix': sample.phone[-4:],
+                'order code': '#' + sample.short_code,
+                'order number': str(sample.order_number),
+                'name middle': sample.name.split()[-1][1:4],
+                'no match': 'zzzzzz',
+            }
+            for label, term in queries.items():
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    # Same shape as the orders list: filtered, newest first, first page
+                    list(filter_search(Order.objects.order_by('-created_at'), term)[:25])
+                    timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f'  {label:<14} {term!r:<28} median {statistics.median(timings):8.1f} ms'
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Done — seeded rows rolled back.'))
+
+    def _seed(self, count, batch_size=5000):
+        rng = random.Random(26)
+        now = timezone.now()
+        sample = None
+
+        for start in range(0, count, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, count)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                order = Order(
+                    name=f'{first} {last}',
+                    email=f'{first}.{last.replace(" ", "")}{i}@{rng.choice(DOMAINS)}'.lower(),
+                    phone=f'+63 9{rng.randint(10, 99)} {rng.randint(100, 999)} {rng.randint(1000, 9999)}',
+                    pickup_time=now + timedelta(minutes=i % 600),
+                    total=rng.randint(5, 120),
+                    status='completed',
+                )
+                order.search_document = build_search_document(
+                    order.name, order.email, order.phone, str(order.order_number)
+                )
+                batch.append(order)
+            Order.objects.bulk_create(batch)
+
+            if not uses_trigram_index():
+                OrderSearchToken.objects.bulk_create([
+                    OrderSearchToken(order_id=order.pk, token=token[:254])
+                    for order in batch
+                    for token in document_tokens(order.search_document)
+                ], batch_size=batch_size)
+
+            sample = batch[len(batch) // 2]
+        return sample
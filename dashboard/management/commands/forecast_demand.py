@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.forecast import forecast_demand
+
+
+class Command(BaseCommand):
+    help = "Forecast each dish's portions per service window for the prep plan (run nightly, after closing)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to forecast (YYYY-MM-DD); default tomorrow')
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+        result = forecast_demand(day)
+        self.stdout.write(self.style.SUCCESS(
+            f"Forecast {result['date']}: {result['forecasts']} dish/window row(s) "
+            f"from {result['series']} series over {result['days']} days."
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from dashboard.models import Customer
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the Customer rollup table from paid orders'
+
+    def handle(self, *args, **kwargs):
+        count = Customer.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} customer rollup(s).'))
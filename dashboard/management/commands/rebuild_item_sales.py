@@ -0,0 +1,21 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.models import ItemDailySales
+
+
+class Command(BaseCommand):
+    help = 'Backfill the per-day, per-dish sales rollup from paid orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to rebuild (YYYY-MM-DD); default the first order')
+        parser.add_argument('--end', help='Last day to rebuild (YYYY-MM-DD); default the latest order')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+        count = ItemDailySales.rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} daily item sales row(s).'))
@@ -1,21 +1,31 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db.models import Q
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 import csv
-import io
+from datetime import date
 
 from .decorators import staff_required, manager_required
 from orders.models import Order
 from reservations.models import Reservation
-from menu.models import Category, MenuItem, Tag, AddOn
+from menu import bulk
+from menu.exporter import csv_lines, jsonl_lines
+from menu.importer import COLUMNS
+from menu.jobs import UploadTooLarge, enqueue
+from menu.models import Category, ImportJob, MenuItem, ModifierGroup, Tag
+
+
+def _valid_stock(value):
+    """Portions left from the item form — empty (no limit) or a whole number."""
+    return not value or value.isdigit()
 
 
 @staff_required
 @manager_required
 def menu_list(request):
     """All menu items with filters."""
-    items = MenuItem.objects.select_related('category').prefetch_related('tags', 'addons').order_by('category__order_position', 'name')
+    items = MenuItem.objects.select_related('category').prefetch_related('tags', 'modifier_groups').order_by('category__order_position', 'name')
 
     category_filter = request.GET.get('category', '')
     search = request.GET.get('search', '').strip()
@@ -41,6 +51,7 @@ def menu_list(request):
         'total_items': MenuItem.objects.count(),
         'available_items': MenuItem.objects.filter(is_available=True).count(),
         'hidden_items': MenuItem.objects.filter(is_available=False).count(),
+        'bulk_actions': bulk.ACTIONS,
         'pending_orders': Order.objects.filter(status='pending').count(),
         'pending_reservations': Reservation.objects.filter(status='pending').count(),
     }
@@ -53,6 +64,7 @@ def menu_item_add(request):
     """Add a new menu item."""
     categories = Category.objects.order_by('order_position', 'name')
     tags = Tag.objects.all()
+    modifier_groups = ModifierGroup.objects.all()
 
     if request.method == 'POST':
         name = request.POST.get('name', '').strip()
@@ -61,11 +73,15 @@ def menu_item_add(request):
         category_id = request.POST.get('category', '')
         is_available = request.POST.get('is_available') == 'on'
         is_featured = request.POST.get('is_featured') == 'on'
+        stock = request.POST.get('stock', '').strip()
         image = request.FILES.get('image')
         tag_ids = request.POST.getlist('tags')
+        group_ids = request.POST.getlist('modifier_groups')
 
         if not name or not price or not category_id:
             messages.error(request, 'Name, price, and category are required.')
+        elif not _valid_stock(stock):
+            messages.error(request, 'Portions left must be a whole number, or empty for no limit.')
         else:
             try:
                 category = Category.objects.get(id=category_id)
@@ -76,10 +92,13 @@ def menu_item_add(request):
                     category=category,
                     is_available=is_available,
                     is_featured=is_featured,
+                    stock=int(stock) if stock else None,
                     image=image,
                 )
                 if tag_ids:
                     item.tags.set(tag_ids)
+                if group_ids:
+                    item.modifier_groups.set(group_ids)
                 messages.success(request, f'"{name}" added to the menu.')
                 return redirect('dashboard:menu_list')
             except Exception as e:
@@ -88,6 +107,7 @@ def menu_item_add(request):
     context = {
         'categories': categories,
         'tags': tags,
+        'modifier_groups': modifier_groups,
         'pending_orders': Order.objects.filter(status='pending').count(),
         'pending_reservations': Reservation.objects.filter(status='pending').count(),
     }
@@ -101,6 +121,7 @@ def menu_item_edit(request, item_id):
     item = get_object_or_404(MenuItem, id=item_id)
     categories = Category.objects.order_by('order_position', 'name')
     tags = Tag.objects.all()
+    modifier_groups = ModifierGroup.objects.all()
 
     if request.method == 'POST':
         item.name = request.POST.get('name', '').strip()
@@ -109,18 +130,31 @@ def menu_item_edit(request, item_id):
         category_id = request.POST.get('category', '')
         item.is_available = request.POST.get('is_available') == 'on'
         item.is_featured = request.POST.get('is_featured') == 'on'
+        stock = request.POST.get('stock', '').strip()
         image = request.FILES.get('image')
         tag_ids = request.POST.getlist('tags')
+        group_ids = request.POST.getlist('modifier_groups')
 
         if not item.name or not item.price or not category_id:
             messages.error(request, 'Name, price, and category are required.')
+        elif not _valid_stock(stock):
+            messages.error(request, 'Portions left must be a whole number, or empty for no limit.')
         else:
             try:
                 item.category = Category.objects.get(id=category_id)
                 if image:
                     item.image = image
-                item.save()
+                if stock != request.POST.get('stock_was', '').strip():
+                    item.stock = int(stock) if stock else None
+                    item.save()
+                else:
+                    # Untouched — don't write back a count checkouts may have moved since the form loaded
+                    item.save(update_fields=[
+                        field.name for field in MenuItem._meta.concrete_fields
+                        if not field.primary_key and field.name != 'stock'
+                    ])
                 item.tags.set(tag_ids)
+                item.modifier_groups.set(group_ids)
                 messages.success(request, f'"{item.name}" updated.')
                 return redirect('dashboard:menu_list')
             except Exception as e:
@@ -130,6 +164,7 @@ def menu_item_edit(request, item_id):
         'item': item,
         'categories': categories,
         'tags': tags,
+        'modifier_groups': modifier_groups,
         'editing': True,
         'pending_orders': Order.objects.filter(status='pending').count(),
         'pending_reservations': Reservation.objects.filter(status='pending').count(),
@@ -164,10 +199,62 @@ def menu_item_toggle(request, item_id):
     return redirect('dashboard:menu_list')
 
 
+@staff_required
+@manager_required
+def menu_bulk(request):
+    """Price, visibility or featured changes for many items — previewed, then one UPDATE."""
+    if request.method != 'POST':
+        return redirect('dashboard:menu_list')
+
+    action = request.POST.get('action', '')
+    if action not in bulk.ACTIONS:
+        messages.error(request, 'Choose a bulk action.')
+        return redirect('dashboard:menu_list')
+    percent = None
+    if action == 'price':
+        try:
+            percent = bulk.parse_percent(request.POST.get('percent', ''))
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('dashboard:menu_list')
+
+    scope = request.POST.get('scope', 'selected')
+    items = MenuItem.objects.select_related('category').order_by('category__order_position', 'name')
+    if scope.isdigit():
+        items = items.filter(category_id=scope)
+    else:
+        items = items.filter(pk__in=[pk for pk in request.POST.getlist('ids') if pk.isdigit()])
+
+    rows = bulk.preview(items, action, percent)
+    changed = [row['item'].pk for row in rows if row['changed']]
+    if not changed:
+        messages.info(request, 'Nothing to change — no matching items, or they are already in that state.')
+        return redirect('dashboard:menu_list')
+
+    if request.POST.get('confirm'):
+        # Only the rows the manager saw in the preview
+        count = bulk.apply(changed, action, percent)
+        label = bulk.ACTIONS[action].replace(' by %', f' by {percent}%')
+        messages.success(request, f'{label}: {count} item{"s" if count != 1 else ""} updated.')
+        return redirect('dashboard:menu_list')
+
+    context = {
+        'rows': rows,
+        'action': action,
+        'action_label': bulk.ACTIONS[action],
+        'percent': percent,
+        'scope': scope,
+        'changed': changed,
+        'pending_orders': Order.objects.filter(status='pending').count(),
+        'pending_reservations': Reservation.objects.filter(status='pending').count(),
+    }
+    return render(request, 'dashboard/menu_bulk_preview.html', context)
+
+
 @staff_required
 @manager_required
 def menu_csv_import(request):
-    """Bulk import menu items from CSV."""
+    """Queue a menu CSV for the import worker and show the progress of a job."""
     categories = Category.objects.order_by('order_position', 'name')
 
     if request.method == 'POST':
@@ -177,112 +264,64 @@ def menu_csv_import(request):
             messages.error(request, 'Please select a CSV file.')
             return redirect('dashboard:menu_csv_import')
 
-        if not csv_file.name.endswith('.csv'):
-            messages.error(request, 'File must be a .csv file.')
+        if not csv_file.name.endswith(('.csv', '.jsonl')):
+            messages.error(request, 'File must be a .csv or .jsonl file.')
             return redirect('dashboard:menu_csv_import')
+        fmt = 'jsonl' if csv_file.name.endswith('.jsonl') else 'csv'
 
         try:
-            decoded = csv_file.read().decode('utf-8')
-            reader = csv.DictReader(io.StringIO(decoded))
-
-            created = 0
-            updated = 0
-            errors = []
-
-            for row_num, row in enumerate(reader, start=2):
-                try:
-                    name = row.get('name', '').strip()
-                    if not name:
-                        errors.append(f'Row {row_num}: name is required.')
-                        continue
-
-                    price = row.get('price', '').strip()
-                    if not price:
-                        errors.append(f'Row {row_num}: price is required for "{name}".')
-                        continue
-
-                    category_name = row.get('category', '').strip()
-                    if not category_name:
-                        errors.append(f'Row {row_num}: category is required for "{name}".')
-                        continue
-
-                    # Get or create category
-                    category, _ = Category.objects.get_or_create(
-                        name__iexact=category_name,
-                        defaults={'name': category_name}
-                    )
-
-                    description = row.get('description', '').strip()
-                    is_available = row.get('is_available', 'true').strip().lower() in ('true', '1', 'yes')
-                    is_featured = row.get('is_featured', 'false').strip().lower() in ('true', '1', 'yes')
-                    image_filename = row.get('image', '').strip()
-
-                    # Create or update
-                    item, was_created = MenuItem.objects.update_or_create(
-                        name__iexact=name,
-                        defaults={
-                            'name': name,
-                            'description': description,
-                            'price': price,
-                            'category': category,
-                            'is_available': is_available,
-                            'is_featured': is_featured,
-                        }
-                    )
-
-                    # Handle tags
-                    tag_names = row.get('tags', '').strip()
-                    if tag_names:
-                        tag_list = [t.strip() for t in tag_names.split('|') if t.strip()]
-                        tag_objects = []
-                        for tag_name in tag_list:
-                            tag, _ = Tag.objects.get_or_create(name__iexact=tag_name, defaults={'name': tag_name})
-                            tag_objects.append(tag)
-                        item.tags.set(tag_objects)
-
-                    # Handle add-ons
-                    addon_data = row.get('addons', '').strip()
-                    if addon_data:
-                        # Format: "Extra Sauce:20|Extra Rice:15"
-                        for addon_str in addon_data.split('|'):
-                            if ':' in addon_str:
-                                addon_name, addon_price = addon_str.split(':', 1)
-                                AddOn.objects.get_or_create(
-                                    dish=item,
-                                    name__iexact=addon_name.strip(),
-                                    defaults={'name': addon_name.strip(), 'additional_price': addon_price.strip()}
-                                )
-
-                    if was_created:
-                        created += 1
-                    else:
-                        updated += 1
-
-                except Exception as e:
-                    errors.append(f'Row {row_num}: {str(e)}')
-
-            # Summary message
-            if created or updated:
-                messages.success(request, f'Import complete — {created} item(s) created, {updated} item(s) updated.')
-            if errors:
-                for err in errors[:5]:  # Show first 5 errors
-                    messages.error(request, err)
-                if len(errors) > 5:
-                    messages.error(request, f'...and {len(errors) - 5} more errors.')
-
-            return redirect('dashboard:menu_list')
+            job = enqueue(csv_file, fmt, dry_run=bool(request.POST.get('dry_run')), user=request.user)
+        except UploadTooLarge as e:
+            messages.error(request, str(e))
+            return redirect('dashboard:menu_csv_import')
+        return redirect(f"{reverse('dashboard:menu_csv_import')}?job={job.pk}")
 
-        except Exception as e:
-            messages.error(request, f'Failed to read CSV: {e}')
+    job = None
+    if request.GET.get('job', '').isdigit():
+        job = ImportJob.objects.defer('data').filter(pk=request.GET['job']).first()
 
     context = {
         'categories': categories,
+        'job': job,
+        'recent_jobs': ImportJob.objects.defer('data', 'errors', 'preview')[:5],
         'pending_orders': Order.objects.filter(status='pending').count(),
         'pending_reservations': Reservation.objects.filter(status='pending').count(),
     }
     return render(request, 'dashboard/menu_csv_import.html', context)
 
 
+@staff_required
+@manager_required
+def menu_import_status(request, job_id):
+    """Progress of one import job, polled by the import page."""
+    job = get_object_or_404(ImportJob.objects.defer('data', 'preview'), pk=job_id)
+    return JsonResponse({
+        'status': job.status,
+        'stage': job.stage,
+        'percent': job.percent,
+        'processed_rows': job.processed_rows,
+        'total_rows': job.total_rows,
+        'created': job.created,
+        'updated': job.updated,
+        'unchanged': job.unchanged,
+        'errors': len(job.errors),
+        'message': job.message,
+    })
+
+
+@staff_required
+@manager_required
+def menu_import_errors(request, job_id):
+    """Every row an import job skipped, as CSV."""
+    job = get_object_or_404(ImportJob.objects.defer('data', 'preview'), pk=job_id)
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="import_{job.pk}_errors.csv"'
+    writer = csv.writer(response)
+    writer.writerow(['row', 'error'])
+    writer.writerows(job.errors)
+    return response
+
+
 @staff_required
 @manager_required
 def menu_csv_template(request):
@@ -291,7 +330,7 @@ def menu_csv_template(request):
     response['Content-Disposition'] = 'attachment; filename="menu_import_template.csv"'
 
     writer = csv.writer(response)
-    writer.writerow(['name', 'category', 'price', 'description', 'is_available', 'is_featured', 'tags', 'addons', 'image'])
+    writer.writerow(COLUMNS)
 
     # Example rows using your actual categories and tag choices
     writer.writerow(['Lobster Bisque', 'Chef Specials', '24.99', 'Rich creamy bisque with fresh lobster', 'true', 'true', 'bestseller|spicy', 'Extra Bread:1.50', ''])
@@ -304,6 +343,20 @@ def menu_csv_template(request):
     return response
 
 
+@staff_required
+@manager_required
+def menu_export(request):
+    """Stream the whole menu in the import format — CSV, or JSON Lines with ?format=jsonl."""
+    if request.GET.get('format') == 'jsonl':
+        lines, content_type, extension = jsonl_lines(), 'application/jsonl', 'jsonl'
+    else:
+        lines, content_type, extension = csv_lines(), 'text/csv', 'csv'
+
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="menu_{date.today()}.{extension}"'
+    return response
+
+
 @staff_required
 @manager_required
 def categories_list(request):
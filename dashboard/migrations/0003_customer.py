@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-10-19 08:04
+
+from django.db import migrations, models
+
+
+PAID_STATUSES = ['confirmed', 'preparing', 'ready', 'completed']
+
+
+def populate_customers(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    Customer = apps.get_model('dashboard', 'Customer')
+    BlockedCustomer = apps.get_model('dashboard', 'BlockedCustomer')
+
+    blocked = {e.strip().lower() for e in BlockedCustomer.objects.values_list('email', flat=True)}
+    rollups = {}
+    paid = Order.objects.filter(status__in=PAID_STATUSES).order_by('created_at')
+    for email, name, phone, total, created_at in paid.values_list(
+        'email', 'name', 'phone', 'total', 'created_at'
+    ).iterator(chunk_size=2000):
+        email = email.strip().lower()
+        customer = rollups.get(email)
+        if customer is None:
+            customer = rollups[email] = Customer(
+                email=email, first_order_at=created_at, is_blocked=email in blocked,
+            )
+        customer.name = name
+        customer.phone = phone
+        customer.total_spent += total
+        customer.order_count += 1
+        customer.last_order_at = created_at
+    Customer.objects.bulk_create(rollups.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_blockedcustomer'),
+        ('orders', '0002_order_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('name', models.CharField(blank=True, max_length=150)),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('first_order_at', models.DateTimeField(blank=True, null=True)),
+                ('last_order_at', models.DateTimeField(blank=True, null=True)),
+                ('is_blocked', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-last_order_at'],
+                'indexes': [models.Index(fields=['last_order_at'], name='dashboard_c_last_or_9acfc5_idx'), models.Index(fields=['total_spent'], name='dashboard_c_total_s_0a3db3_idx'), models.Index(fields=['order_count'], name='dashboard_c_order_c_c11d01_idx'), models.Index(fields=['name'], name='dashboard_c_name_958490_idx')],
+            },
+        ),
+        migrations.RunPython(populate_customers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-19 08:05
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+def backfill_email_normalized(apps, schema_editor):
+    BlockedCustomer = apps.get_model('dashboard', 'BlockedCustomer')
+    BlockedCustomer.objects.update(email_normalized=Lower(Trim('email')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_customer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blockedcustomer',
+            name='email_normalized',
+            field=models.EmailField(db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.RunPython(backfill_email_normalized, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-19 21:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_item_daily_sales'),
+        ('menu', '0008_item_pairing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('window', models.CharField(max_length=30)),
+                ('quantity', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('menu_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecasts', to='menu.menuitem')),
+            ],
+            options={
+                'ordering': ['date', 'menu_item'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'window', 'menu_item'), name='item_forecast_unique')],
+            },
+        ),
+    ]
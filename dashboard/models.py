@@ -1,5 +1,12 @@
-from django.db import models
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import DecimalField, F, Sum, Count, Min, Max
+from django.db.models.functions import TruncDate
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from restaurant_site.search import normalize_email
 
 
 class StaffProfile(models.Model):
@@ -41,6 +48,7 @@ class StaffProfile(models.Model):
 
 class BlockedCustomer(models.Model):
     email = models.EmailField(unique=True)
+    email_normalized = models.EmailField(db_index=True, editable=False, default='')
     reason = models.TextField(blank=True)
     blocked_at = models.DateTimeField(auto_now_add=True)
     blocked_by = models.ForeignKey(
@@ -51,5 +59,210 @@ class BlockedCustomer(models.Model):
     def __str__(self):
         return f'Blocked: {self.email}'
 
+    def save(self, *args, **kwargs):
+        self.email_normalized = normalize_email(self.email)
+        super().save(*args, **kwargs)
+
+    class Meta:
+        ordering = ['-blocked_at']
+
+
+class Customer(models.Model):
+    """Per-email rollup of paid orders, refreshed as orders are paid or refunded."""
+    email = models.EmailField(unique=True)  # normalized — see restaurant_site.search.normalize_email
+    name = models.CharField(max_length=150, blank=True)
+    phone = models.CharField(max_length=20, blank=True)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    first_order_at = models.DateTimeField(null=True, blank=True)
+    last_order_at = models.DateTimeField(null=True, blank=True)
+    is_blocked = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-last_order_at']
+        indexes = [
+            models.Index(fields=['last_order_at']),
+            models.Index(fields=['total_spent']),
+            models.Index(fields=['order_count']),
+            models.Index(fields=['name']),
+        ]
+
+    def __str__(self):
+        return f'{self.name or self.email} ({self.order_count} orders)'
+
+    @classmethod
+    def refresh(cls, email):
+        """Recompute one customer's rollup from their paid orders."""
+        from orders.models import Order
+        email = normalize_email(email)
+        paid = Order.objects.filter(email_normalized=email, status__in=Order.PAID_STATUSES)
+        stats = paid.aggregate(
+            total_spent=Sum('total'),
+            order_count=Count('id'),
+            first_order_at=Min('created_at'),
+            last_order_at=Max('created_at'),
+        )
+        if not stats['order_count']:
+            cls.objects.filter(email=email).delete()
+            return None
+
+        latest = paid.order_by('-created_at').values('name', 'phone').first()
+        customer, _ = cls.objects.update_or_create(
+            email=email,
+            defaults={
+                **stats,
+                'name': latest['name'],
+                'phone': latest['phone'],
+                'is_blocked': BlockedCustomer.objects.filter(email_normalized=email).exists(),
+            },
+        )
+        return customer
+
+    @classmethod
+    def rebuild(cls):
+        """Rebuild every rollup row in a single pass over paid orders."""
+        from orders.models import Order
+        rollups = {}
+        paid = Order.objects.filter(status__in=Order.PAID_STATUSES).order_by('created_at')
+        for email, name, phone, total, created_at in paid.values_list(
+            'email_normalized', 'name', 'phone', 'total', 'created_at'
+        ).iterator(chunk_size=2000):
+            customer = rollups.get(email)
+            if customer is None:
+                customer = rollups[email] = cls(email=email, first_order_at=created_at)
+            customer.name = name
+            customer.phone = phone
+            customer.total_spent += total
+            customer.order_count += 1
+            customer.last_order_at = created_at
+
+        blocked = set(BlockedCustomer.objects.values_list('email_normalized', flat=True))
+        for email, customer in rollups.items():
+            customer.is_blocked = email in blocked
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(rollups.values(), batch_size=1000)
+        return len(rollups)
+
+
+class ItemDailySales(models.Model):
+    """Per-day, per-dish rollup of paid order lines, kept current as orders are paid or refunded."""
+    date = models.DateField()  # local date the order was placed
+    menu_item = models.ForeignKey('menu.MenuItem', on_delete=models.CASCADE, related_name='daily_sales')
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    addon_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
     class Meta:
-        ordering = ['-blocked_at']
\ No newline at end of file
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'menu_item'], name='item_daily_sales_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.date} — {self.menu_item_id}: {self.quantity} sold'
+
+    @classmethod
+    def record(cls, orders, sign=1):
+        """
+        Add (sign=1) or take back (sign=-1) these orders' lines — only their own rows are read.
+
+        Every row changes in one transaction, so a failure part-way leaves none of them counted.
+        """
+        from orders.models import OrderItem
+        placed = {order.pk: timezone.localdate(order.created_at) for order in orders}
+        totals = {}
+        for order_id, item_id, quantity, item_total, addon_price in OrderItem.objects.filter(
+            order__in=placed, menu_item__isnull=False,
+        ).values_list('order_id', 'menu_item_id', 'quantity', 'item_total', 'addon_price'):
+            key = (placed[order_id], item_id)
+            sold, revenue, addon_revenue = totals.get(key, (0, 0, 0))
+            totals[key] = (sold + quantity, revenue + item_total, addon_revenue + addon_price * quantity)
+
+        with transaction.atomic():
+            for (date, item_id), (sold, revenue, addon_revenue) in totals.items():
+                changes = {
+                    'quantity': F('quantity') + sign * sold,
+                    'revenue': F('revenue') + sign * revenue,
+                    'addon_revenue': F('addon_revenue') + sign * addon_revenue,
+                }
+                row = cls.objects.filter(date=date, menu_item_id=item_id)
+                if row.update(**changes) or sign < 0:
+                    continue
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(
+                            date=date, menu_item_id=item_id, quantity=sold, revenue=revenue,
+                            addon_revenue=addon_revenue,
+                        )
+                except IntegrityError:
+                    row.update(**changes)  # another order for the same dish and day created it first
+
+    @classmethod
+    def rebuild(cls, start=None, end=None, window=31):
+        """
+        Recompute the rollup for start..end (default: every day with orders) from paid order lines.
+
+        Works through `window` days at a time, each one a single GROUP BY that
+        replaces those days' rows, so a full backfill never holds more than a
+        month of rows in memory. Returns the number of rows written.
+        """
+        from orders.models import Order, OrderItem
+        if start is None or end is None:
+            bounds = Order.objects.aggregate(first=Min('created_at'), last=Max('created_at'))
+            if bounds['first'] is None:
+                return 0
+            start = start or timezone.localdate(bounds['first'])
+            end = end or timezone.localdate(bounds['last'])
+
+        paid = OrderItem.objects.filter(order__status__in=Order.PAID_STATUSES, menu_item__isnull=False)
+        zone = timezone.get_current_timezone()
+        written = 0
+        day = start
+        while day <= end:
+            last = min(day + timedelta(days=window - 1), end)
+            rows = (
+                paid.filter(
+                    order__created_at__gte=timezone.make_aware(datetime.combine(day, time.min), zone),
+                    order__created_at__lt=timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min), zone),
+                )
+                .annotate(day=TruncDate('order__created_at', tzinfo=zone))
+                .values('day', 'menu_item_id')
+                .annotate(
+                    sold=Sum('quantity'),
+                    total=Sum('item_total'),
+                    addons=Sum(F('addon_price') * F('quantity'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+                )
+            )
+            with transaction.atomic():
+                cls.objects.filter(date__range=(day, last)).delete()
+                created = cls.objects.bulk_create([
+                    cls(
+                        date=row['day'], menu_item_id=row['menu_item_id'],
+                        quantity=row['sold'], revenue=row['total'], addon_revenue=row['addons'],
+                    )
+                    for row in rows
+                ], batch_size=1000)
+            written += len(created)
+            day = last + timedelta(days=1)
+        return written
+
+
+class ItemForecast(models.Model):
+    """Expected portions of a dish in one service window of a day, written nightly by forecast_demand."""
+    date = models.DateField()
+    window = models.CharField(max_length=30)  # a name from settings.SERVICE_WINDOWS
+    menu_item = models.ForeignKey('menu.MenuItem', on_delete=models.CASCADE, related_name='forecasts')
+    quantity = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['date', 'menu_item']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'window', 'menu_item'], name='item_forecast_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.date} {self.window} — {self.menu_item_id}: {self.quantity:.1f}'
@@ -1,36 +1,37 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.conf import settings
 from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.db.models import Sum, Count, Q
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+import asyncio
 import json
+import math
 
 from .decorators import staff_required, manager_required
-from orders.models import Order, OrderItem
+from .forecast import window_names
+from .models import ItemForecast, StaffProfile
+from orders.events import get_broker, order_payload
+from orders.models import DeletedOrder, Order, OrderItem
+from orders.prep import WINDOW_MINUTES, prep_list as build_prep_list
+from orders.status import STATUS_FLOW, STATUS_LABELS, advance, bulk_transition, transition
+from restaurant_site.search import filter_search
 
 
-STATUS_FLOW = {
-    'pending':   'confirmed',
-    'confirmed': 'preparing',
-    'preparing': 'ready',
-    'ready':     'completed',
-}
+CHANGES_PAGE_SIZE = 200
+CHANGES_OVERLAP = timedelta(seconds=5)  # re-sent so a row committed late with an earlier updated_at isn't skipped
+CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
 
-STATUS_LABELS = {
-    'pending':   'Pending',
-    'confirmed': 'Confirmed',
-    'preparing': 'Preparing',
-    'ready':     'Ready',
-    'completed': 'Completed',
-    'cancelled': 'Cancelled',
-}
+BULK_STATUSES = ['preparing', 'ready', 'completed', 'cancelled']
 
 
 @staff_required
 def orders_list(request):
     """All orders with filters and search."""
-    orders = Order.objects.prefetch_related('items').order_by('-created_at')
+    orders = Order.objects.with_item_counts().order_by('-created_at')
 
     # ── Filters ──
     status_filter = request.GET.get('status', '')
@@ -49,11 +50,7 @@ def orders_list(request):
             pass
 
     if search:
-        orders = orders.filter(
-            Q(name__icontains=search) |
-            Q(email__icontains=search) |
-            Q(order_number__icontains=search)
-        )
+        orders = filter_search(orders, search)
 
     # ── Quick counts for filter tabs ──
     all_orders = Order.objects.all()
@@ -115,12 +112,13 @@ def order_update_status(request, order_id):
     order = get_object_or_404(Order, id=order_id)
     next_status = STATUS_FLOW.get(order.status)
 
-    if next_status:
-        order.status = next_status
-        order.save()
+    if not next_status:
+        messages.error(request, 'Cannot advance this order further.')
+    elif advance(order):
         messages.success(request, f'Order #{str(order.order_number)[:8].upper()} marked as {STATUS_LABELS[next_status]}.')
     else:
-        messages.error(request, 'Cannot advance this order further.')
+        order.refresh_from_db(fields=['status'])
+        messages.error(request, f'Order was already moved to {STATUS_LABELS[order.status]} by someone else.')
 
     # Return JSON if AJAX
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -141,14 +139,179 @@ def order_cancel(request, order_id):
         messages.error(request, 'Cannot cancel a completed order.')
         return redirect('dashboard:order_detail', order_id=order_id)
 
-    order.status = 'cancelled'
-    order.save()
+    if not transition(order, 'cancelled'):
+        messages.error(request, 'This order changed status before it could be cancelled.')
+        return redirect('dashboard:order_detail', order_id=order_id)
+
     messages.success(request, f'Order #{str(order.order_number)[:8].upper()} has been cancelled.')
     return redirect('dashboard:orders_list')
 
 
+@staff_required
+def orders_bulk_status(request):
+    """Move every selected order to one status in a single request."""
+    if request.method != 'POST':
+        return redirect('dashboard:orders_list')
+
+    to_status = request.POST.get('status', '')
+    order_ids = [int(pk) for pk in request.POST.getlist('order_ids') if pk.isdigit()]
+
+    if to_status not in BULK_STATUSES or not order_ids:
+        messages.error(request, 'Select at least one order and a status.')
+    else:
+        moved = bulk_transition(order_ids, to_status)
+        skipped = len(order_ids) - len(moved)
+        if moved:
+            messages.success(request, f'{len(moved)} order{"s" if len(moved) != 1 else ""} marked as {STATUS_LABELS[to_status]}.')
+        if skipped:
+            messages.error(request, f'{skipped} order{"s" if skipped != 1 else ""} skipped — not in a status that can move to {STATUS_LABELS[to_status]}.')
+
+    next_url = request.POST.get('next', '')
+    if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect('dashboard:orders_list')
+
+
 @staff_required
 def order_print(request, order_id):
     """Print-friendly receipt view."""
     order = get_object_or_404(Order.objects.prefetch_related('items'), id=order_id)
-    return render(request, 'dashboard/order_print.html', {'order': order})
\ No newline at end of file
+    return render(request, 'dashboard/order_print.html', {'order': order})
+
+
+@staff_required
+def prep_list(request):
+    """Printable prep list: dish totals across open orders by pickup window."""
+    data = build_prep_list()
+    return render(request, 'dashboard/prep_list.html', {
+        'windows': data['windows'],
+        'totals': data['totals'],
+        'window_minutes': WINDOW_MINUTES,
+        'generated_at': timezone.now(),
+    })
+
+
+@staff_required
+def prep_plan(request):
+    """Tomorrow's expected portions per dish and service window, from the nightly forecast."""
+    tomorrow = timezone.localdate() + timedelta(days=1)
+    try:
+        day = date.fromisoformat(request.GET.get('date', ''))
+    except ValueError:
+        day = tomorrow
+
+    names = window_names()
+    dishes = {}
+    forecasts = ItemForecast.objects.filter(date=day, window__in=names).select_related('menu_item__category')
+    for forecast in forecasts:
+        dish = dishes.setdefault(forecast.menu_item_id, {
+            'item': forecast.menu_item, 'windows': [0] * len(names), 'total': 0,
+        })
+        dish['windows'][names.index(forecast.window)] = forecast.quantity
+        dish['total'] += forecast.quantity
+    rows = sorted(dishes.values(), key=lambda dish: (-dish['total'], dish['item'].name))
+    for dish in rows:
+        dish['prep'] = math.ceil(dish['total'])
+
+    context = {
+        'day': day,
+        'previous_day': day - timedelta(days=1),
+        'next_day': day + timedelta(days=1),
+        'tomorrow': tomorrow,
+        'windows': names,
+        'window_totals': [(name, sum(dish['windows'][i] for dish in rows)) for i, name in enumerate(names)],
+        'rows': rows,
+        'total': sum(dish['total'] for dish in rows),
+        'generated_at': max((forecast.created_at for forecast in forecasts), default=None),
+        'pending_orders': Order.objects.filter(status='pending').count(),
+        'pending_reservations': 0,
+    }
+    return render(request, 'dashboard/prep_plan.html', context)
+
+
+async def orders_stream(request):
+    """Server-Sent Events feed of order changes for the live order board."""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=403)
+    if not await StaffProfile.objects.filter(user_id=user.id, is_active=True).aexists():
+        return HttpResponse(status=403)
+
+    # A sync worker would be pinned forever by an endless stream —
+    # 204 tells EventSource to stop and the page falls back to polling.
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(_order_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def _order_events():
+    async with get_broker().subscribe() as queue:
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=settings.ORDER_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield f'data: {message}\n\n'
+
+
+@staff_required
+def orders_changes(request):
+    """
+    Orders changed since a cursor — delta sync for polling clients.
+
+    Rows from the CHANGES_OVERLAP before the cursor come back again (clients
+    upsert by id), and ids deleted since then are listed under 'removed'.
+    """
+    since = _parse_cursor(request.GET.get('since', ''))
+    orders = Order.objects.prefetch_related('items').order_by('updated_at', 'id')
+    overlap, removed = [], []
+
+    if since:
+        updated_at, order_id = since
+        after = Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=order_id)
+        overlap = list(orders.filter(updated_at__gte=updated_at - CHANGES_OVERLAP).exclude(after)[:CHANGES_PAGE_SIZE])
+        orders = orders.filter(after)
+        removed = list(
+            DeletedOrder.objects.filter(deleted_at__gte=updated_at - CHANGES_OVERLAP)
+            .order_by('deleted_at').values_list('order_id', flat=True)
+        )
+    else:
+        # No cursor yet — bootstrap with today's board
+        orders = orders.filter(updated_at__date=timezone.localdate())
+
+    page = list(orders[:CHANGES_PAGE_SIZE + 1])
+    has_more = len(page) > CHANGES_PAGE_SIZE
+    page = page[:CHANGES_PAGE_SIZE]
+
+    if page:
+        cursor = _make_cursor(page[-1].updated_at, page[-1].id)
+    elif since:
+        cursor = request.GET['since']
+    else:
+        cursor = _make_cursor(timezone.now(), 0)
+
+    return JsonResponse({
+        'orders': [order_payload(order) for order in overlap + page],
+        'removed': removed,
+        'cursor': cursor,
+        'has_more': has_more,
+    })
+
+
+def _make_cursor(updated_at, order_id):
+    micros = (updated_at - CURSOR_EPOCH) // timedelta(microseconds=1)
+    return f'{micros}-{order_id}'
+
+
+def _parse_cursor(value):
+    try:
+        micros, order_id = value.split('-')
+        return CURSOR_EPOCH + timedelta(microseconds=int(micros)), int(order_id)
+    except (ValueError, OverflowError, OSError):
+        return None
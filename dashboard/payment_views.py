@@ -1,19 +1,27 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count
 from django.core.paginator import Paginator
-from django.http import HttpResponse
-from datetime import date, timedelta
+from django.http import StreamingHttpResponse
+from datetime import date, datetime, timedelta
 import csv
+import logging
 import stripe
 from django.conf import settings
 
 from .decorators import staff_required, manager_required
 from orders.models import Order
+from orders.status import transition
 from reservations.models import Reservation
+from restaurant_site.search import filter_search
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_LOG_EVERY = 10000
+
 
 def _get_payment_status(order):
     """Return payment status label based on order status."""
@@ -33,14 +41,10 @@ def payments_list(request):
     date_filter = request.GET.get('date', '')
     page        = request.GET.get('page', 1)
 
-    orders = Order.objects.prefetch_related('items').order_by('-created_at')
+    orders = Order.objects.with_item_counts().order_by('-created_at')
 
     if search:
-        orders = orders.filter(
-            Q(name__icontains=search) |
-            Q(email__icontains=search) |
-            Q(order_number__icontains=search)
-        )
+        orders = filter_search(orders, search)
 
     if status_f == 'paid':
         orders = orders.filter(status__in=['confirmed', 'preparing', 'ready', 'completed'])
@@ -169,8 +173,7 @@ def payment_refund(request, order_id):
         refund = stripe.Refund.create(**refund_params)
 
         if refund.status == 'succeeded':
-            order.status = 'cancelled'
-            order.save()
+            transition(order, 'cancelled', Order.PAID_STATUSES)
             messages.success(request, f'Refund of ${float(refund.amount)/100:.2f} processed successfully.')
         else:
             messages.error(request, f'Refund status: {refund.status}. Check your Stripe dashboard.')
@@ -181,46 +184,77 @@ def payment_refund(request, order_id):
     return redirect('dashboard:payment_detail', order_id=order_id)
 
 
-@staff_required
-@manager_required
-def payments_export_csv(request):
-    """Export all confirmed transactions to CSV."""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="transactions_{date.today()}.csv"'
+class _Echo:
+    """File-like object that hands each csv row straight back to the caller."""
+    def write(self, value):
+        return value
 
-    writer = csv.writer(response)
-    writer.writerow(['Order #', 'Date', 'Customer', 'Email', 'Phone', 'Items', 'Total', 'Status', 'Pickup Time'])
 
-    orders = Order.objects.filter(
-        status__in=['confirmed', 'preparing', 'ready', 'completed', 'cancelled']
-    ).prefetch_related('items').order_by('-created_at')
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
 
-    # Apply same filters as list view
-    search      = request.GET.get('search', '').strip()
-    date_filter = request.GET.get('date', '')
 
-    if search:
-        orders = orders.filter(Q(name__icontains=search) | Q(email__icontains=search))
+def _export_rows(orders, filename):
+    """Yield CSV lines one order at a time, logging progress as it goes."""
+    writer = csv.writer(_Echo())
+    rows = 0
+    sent = 0
 
-    if date_filter:
-        try:
-            from datetime import datetime
-            d = datetime.strptime(date_filter, '%Y-%m-%d').date()
-            orders = orders.filter(created_at__date=d)
-        except ValueError:
-            pass
+    line = writer.writerow(['Order #', 'Date', 'Customer', 'Email', 'Phone', 'Items', 'Total', 'Status', 'Pickup Time'])
+    sent += len(line.encode('utf-8'))
+    yield line
 
-    for order in orders:
-        writer.writerow([
+    for order in orders.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        line = writer.writerow([
             str(order.order_number)[:8].upper(),
             order.created_at.strftime('%Y-%m-%d %H:%M'),
             order.name,
             order.email,
             order.phone,
-            order.items.count(),
+            order.items_count,
             order.total,
             order.get_status_display(),
             order.pickup_time.strftime('%Y-%m-%d %H:%M') if order.pickup_time else '',
         ])
+        rows += 1
+        sent += len(line.encode('utf-8'))
+        if rows % EXPORT_LOG_EVERY == 0:
+            logger.info('%s: %d rows, %d bytes streamed', filename, rows, sent)
+        yield line
+
+    logger.info('%s: finished — %d rows, %d bytes', filename, rows, sent)
+
+
+@staff_required
+@manager_required
+def payments_export_csv(request):
+    """Stream confirmed transactions as CSV — accepts search, date, from and to."""
+    orders = Order.objects.filter(
+        status__in=['confirmed', 'preparing', 'ready', 'completed', 'cancelled']
+    ).only(
+        'order_number', 'created_at', 'name', 'email', 'phone', 'total', 'status', 'pickup_time',
+    ).with_item_counts().order_by('-created_at')
+
+    # Apply same filters as list view
+    search      = request.GET.get('search', '').strip()
+    date_filter = _parse_date(request.GET.get('date'))
+    date_from   = _parse_date(request.GET.get('from'))
+    date_to     = _parse_date(request.GET.get('to'))
+
+    if search:
+        orders = filter_search(orders, search)
 
-    return response
\ No newline at end of file
+    if date_filter:
+        orders = orders.filter(created_at__date=date_filter)
+    if date_from:
+        orders = orders.filter(created_at__date__gte=date_from)
+    if date_to:
+        orders = orders.filter(created_at__date__lte=date_to)
+
+    filename = f'transactions_{date.today()}.csv'
+    response = StreamingHttpResponse(_export_rows(orders, filename), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+from django.shortcuts import render
+from django.utils import timezone
+
+from .analytics import menu_engineering, throughput_report
+from .decorators import manager_required, staff_required
+from orders.models import Order
+from reservations.models import Reservation
+
+
+REPORT_RANGES = [7, 14, 30, 90]
+
+
+@staff_required
+@manager_required
+def kitchen_report(request):
+    """Median / p90 time tickets spend in each status, by hour and by day."""
+    try:
+        days = int(request.GET.get('days', 14))
+    except ValueError:
+        days = 14
+    if days not in REPORT_RANGES:
+        days = 14
+
+    report = throughput_report(days)
+    context = {
+        'report': report,
+        'sections': [('Hour', report['hours']), ('Day', report['days'])],
+        'days': days,
+        'ranges': REPORT_RANGES,
+        'pending_orders': Order.objects.filter(status='pending').count(),
+        'pending_reservations': Reservation.objects.filter(status='pending').count(),
+    }
+    return render(request, 'dashboard/kitchen_report.html', context)
+
+
+def _date_param(request, name, default):
+    try:
+        return date.fromisoformat(request.GET.get(name, ''))
+    except ValueError:
+        return default
+
+
+@staff_required
+@manager_required
+def menu_report(request):
+    """Menu engineering: each dish's popularity and earnings over any date range, from the daily rollup."""
+    today = timezone.localdate()
+    end = _date_param(request, 'end', today)
+    start = _date_param(request, 'start', end - timedelta(days=29))
+    if start > end:
+        start, end = end, start
+
+    context = {
+        'report': menu_engineering(start, end),
+        'start': start,
+        'end': end,
+        'presets': [(days, today - timedelta(days=days - 1)) for days in REPORT_RANGES],
+        'today': today,
+        'pending_orders': Order.objects.filter(status='pending').count(),
+        'pending_reservations': Reservation.objects.filter(status='pending').count(),
+    }
+    return render(request, 'dashboard/menu_report.html', context)
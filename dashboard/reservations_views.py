@@ -1,11 +1,17 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Q
-from datetime import date
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from datetime import date, datetime, timedelta
 
-from .decorators import staff_required
+from .decorators import staff_required, manager_required
 from orders.models import Order
-from reservations.models import Reservation
+from reservations.availability import turn_minutes
+from reservations.calendar import calendar
+from reservations.models import Reservation, SeatingCapacity, Table, TurnTime
+from reservations.tables import assign_night
+from restaurant_site.search import filter_search
 
 
 @staff_required
@@ -30,11 +36,7 @@ def reservations_list(request):
             pass
 
     if search:
-        reservations = reservations.filter(
-            Q(name__icontains=search) |
-            Q(email__icontains=search) |
-            Q(phone__icontains=search)
-        )
+        reservations = filter_search(reservations, search)
 
     # ── Counts for tabs ──
     all_res = Reservation.objects.all()
@@ -71,6 +73,7 @@ def reservation_detail(request, reservation_id):
 
     context = {
         'reservation': reservation,
+        'tables': reservation.tables.all(),
         'pending_orders': Order.objects.filter(status='pending').count(),
         'pending_reservations': Reservation.objects.filter(status='pending').count(),
     }
@@ -137,4 +140,139 @@ def reservation_add_note(request, reservation_id):
     else:
         messages.error(request, 'Note cannot be empty.')
 
-    return redirect('dashboard:reservation_detail', reservation_id=reservation_id)
\ No newline at end of file
+    return redirect('dashboard:reservation_detail', reservation_id=reservation_id)
+
+
+def _parse_day(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return timezone.localdate()
+
+
+@staff_required
+def reservations_floor(request):
+    """Timeline of every table for one night, with the bookings assigned to it."""
+    day = _parse_day(request.GET.get('date'))
+    turns = list(TurnTime.objects.values_list('max_party_size', 'minutes'))
+    tables = list(Table.objects.filter(is_active=True))
+    bookings = list(
+        Reservation.objects.filter(date=day, status='confirmed')
+        .prefetch_related('tables').order_by('time')
+    )
+
+    # Timeline spans the night's services, widened to fit any odd booking
+    services = SeatingCapacity.objects.filter(weekday=day.weekday())
+    starts = [s.first_seating.hour * 60 + s.first_seating.minute for s in services]
+    ends = [s.last_seating.hour * 60 + s.last_seating.minute + max([m for _, m in turns] or [90]) for s in services]
+    for booking in bookings:
+        booking.start = booking.time.hour * 60 + booking.time.minute
+        booking.end = booking.start + turn_minutes(booking.number_of_guests, turns)
+        starts.append(booking.start)
+        ends.append(booking.end)
+    first = (min(starts) // 60) * 60 if starts else 11 * 60
+    last = -(-max(ends) // 60) * 60 if ends else 22 * 60
+    span = max(last - first, 60)
+
+    rows = {table.id: {'table': table, 'bookings': []} for table in tables}
+    unassigned = []
+    for booking in bookings:
+        booking.left = (booking.start - first) * 100 / span
+        booking.width = (booking.end - booking.start) * 100 / span
+        assigned = [t for t in booking.tables.all() if t.id in rows]
+        if not assigned:
+            unassigned.append(booking)
+        for table in assigned:
+            rows[table.id]['bookings'].append(booking)
+
+    context = {
+        'day': day,
+        'rows': rows.values(),
+        'unassigned': unassigned,
+        'hours': [
+            {'label': f'{(m // 60 - 1) % 12 + 1}{"am" if m < 720 else "pm"}', 'left': (m - first) * 100 / span}
+            for m in range(first, last, 60)
+        ],
+        'covers': sum(b.number_of_guests for b in bookings),
+        'seats': sum(t.seats for t in tables),
+        'pending_orders': Order.objects.filter(status='pending').count(),
+        'pending_reservations': Reservation.objects.filter(status='pending').count(),
+    }
+    return render(request, 'dashboard/reservations_floor.html', context)
+
+
+@staff_required
+@manager_required
+def reservations_reassign(request):
+    """Re-pack every confirmed booking on a night onto tables from scratch."""
+    if request.method != 'POST':
+        return redirect('dashboard:reservations_floor')
+    day = _parse_day(request.POST.get('date'))
+    unassigned = assign_night(day)
+    if unassigned:
+        messages.error(request, f'{len(unassigned)} booking{"s" if len(unassigned) != 1 else ""} could not be seated.')
+    else:
+        messages.success(request, f'All bookings on {day:%b %d} have a table.')
+    return redirect(f"{reverse('dashboard:reservations_floor')}?date={day.isoformat()}")
+
+
+def _calendar_range(request):
+    """(view, start, end) for a week (Monday–Sunday) or calendar month around ?start=."""
+    view = 'month' if request.GET.get('view') == 'month' else 'week'
+    day = _parse_day(request.GET.get('start'))
+    if view == 'month':
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    else:
+        start = day - timedelta(days=day.weekday())
+        end = start + timedelta(days=6)
+    return view, start, end
+
+
+@staff_required
+def reservations_calendar(request):
+    """Covers and bookings per half hour across a week or month."""
+    view, start, end = _calendar_range(request)
+    data = calendar(start, end)
+
+    if view == 'month':
+        previous = (start - timedelta(days=1)).replace(day=1)
+        following = end + timedelta(days=1)
+    else:
+        previous, following = start - timedelta(days=7), end + timedelta(days=1)
+
+    context = {
+        'view': view,
+        'calendar': data,
+        'previous': previous,
+        'following': following,
+        'today': timezone.localdate(),
+        'total_covers': sum(day['covers'] for day in data['days']),
+        'total_bookings': sum(day['bookings'] for day in data['days']),
+        'pending_orders': Order.objects.filter(status='pending').count(),
+        'pending_reservations': Reservation.objects.filter(status='pending').count(),
+    }
+    return render(request, 'dashboard/reservations_calendar.html', context)
+
+
+@staff_required
+def reservations_calendar_data(request):
+    """The calendar grid as JSON."""
+    view, start, end = _calendar_range(request)
+    data = calendar(start, end)
+    return JsonResponse({
+        'view': view,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': [{**day, 'date': day['date'].isoformat()} for day in data['days']],
+        'buckets': [
+            {
+                'time': f"{row['minute'] // 60:02d}:{row['minute'] % 60:02d}",
+                'cells': [
+                    {key: cell[key] for key in ('bookings', 'covers', 'pending')} if cell else None
+                    for cell in row['cells']
+                ],
+            }
+            for row in data['rows']
+        ],
+    })
@@ -1,3 +1,448 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from menu.models import Category, MenuItem
+from orders.events import get_broker
+from orders.models import Order, OrderItem, OrderStatusEvent
+from orders.status import transition
+from reservations.calendar import build_calendar
+from reservations.models import Reservation
+from restaurant_site.search import filter_search
+
+from .analytics import menu_engineering, throughput_report
+from .forecast import forecast_demand, predict
+from .models import Customer, ItemDailySales, ItemForecast, StaffProfile
+from .orders_views import _order_events
+
+
+class ListPageQueryCountTests(TestCase):
+    """List pages must not issue a query per order row."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='pass')
+        StaffProfile.objects.create(user=cls.user, role='owner')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _add_orders(self, count, email='guest@example.com'):
+        for i in range(count):
+            order = Order.objects.create(
+                name=f'Guest {i}', email=email, phone='+63 912 345 6789',
+                pickup_time=timezone.now(), total=Decimal('20.00'), status='confirmed',
+            )
+            for n in range(3):
+                OrderItem.objects.create(
+                    order=order, name=f'Dish {n}', price=Decimal('5.00'),
+                    quantity=2, item_total=Decimal('10.00'),
+                )
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def _assert_fixed_query_count(self, url):
+        self._add_orders(1)
+        few = self._count_queries(url)
+        self._add_orders(6)
+        many = self._count_queries(url)
+        self.assertEqual(few, many)
+
+    def test_orders_list(self):
+        self._assert_fixed_query_count(reverse('dashboard:orders_list'))
+
+    def test_payments_list(self):
+        self._assert_fixed_query_count(reverse('dashboard:payments_list'))
+
+    def test_dashboard_home(self):
+        self._assert_fixed_query_count(reverse('dashboard:home'))
+
+    def test_customer_detail(self):
+        self._assert_fixed_query_count(reverse('dashboard:customer_detail', args=['guest@example.com']))
+
+    def test_customers_list(self):
+        self._add_orders(1, email='first@example.com')
+        Customer.rebuild()
+        few = self._count_queries(reverse('dashboard:customers_list'))
+        self._add_orders(6, email='second@example.com')
+        Customer.rebuild()
+        self.assertEqual(few, self._count_queries(reverse('dashboard:customers_list')))
+
+    def test_payments_export(self):
+        self._assert_fixed_query_count(reverse('dashboard:payments_export_csv'))
+
+    def test_payments_export_streams_rows(self):
+        self._add_orders(3)
+        response = self.client.get(reverse('dashboard:payments_export_csv'), {'from': '2000-01-01'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[1].split(',')[5], '3')
+
+    def test_items_count_annotation(self):
+        self._add_orders(1)
+        order = Order.objects.with_item_counts().get()
+        self.assertEqual(order.items_count, 3)
+        self.assertEqual(order.items_quantity, 6)
+
+
+class SearchTests(TestCase):
+    """The search box finds orders by any part of the guest's details, with or without pg_trgm."""
+
+    def setUp(self):
+        self.maria = Order.objects.create(
+            name='Maria dela Cruz', email='maria.cruz@gmail.com', phone='+63 912 345 6789',
+            pickup_time=timezone.now(), total=Decimal('10.00'),
+        )
+        Order.objects.create(
+            name='Jose Santos', email='jose@yahoo.com', phone='+63 917 000 1111',
+            pickup_time=timezone.now(), total=Decimal('10.00'),
+        )
+
+    def _found(self, term):
+        found = [list(filter_search(Order.objects.all(), term))]
+        with mock.patch('restaurant_site.search.uses_trigram_index', return_value=True):
+            found.append(list(filter_search(Order.objects.all(), term)))
+        return found
+
+    def test_every_kind_of_query_on_both_paths(self):
+        number = str(self.maria.order_number)
+        for term in ['maria', 'Cruz', 'gmail', 'maria.cruz', '6789', '912 345 6789',
+                     '#' + self.maria.short_code, number, number.upper(), number[4:20], 'ruz']:
+            with self.subTest(term=term):
+                self.assertEqual(self._found(term), [[self.maria], [self.maria]])
+
+    def test_no_match(self):
+        self.assertEqual(self._found('zzzz'), [[], []])
+
+
+class OrderChangesFeedTests(TestCase):
+    """The delta feed returns only orders changed after the cursor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('kitchen', password='pass')
+        StaffProfile.objects.create(user=cls.user, role='staff')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('dashboard:orders_changes')
+
+    def _order(self, name):
+        order = Order.objects.create(
+            name=name, email='guest@example.com', phone='0912',
+            pickup_time=timezone.now(), total=Decimal('10.00'), status='confirmed',
+        )
+        OrderItem.objects.create(
+            order=order, name='Adobo', price=Decimal('10.00'), quantity=1, item_total=Decimal('10.00'),
+        )
+        return order
+
+    def test_cursor_returns_only_changes(self):
+        first = self._order('First')
+        second = self._order('Second')
+        data = self.client.get(self.url).json()
+        self.assertEqual([o['id'] for o in data['orders']], [first.id, second.id])
+        self.assertEqual(data['orders'][0]['items'], [{'name': 'Adobo', 'quantity': 1}])
+
+        # Settle both rows outside the overlap window
+        Order.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        data = self.client.get(self.url, {'since': data['cursor']}).json()
+        self.assertEqual(data['orders'], [])
+
+        first.status = 'preparing'
+        first.save()
+        data = self.client.get(self.url, {'since': data['cursor']}).json()
+        self.assertEqual([(o['id'], o['status']) for o in data['orders']], [(first.id, 'preparing')])
+        self.assertFalse(data['has_more'])
+
+    def test_late_commits_and_deletions(self):
+        seen = self._order('Seen')
+        seen_id = seen.id
+        cursor = self.client.get(self.url).json()['cursor']
+        # Stamped before the cursor's row but committed after the client polled
+        late = self._order('Late')
+        Order.objects.filter(pk=late.pk).update(updated_at=seen.updated_at - timedelta(seconds=1))
+        seen.delete()
+        data = self.client.get(self.url, {'since': cursor}).json()
+        self.assertEqual([o['id'] for o in data['orders']], [late.id])
+        self.assertEqual(data['removed'], [seen_id])
+
+    def test_bulk_status(self):
+        first, second = self._order('First'), self._order('Second')
+        response = self.client.post(reverse('dashboard:orders_bulk_status'), {
+            'order_ids': [first.id, second.id], 'status': 'preparing', 'next': '/dashboard/orders/?status=confirmed',
+        })
+        self.assertRedirects(response, '/dashboard/orders/?status=confirmed', fetch_redirect_response=False)
+        self.assertEqual(Order.objects.filter(status='preparing').count(), 2)
+
+
+class OrderStreamTests(TestCase):
+    """The SSE board feed is staff-only and refuses to tie up sync workers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('kitchen', password='pass')
+        StaffProfile.objects.create(user=cls.staff, role='staff')
+        cls.guest = User.objects.create_user('guest', password='pass')
+
+    def setUp(self):
+        self.url = reverse('dashboard:orders_stream')
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_login(self.guest)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_wsgi_gets_no_content(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(self.url).status_code, 204)
+
+    async def test_asgi_streams_published_events(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(self.url)
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'text/event-stream'))
+
+        events = _order_events()
+        self.assertEqual(await anext(events), 'retry: 3000\n\n')  # subscribed from here on
+        get_broker().publish('{"event": "order_created"}')
+        self.assertEqual(await anext(events), 'data: {"event": "order_created"}\n\n')
+        await events.aclose()
+
+
+class InactiveManagerTests(TestCase):
+    """A deactivated manager is turned away from manager-only reports and actions."""
+
+    def setUp(self):
+        user = User.objects.create_user('former', password='pass')
+        StaffProfile.objects.create(user=user, role='manager', is_active=False)
+        self.client.force_login(user)
+
+    def test_redirected_to_login(self):
+        day = (timezone.localdate() + timedelta(days=1)).isoformat()
+        with mock.patch('dashboard.reservations_views.assign_night') as assign:
+            responses = [
+                self.client.get(reverse('dashboard:kitchen_report')),
+                self.client.get(reverse('dashboard:menu_report')),
+                self.client.post(reverse('dashboard:reservations_reassign'), {'date': day}),
+            ]
+        for response in responses:
+            self.assertRedirects(response, reverse('dashboard:login'), fetch_redirect_response=False)
+        assign.assert_not_called()
+
+
+class KitchenThroughputTests(TestCase):
+    """Time in state is measured between consecutive status events."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', password='pass')
+        StaffProfile.objects.create(user=cls.user, role='manager')
+
+    def _ticket(self, minutes_in_state):
+        placed = timezone.now() - timedelta(hours=2)
+        order = Order.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            pickup_time=placed, total=Decimal('10.00'), status='completed',
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=placed)
+        at = placed
+        flow = ['pending', 'confirmed', 'preparing', 'ready', 'completed']
+        for previous, status, minutes in zip(flow, flow[1:], minutes_in_state):
+            at += timedelta(minutes=minutes)
+            OrderStatusEvent.objects.create(order=order, from_status=previous, to_status=status, created_at=at)
+
+    def test_median_and_p90_per_state(self):
+        for preparing in [10, 20, 30, 40, 50]:
+            self._ticket([1, 2, preparing, 5])
+        report = throughput_report(days=1)
+        cells = {item['state']: item['cell'] for item in report['summary']}
+        self.assertAlmostEqual(cells['Pending']['median'], 1)
+        self.assertAlmostEqual(cells['Preparing']['median'], 30)
+        self.assertAlmostEqual(cells['Preparing']['p90'], 46)
+        self.assertEqual(cells['Ready for Pickup']['count'], 5)
+        self.assertEqual(report['bottleneck'], 'Preparing')
+
+    def test_report_page(self):
+        self._ticket([1, 2, 3, 4])
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard:kitchen_report'))
+        self.assertContains(response, 'Time in Status')
+
+
+class ItemSalesTests(TestCase):
+    """Daily dish sales follow orders in and out of paid, and feed the menu-engineering report."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', password='pass')
+        StaffProfile.objects.create(user=cls.user, role='manager')
+        mains = Category.objects.create(name='Mains')
+        cls.adobo = MenuItem.objects.create(category=mains, name='Adobo', price=Decimal('10.00'))
+        cls.lechon = MenuItem.objects.create(category=mains, name='Lechon', price=Decimal('20.00'))
+        cls.pancit = MenuItem.objects.create(category=mains, name='Pancit', price=Decimal('8.00'))
+        cls.kare = MenuItem.objects.create(category=mains, name='Kare-kare', price=Decimal('18.00'))
+
+    def _order(self, lines, status='pending'):
+        order = Order.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            pickup_time=timezone.now(), total=Decimal('10.00'), status=status,
+        )
+        for item, quantity, addon in lines:
+            price = item.price + addon
+            OrderItem.objects.create(
+                order=order, menu_item=item, name=item.name, price=price, addon_price=addon,
+                quantity=quantity, item_total=price * quantity,
+            )
+        return order
+
+    def _today(self, item):
+        return ItemDailySales.objects.filter(date=timezone.localdate(), menu_item=item).values_list(
+            'quantity', 'revenue', 'addon_revenue',
+        ).first()
+
+    def test_paid_and_refunded_orders_move_the_rollup(self):
+        first = self._order([(self.adobo, 2, Decimal('1.50'))])
+        second = self._order([(self.adobo, 1, Decimal('0'))])
+        self.assertIsNone(self._today(self.adobo))  # unpaid orders don't count
+
+        transition(first, 'confirmed', ['pending'])
+        transition(second, 'confirmed', ['pending'])
+        transition(second, 'preparing')  # paid to paid — no change
+        self.assertEqual(self._today(self.adobo), (3, Decimal('33.00'), Decimal('3.00')))
+
+        transition(first, 'cancelled')
+        self.assertEqual(self._today(self.adobo), (1, Decimal('10.00'), Decimal('0.00')))
+
+    def test_rebuild_matches_incremental(self):
+        for lines in [[(self.adobo, 2, Decimal('1.50')), (self.lechon, 1, Decimal('0'))], [(self.pancit, 4, Decimal('0'))]]:
+            transition(self._order(lines), 'confirmed', ['pending'])
+        self._order([(self.kare, 5, Decimal('0'))])  # never paid
+        incremental = sorted(ItemDailySales.objects.values_list('date', 'menu_item', 'quantity', 'revenue', 'addon_revenue'))
+        ItemDailySales.objects.all().delete()
+        self.assertEqual(ItemDailySales.rebuild(), 3)
+        self.assertEqual(sorted(ItemDailySales.objects.values_list('date', 'menu_item', 'quantity', 'revenue', 'addon_revenue')), incremental)
+
+    def test_quadrants(self):
+        today = timezone.localdate()
+        for item, quantity, revenue in [(self.adobo, 40, 420), (self.lechon, 30, 600), (self.pancit, 5, 40)]:
+            ItemDailySales.objects.create(date=today, menu_item=item, quantity=quantity, revenue=revenue)
+        ItemDailySales.objects.create(date=today - timedelta(days=60), menu_item=self.kare, quantity=50, revenue=900)
+
+        with self.assertNumQueries(2):
+            report = menu_engineering(today - timedelta(days=29), today)
+        classes = {row['name']: row['quadrant'] for row in report['rows']}
+        # 75 portions over 4 dishes: popular from 13.1; average $14.13 per portion
+        self.assertEqual(classes, {'Adobo': 'plowhorse', 'Lechon': 'star', 'Pancit': 'dog', 'Kare-kare': 'puzzle'})
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard:menu_report'), {'start': today.isoformat(), 'end': today.isoformat()})
+        self.assertContains(response, 'Plowhorse')
+
+
+@override_settings(SERVICE_WINDOWS=[('Lunch', 10), ('Dinner', 17)])
+class ForecastTests(TestCase):
+    """Next-day demand per dish and window from a weekday pattern and a smoothed level."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cook', password='pass')
+        StaffProfile.objects.create(user=cls.user, role='staff')
+        mains = Category.objects.create(name='Mains')
+        cls.adobo = MenuItem.objects.create(category=mains, name='Adobo', price=Decimal('10.00'))
+        cls.lechon = MenuItem.objects.create(category=mains, name='Lechon', price=Decimal('20.00'))
+
+    def test_weekday_pattern_and_level(self):
+        weekdays = np.arange(56) % 7
+        steady = np.where(weekdays == 5, 30.0, 10.0)  # Saturdays triple
+        growing = steady * np.r_[np.ones(28), np.full(28, 2.0)]  # demand doubled four weeks ago
+        late = np.r_[np.zeros(42), steady[42:]]  # on the menu for two weeks only
+        forecast = predict(np.vstack([steady, growing, late]), weekdays, target_weekday=5)
+        self.assertAlmostEqual(forecast[0], 30, places=6)
+        self.assertAlmostEqual(forecast[1], 60, delta=3)
+        self.assertAlmostEqual(forecast[2], 30, places=6)
+        self.assertAlmostEqual(predict(steady[None, :], weekdays, 0)[0], 10, places=6)
+
+    def _sold(self, item, when, quantity):
+        order = Order.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            pickup_time=when, total=Decimal('10.00'), status='completed',
+        )
+        OrderItem.objects.create(
+            order=order, menu_item=item, name=item.name, price=item.price, quantity=quantity, item_total=item.price * quantity,
+        )
+
+    def test_forecast_stored_per_window(self):
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        zone = timezone.get_current_timezone()
+        for days_back in range(1, 29):
+            day = tomorrow - timedelta(days=days_back)
+            self._sold(self.adobo, timezone.make_aware(datetime.combine(day, time(12, 30)), zone), 4)
+            self._sold(self.adobo, timezone.make_aware(datetime.combine(day, time(19, 0)), zone), 6)
+            self._sold(self.lechon, timezone.make_aware(datetime.combine(day, time(18, 0)), zone), 2)
+        MenuItem.objects.filter(pk=self.lechon.pk).update(is_available=False)
+
+        result = forecast_demand()
+        self.assertEqual(result['series'], 4)
+        stored = {(f.window, f.menu_item_id): f.quantity for f in ItemForecast.objects.filter(date=tomorrow)}
+        self.assertEqual(stored, {('Lunch', self.adobo.pk): 4.0, ('Dinner', self.adobo.pk): 6.0})
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard:orders_prep_plan'))
+        self.assertContains(response, 'Adobo')
+        self.assertEqual(response.context['rows'][0]['prep'], 10)
+
+
+class ReservationCalendarTests(TestCase):
+    """Half-hour load grid from one grouped query, refreshed when a booking changes."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('host', password='pw')
+        StaffProfile.objects.create(user=self.user, role='staff')
+        self.client.force_login(self.user)
+        self.monday = date.today() - timedelta(days=date.today().weekday()) + timedelta(days=7)
+
+    def _book(self, day, when, guests):
+        return Reservation.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            date=day, time=when, number_of_guests=guests,
+        )
+
+    def test_buckets_and_totals(self):
+        self._book(self.monday, time(19, 0), 2)
+        self._book(self.monday, time(19, 15), 4)
+        self._book(self.monday + timedelta(days=2), time(12, 30), 3)
+        with self.assertNumQueries(1):
+            data = build_calendar(self.monday, self.monday + timedelta(days=6))
+        rows = {row['label']: row['cells'] for row in data['rows']}
+        self.assertEqual(rows['7:00 PM'][0]['covers'], 6)
+        self.assertEqual(rows['7:00 PM'][0]['bookings'], 2)
+        self.assertEqual(rows['12:30 PM'][2]['covers'], 3)
+        self.assertIsNone(rows['12:30 PM'][0])
+        self.assertEqual([day['covers'] for day in data['days']], [6, 0, 3, 0, 0, 0, 0])
+
+    def test_cache_refreshes_on_save(self):
+        url = reverse('dashboard:reservations_calendar_data')
+        params = {'start': self.monday.isoformat()}
+        self.assertEqual(self.client.get(url, params).json()['buckets'], [])
+        booking = self._book(self.monday, time(18, 0), 2)
+        self.assertEqual(self.client.get(url, params).json()['days'][0]['covers'], 2)
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(self.client.get(url, params).json()['days'][0]['covers'], 0)
+        self.assertEqual(self.client.get(reverse('dashboard:reservations_calendar'), {'view': 'month'}).status_code, 200)
@@ -6,6 +6,7 @@ from . import menu_views
 from . import customer_views
 from . import payment_views
 from . import staff_views
+from . import reports_views
 
 app_name = 'dashboard'
 
@@ -17,6 +18,10 @@ urlpatterns = [
 
     # ── Orders ──
     path('orders/', orders_views.orders_list, name='orders_list'),
+    path('orders/stream/', orders_views.orders_stream, name='orders_stream'),
+    path('orders/bulk-status/', orders_views.orders_bulk_status, name='orders_bulk_status'),
+    path('orders/prep/', orders_views.prep_list, name='orders_prep_list'),
+    path('orders/prep/plan/', orders_views.prep_plan, name='orders_prep_plan'),
     path('orders/<int:order_id>/', orders_views.order_detail, name='order_detail'),
     path('orders/<int:order_id>/status/', orders_views.order_update_status, name='order_update_status'),
     path('orders/<int:order_id>/cancel/', orders_views.order_cancel, name='order_cancel'),
@@ -24,6 +29,9 @@ urlpatterns = [
 
     # ── Reservations ──
     path('reservations/', reservations_views.reservations_list, name='reservations_list'),
+    path('reservations/calendar/', reservations_views.reservations_calendar, name='reservations_calendar'),
+    path('reservations/floor/', reservations_views.reservations_floor, name='reservations_floor'),
+    path('reservations/floor/assign/', reservations_views.reservations_reassign, name='reservations_reassign'),
     path('reservations/<int:reservation_id>/', reservations_views.reservation_detail, name='reservation_detail'),
     path('reservations/<int:reservation_id>/approve/', reservations_views.reservation_approve, name='reservation_approve'),
     path('reservations/<int:reservation_id>/reject/', reservations_views.reservation_reject, name='reservation_reject'),
@@ -36,8 +44,12 @@ urlpatterns = [
     path('menu/<int:item_id>/edit/', menu_views.menu_item_edit, name='menu_item_edit'),
     path('menu/<int:item_id>/delete/', menu_views.menu_item_delete, name='menu_item_delete'),
     path('menu/<int:item_id>/toggle/', menu_views.menu_item_toggle, name='menu_item_toggle'),
+    path('menu/bulk/', menu_views.menu_bulk, name='menu_bulk'),
     path('menu/import/', menu_views.menu_csv_import, name='menu_csv_import'),
     path('menu/import/template/', menu_views.menu_csv_template, name='menu_csv_template'),
+    path('menu/import/jobs/<int:job_id>/', menu_views.menu_import_status, name='menu_import_status'),
+    path('menu/import/jobs/<int:job_id>/errors/', menu_views.menu_import_errors, name='menu_import_errors'),
+    path('menu/export/', menu_views.menu_export, name='menu_export'),
     path('menu/categories/', menu_views.categories_list, name='categories_list'),
 
     # ── Customers ──
@@ -52,6 +64,14 @@ urlpatterns = [
     path('payments/<int:order_id>/', payment_views.payment_detail, name='payment_detail'),
     path('payments/<int:order_id>/refund/', payment_views.payment_refund, name='payment_refund'),
 
+    # ── Reports ──
+    path('reports/kitchen/', reports_views.kitchen_report, name='kitchen_report'),
+    path('reports/menu/', reports_views.menu_report, name='menu_report'),
+
+    # ── API ──
+    path('api/orders/changes/', orders_views.orders_changes, name='orders_changes'),
+    path('api/reservations/calendar/', reservations_views.reservations_calendar_data, name='reservations_calendar_data'),
+
     # ── Staff ──
     path('staff/', staff_views.staff_list, name='staff_list'),
     path('staff/add/', staff_views.staff_add, name='staff_add'),
@@ -79,7 +79,7 @@ def dashboard_home(request):
     # ── Recent orders (last 8) ──
     recent_orders = Order.objects.filter(
         status__in=['confirmed', 'preparing', 'ready', 'completed', 'pending']
-    ).prefetch_related('items').order_by('-created_at')[:8]
+    ).with_item_counts().order_by('-created_at')[:8]
 
     # ── Today's reservations ──
     today_reservations = Reservation.objects.filter(
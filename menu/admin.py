@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, MenuItem, Tag, AddOn
+from .models import Category, ImportJob, MenuItem, MenuSchedule, ModifierGroup, ModifierOption, Tag
 
 
 @admin.register(Tag)
@@ -7,10 +7,18 @@ class TagAdmin(admin.ModelAdmin):
     list_display = ("name",)
 
 
-class AddOnInline(admin.TabularInline):
-    model = AddOn
+class ModifierOptionInline(admin.TabularInline):
+    model = ModifierOption
     extra = 1
-    fields = ("name", "additional_price")
+    fields = ("name", "additional_price", "order_position")
+
+
+@admin.register(ModifierGroup)
+class ModifierGroupAdmin(admin.ModelAdmin):
+    list_display = ("name", "min_selections", "max_selections", "order_position")
+    list_editable = ("min_selections", "max_selections", "order_position")
+    search_fields = ("name", "options__name")
+    inlines = [ModifierOptionInline]
 
 
 class MenuItemInline(admin.TabularInline):
@@ -30,10 +38,28 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(MenuItem)
 class MenuItemAdmin(admin.ModelAdmin):
-    list_display = ("name", "category", "price", "is_available", "is_featured")
+    list_display = ("name", "category", "price", "stock", "is_available", "is_featured")
     list_filter = ("category", "is_available", "is_featured", "tags")
-    list_editable = ("price", "is_available", "is_featured")
+    list_editable = ("price", "stock", "is_available", "is_featured")
     search_fields = ("name", "description")
     prepopulated_fields = {"slug": ("name",)}
-    filter_horizontal = ("tags",)
-    inlines = [AddOnInline]
\ No newline at end of file
+    filter_horizontal = ("tags", "modifier_groups")
+
+
+@admin.register(MenuSchedule)
+class MenuScheduleAdmin(admin.ModelAdmin):
+    list_display = ("name", "weekday", "start_time", "end_time")
+    list_filter = ("weekday", "name")
+    filter_horizontal = ("categories", "items")
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ("filename", "status", "dry_run", "created", "updated", "created_by", "created_at", "finished_at")
+    list_filter = ("status", "dry_run")
+    exclude = ("data",)
+    readonly_fields = (
+        "status", "stage", "filename", "fmt", "dry_run", "total_rows", "processed_rows",
+        "created", "updated", "unchanged", "errors", "preview", "message", "created_by",
+        "started_at", "finished_at",
+    )
+
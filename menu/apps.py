@@ -1,5 +1,28 @@
 from django.apps import AppConfig
+from django.db import transaction
+
+
+def menu_changed(sender, action=None, **kwargs):
+    """
+    A menu row or link was saved or deleted, from anywhere — drop every cached menu.
+
+    The version is bumped on commit, as bulk edits do, so a request in
+    between can't re-cache the old rows under the new version.
+    """
+    if action is None or action.startswith('post_'):
+        from .cache import invalidate_menu
+        transaction.on_commit(invalidate_menu)
 
 
 class MenuConfig(AppConfig):
     name = 'menu'
+
+    def ready(self):
+        from django.db.models.signals import m2m_changed, post_delete, post_save
+        from .models import Category, MenuItem, MenuSchedule, ModifierGroup, ModifierOption, Tag
+        for model in (Tag, Category, MenuItem, ModifierGroup, ModifierOption, MenuSchedule):
+            post_save.connect(menu_changed, sender=model, dispatch_uid=f'menu.saved.{model.__name__}')
+            post_delete.connect(menu_changed, sender=model, dispatch_uid=f'menu.deleted.{model.__name__}')
+        links = (MenuItem.tags, MenuItem.modifier_groups, MenuSchedule.categories, MenuSchedule.items)
+        for link in links:
+            m2m_changed.connect(menu_changed, sender=link.through, dispatch_uid=f'menu.linked.{link.through.__name__}')
@@ -0,0 +1,86 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from .cache import invalidate_menu
+from .models import MenuItem
+
+
+ACTIONS = {
+    'price': 'Change price by %',
+    'hide': 'Hide',
+    'show': 'Show',
+    'feature': 'Feature',
+    'unfeature': 'Unfeature',
+}
+FLAGS = {
+    'hide': ('is_available', False),
+    'show': ('is_available', True),
+    'feature': ('is_featured', True),
+    'unfeature': ('is_featured', False),
+}
+MAX_PRICE = Decimal('999999.99')  # MenuItem.price is max_digits=8
+
+
+def parse_percent(value):
+    """Percent change from the form, e.g. "5" or "-10". Raises ValueError."""
+    try:
+        percent = Decimal(str(value).strip().rstrip('%'))
+    except ArithmeticError:
+        raise ValueError(f'"{value}" is not a percentage.')
+    if not percent.is_finite() or not -100 < percent <= 1000 or percent == 0:
+        raise ValueError('Price change must be between -100% and 1000%, and not zero.')
+    return percent
+
+
+def _factor(percent):
+    return (Decimal(100) + percent) / Decimal(100)
+
+
+def _new_price(price, percent):
+    # Same rounding as ROUND() in the database: half away from zero, two places
+    return (price * _factor(percent)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def preview(items, action, percent=None):
+    """The rows a bulk action would touch, with each one's before and after — nothing is written."""
+    rows = []
+    for item in items:
+        if action == 'price':
+            before, after = item.price, _new_price(item.price, percent)
+            if after > MAX_PRICE:
+                after = before  # apply() leaves these out too
+        else:
+            field, value = FLAGS[action]
+            before, after = getattr(item, field), value
+        rows.append({'item': item, 'before': before, 'after': after, 'changed': before != after})
+    return rows
+
+
+def apply(ids, action, percent=None):
+    """
+    Run a bulk action as one set-based UPDATE and drop the menu cache once.
+
+    Rows already in the target state are left out of the UPDATE. Returns the
+    number of rows changed.
+    """
+    items = MenuItem.objects.filter(pk__in=ids)
+    if action == 'price':
+        new_price = Round(
+            F('price') * Value(_factor(percent), output_field=DecimalField()), 2,
+            output_field=MenuItem._meta.get_field('price'),
+        )
+        items = items.filter(price__lte=MAX_PRICE / _factor(percent)) if percent > 0 else items
+        changes = {'price': new_price}
+    else:
+        field, value = FLAGS[action]
+        items = items.exclude(**{field: value})
+        changes = {field: value}
+
+    count = items.update(updated_at=timezone.now(), **changes)
+    if count:
+        transaction.on_commit(invalidate_menu)
+    return count
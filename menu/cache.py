@@ -0,0 +1,140 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import Category, ItemPairing, MenuItem, ModifierGroup
+from .schedule import segment_at, timeline
+
+
+VERSION_KEY = 'menu:version'
+CACHE_TIMEOUT = 60 * 60 * 24  # saves bump the version; this is only a backstop
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Never restart from 0 after a cache flush — in-process timelines are keyed by it
+        cache.add(VERSION_KEY, time.time_ns() // 1000, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _page_key(part='page'):
+    return f'menu:{part}:{_version()}'
+
+
+def invalidate_menu():
+    """Something on the menu changed — every cached copy is stale."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        _version()
+
+
+def active_segment(when=None):
+    """The stretch of the schedule covering `when` (default now), from the in-memory interval table."""
+    return segment_at(timeline(_version()), when or timezone.now())
+
+
+def is_served(item, when=None):
+    """Is this dish on the menu at `when` — available, not sold out, and inside its and its category's schedule?"""
+    segment = active_segment(when)
+    return item.is_available and not item.is_sold_out and item.pk not in segment.hidden_items and item.category_id not in segment.hidden_categories
+
+
+def off_menu(item_ids, when=None):
+    """The ids among `item_ids` that are not being served at `when`."""
+    segment = active_segment(when)
+    return {
+        pk for pk, category_id, is_available in
+        MenuItem.objects.filter(pk__in=item_ids).values_list('pk', 'category_id', 'is_available')
+        if not is_available or pk in segment.hidden_items or category_id in segment.hidden_categories
+    }
+
+
+def menu_categories(when=None):
+    """
+    Categories and dishes served at `when`, with tags and add-on groups.
+
+    Cached per schedule segment: the key changes at every boundary, so the
+    breakfast menu rolls over to lunch without anyone flipping a switch.
+    """
+    segment = active_segment(when)
+    key = f'{_page_key()}:{segment.weekday}:{segment.index}'
+    categories = cache.get(key)
+    if categories is None:
+        items = MenuItem.objects.exclude(pk__in=segment.hidden_items).exclude(stock=0)
+        categories = list(
+            Category.objects.filter(is_active=True).exclude(pk__in=segment.hidden_categories)
+            .prefetch_related(Prefetch('items', queryset=items), 'items__tags', 'items__modifier_groups')
+        )
+        remaining = (segment.ends_at - timezone.now()).total_seconds()
+        cache.set(key, categories, max(min(CACHE_TIMEOUT, int(remaining)), 60))
+    return categories
+
+
+def menu_modifiers():
+    """Every modifier group in use, keyed by id — sent once per page, not once per dish."""
+    key = _page_key('modifiers')
+    modifiers = cache.get(key)
+    if modifiers is None:
+        modifiers = {
+            group.pk: {
+                'name': group.name,
+                'min': group.min_selections,
+                'max': group.max_selections,
+                'options': [
+                    {'id': option.pk, 'name': option.name, 'price': str(option.additional_price)}
+                    for option in group.options.all()
+                ],
+            }
+            for group in ModifierGroup.objects.filter(items__isnull=False).distinct().prefetch_related('options')
+        }
+        cache.set(key, modifiers, CACHE_TIMEOUT)
+    return modifiers
+
+
+def _pairings():
+    """{dish id: [its ranked partners that are on sale]}, read once per menu version from build_pairings' table."""
+    key = _page_key('pairings')
+    pairings = cache.get(key)
+    if pairings is None:
+        Groups = MenuItem.modifier_groups.through
+        groups = {}
+        for item_id, group_id in Groups.objects.filter(menuitem__is_available=True).values_list('menuitem_id', 'modifiergroup_id'):
+            groups.setdefault(item_id, []).append(group_id)
+        pairings = {}
+        rows = (
+            ItemPairing.objects
+            .filter(paired__is_available=True, paired__category__is_active=True).exclude(paired__stock=0)
+            .order_by('item_id', 'rank')
+            .values_list('item_id', 'paired_id', 'paired__name', 'paired__slug', 'paired__price', 'paired__category_id')
+        )
+        for item_id, pk, name, slug, price, category_id in rows:
+            pairings.setdefault(item_id, []).append({
+                'id': pk, 'name': name, 'slug': slug, 'price': str(price),
+                'category_id': category_id, 'groups': groups.get(pk, []),
+            })
+        cache.set(key, pairings, CACHE_TIMEOUT)
+    return pairings
+
+
+def paired_with(item_ids, limit=3, when=None):
+    """
+    Dishes most often ordered with these, best first, leaving out ones already chosen or not served at `when`.
+
+    Only dictionary and set lookups — the scoring happened in the nightly build.
+    """
+    segment = active_segment(when)
+    pairings = _pairings()
+    chosen = set(item_ids)
+    best = {}
+    for item_id in item_ids:
+        for rank, dish in enumerate(pairings.get(item_id, ())):
+            if dish['id'] in chosen or dish['id'] in segment.hidden_items or dish['category_id'] in segment.hidden_categories:
+                continue
+            if dish['id'] not in best or rank < best[dish['id']][0]:
+                best[dish['id']] = (rank, dish)
+    return [dish for rank, dish in sorted(best.values(), key=lambda pick: pick[0])][:limit]
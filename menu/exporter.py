@@ -0,0 +1,54 @@
+import csv
+import json
+import os
+
+from .importer import COLUMNS
+from .models import MenuItem
+
+
+CHUNK_SIZE = 500
+
+
+class _Echo:
+    """File-like object that hands each csv row straight back to the caller."""
+    def write(self, value):
+        return value
+
+
+def _items():
+    return (
+        MenuItem.objects
+        .select_related('category')
+        .prefetch_related('tags', 'modifier_groups')
+        .order_by('category__order_position', 'category__name', 'name', 'id')
+    )
+
+
+def export_rows():
+    """Every menu item as a dict in the import schema, read in chunks from one pass."""
+    for item in _items().iterator(chunk_size=CHUNK_SIZE):
+        yield {
+            'name': item.name,
+            'category': item.category.name,
+            'price': str(item.price),
+            'description': item.description,
+            'is_available': 'true' if item.is_available else 'false',
+            'is_featured': 'true' if item.is_featured else 'false',
+            'tags': '|'.join(sorted(tag.name for tag in item.tags.all())),
+            'addons': '|'.join(sorted(group.name for group in item.modifier_groups.all())),
+            'image': os.path.basename(item.image.name) if item.image else '',
+        }
+
+
+def csv_lines():
+    """Yield the export as CSV lines, header first."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for row in export_rows():
+        yield writer.writerow([row[column] for column in COLUMNS])
+
+
+def jsonl_lines():
+    """Yield the export as JSON Lines, one item per line."""
+    for row in export_rows():
+        yield json.dumps(row, ensure_ascii=False) + '\n'
@@ -0,0 +1,365 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .cache import invalidate_menu
+from .models import Category, MenuItem, ModifierGroup, ModifierOption, Tag
+
+
+COLUMNS = ['name', 'category', 'price', 'description', 'is_available', 'is_featured', 'tags', 'addons', 'image']
+TRUE_VALUES = ('true', '1', 'yes')
+ITEM_FIELDS = ['name', 'category', 'description', 'price', 'is_available', 'is_featured']
+BATCH_SIZE = 500
+PROGRESS_EVERY = 500
+
+TagLink = MenuItem.tags.through
+GroupLink = MenuItem.modifier_groups.through
+
+
+# ── Phase 1: parse ──
+
+def _price(value, max_value, label):
+    try:
+        price = Decimal(value).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f'{label} "{value}" is not a number.')
+    if price < 0 or price >= max_value:
+        raise ValueError(f'{label} "{value}" is out of range.')
+    return price
+
+
+def _parse_row(row):
+    name = (row.get('name') or '').strip()
+    if not name:
+        raise ValueError('name is required.')
+    price = (row.get('price') or '').strip()
+    if not price:
+        raise ValueError(f'price is required for "{name}".')
+    category = (row.get('category') or '').strip()
+    if not category:
+        raise ValueError(f'category is required for "{name}".')
+
+    # Format: "Rice|Extras" (modifier group names) — the older per-dish
+    # "Extra Sauce:20|Extra Rice:15" still works and becomes one shared group
+    addons, groups = {}, {}
+    for addon in (row.get('addons') or '').split('|'):
+        if ':' in addon:
+            addon_name, addon_price = (part.strip() for part in addon.split(':', 1))
+            if addon_name:
+                addons[addon_name.lower()] = (addon_name, _price(addon_price, 10 ** 4, f'Add-on price for "{addon_name}"'))
+        elif addon.strip():
+            groups.setdefault(addon.strip().lower(), addon.strip())
+
+    tags = {}
+    for tag in (row.get('tags') or '').split('|'):
+        if tag.strip():
+            tags.setdefault(tag.strip().lower(), tag.strip())
+
+    return {
+        'name': name,
+        'category': category,
+        'price': _price(price, 10 ** 6, 'Price'),
+        'description': (row.get('description') or '').strip(),
+        'is_available': (row.get('is_available') or 'true').strip().lower() in TRUE_VALUES,
+        'is_featured': (row.get('is_featured') or 'false').strip().lower() in TRUE_VALUES,
+        'tags': tags,
+        'addons': addons,
+        'groups': groups,
+    }
+
+
+def _json_lines(text):
+    """JSON Lines records as CSV-style string dicts, so both formats share one row parser."""
+    for line in text:
+        if not line.strip():
+            yield {}
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise csv.Error(f'invalid JSON: {e}')
+        if not isinstance(record, dict):
+            raise csv.Error('each line must be a JSON object')
+        yield {key: '' if value is None else str(value) for key, value in record.items()}
+
+
+def parse(upload, fmt='csv', progress=None):
+    """
+    Stream rows out of an uploaded CSV (or JSON Lines) file without reading it into memory.
+
+    Returns ({name_lower: row}, [(row_number, error)]). A name repeated later in
+    the file overrides the earlier row, as it would have when rows were saved
+    one by one. `progress(rows_read)` is called every PROGRESS_EVERY rows.
+    """
+    raw = getattr(upload, 'file', upload)
+    text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    records = _json_lines(text) if fmt == 'jsonl' else csv.DictReader(text)
+    start = 1 if fmt == 'jsonl' else 2  # CSV row 1 is the header
+    rows, errors = {}, []
+    row_num = start - 1
+    try:
+        for row_num, row in enumerate(records, start=start):
+            if progress and row_num % PROGRESS_EVERY == 0:
+                progress(row_num - start + 1)
+            if fmt == 'jsonl' and not row:
+                continue
+            try:
+                parsed = _parse_row(row)
+            except ValueError as e:
+                errors.append((row_num, str(e)))
+                continue
+            parsed['row_num'] = row_num
+            rows[parsed['name'].lower()] = parsed
+    except (UnicodeDecodeError, csv.Error) as e:
+        errors.append((row_num + 1, f'file could not be read past this point ({e}).'))
+    finally:
+        text.detach()  # Leave the upload open for the caller
+    return rows, errors
+
+
+# ── Phase 2: preload + diff ──
+
+def _unique_slug(name, taken, fallback):
+    base = slugify(name) or fallback
+    slug, n = base, 2
+    while slug in taken:
+        slug, n = f'{base}-{n}', n + 1
+    taken.add(slug)
+    return slug
+
+
+def _signature(options):
+    """Identity of a set of add-ons, so dishes offering the same ones share a group."""
+    return tuple(sorted((name.lower(), price) for name, price in options))
+
+
+def _group_name(options, taken):
+    names = ', '.join(name for name, price in options)
+    base = f'Add-ons ({names})' if len(names) <= 88 else f'Add-ons ({names[:85]}...)'
+    name, n = base, 2
+    while name.lower() in taken:
+        name, n = f'{base} {n}', n + 1
+    taken.add(name.lower())
+    return name
+
+
+def _resolve_groups(row, groups, signatures, new_groups):
+    """The modifier groups a row asks for — named groups must exist; legacy add-ons share one."""
+    resolved = []
+    for key, name in row['groups'].items():
+        if key not in groups:
+            raise ValueError(f'unknown add-on group "{name}" for "{row["name"]}".')
+        resolved.append(groups[key])
+    if row['addons']:
+        options = list(row['addons'].values())
+        signature = _signature(options)
+        group = signatures.get(signature) or new_groups.get(signature)
+        if group is None:
+            group = new_groups[signature] = ModifierGroup(name=_group_name(options, set(groups) | {
+                g.name.lower() for g in new_groups.values()
+            }))
+            group.pending_options = options
+        if group not in resolved:
+            resolved.append(group)
+    return resolved
+
+
+def plan(rows):
+    """
+    Work out every insert and update the rows need, from a handful of preload queries.
+
+    Nothing is written; the returned plan doubles as the dry-run diff.
+    """
+    categories = {}
+    for category in Category.objects.all():
+        categories.setdefault(category.name.lower(), category)
+    all_tags = list(Tag.objects.all())
+    tags = {tag.name.lower(): tag for tag in all_tags}
+    tag_names = {tag.pk: tag.name for tag in all_tags}
+    items = {}
+    for item in MenuItem.objects.select_related('category'):
+        items.setdefault(item.name.lower(), item)
+    touched = [items[key].pk for key in rows if key in items]
+    links = {}
+    for item_id, tag_id in TagLink.objects.filter(menuitem_id__in=touched).values_list('menuitem_id', 'tag_id'):
+        links.setdefault(item_id, set()).add(tag_id)
+    groups, signatures = {}, {}
+    for group in ModifierGroup.objects.prefetch_related('options'):
+        groups[group.name.lower()] = group
+        if (group.min_selections, group.max_selections) == (0, 1):
+            signatures.setdefault(_signature((o.name, o.additional_price) for o in group.options.all()), group)
+    group_names = {group.pk: group.name for group in groups.values()}
+    group_links = {}
+    for item_id, group_id in GroupLink.objects.filter(menuitem_id__in=touched).values_list('menuitem_id', 'modifiergroup_id'):
+        group_links.setdefault(item_id, set()).add(group_id)
+
+    errors, new_groups = [], {}
+    for key, row in list(rows.items()):
+        try:
+            row['modifier_groups'] = _resolve_groups(row, groups, signatures, new_groups)
+        except ValueError as e:
+            errors.append((row['row_num'], str(e)))
+            del rows[key]
+
+    new_categories, new_tags = {}, {}
+    for row in rows.values():
+        key = row['category'].lower()
+        if key not in categories and key not in new_categories:
+            new_categories[key] = Category(name=row['category'])
+        for key, name in row['tags'].items():
+            if key not in tags and key not in new_tags:
+                new_tags[key] = Tag(name=name)
+
+    created, updated, unchanged = [], [], 0
+    for key, row in rows.items():
+        item = items.get(key)
+        if item is None:
+            created.append(row)
+            continue
+        changes = {}
+        category = categories.get(row['category'].lower())
+        if category is None or category.pk != item.category_id:
+            changes['category'] = (item.category.name, row['category'])
+        for field in ('name', 'description', 'price', 'is_available', 'is_featured'):
+            if getattr(item, field) != row[field]:
+                changes[field] = (getattr(item, field), row[field])
+
+        current_tags = links.get(item.pk, set())
+        wanted = {tags[k].pk for k in row['tags'] if k in tags}
+        if row['tags'] and (current_tags != wanted or any(k in new_tags for k in row['tags'])):
+            changes['tags'] = (
+                '|'.join(sorted(tag_names[pk] for pk in current_tags)),
+                '|'.join(row['tags'].values()),
+            )
+
+        # A non-empty addons column replaces the item's modifier groups
+        current_groups = group_links.get(item.pk, set())
+        wanted = row['modifier_groups']
+        if wanted and (current_groups != {group.pk for group in wanted} or any(group.pk is None for group in wanted)):
+            changes['addons'] = (
+                '|'.join(sorted(group_names[pk] for pk in current_groups)),
+                '|'.join(group.name for group in wanted),
+            )
+
+        if changes:
+            updated.append({'row': row, 'item': item, 'changes': changes})
+        else:
+            unchanged += 1
+
+    return {
+        'rows': rows,
+        'categories': categories,
+        'tags': tags,
+        'items': items,
+        'new_categories': new_categories,
+        'new_tags': new_tags,
+        'new_groups': new_groups,
+        'created': created,
+        'updated': updated,
+        'unchanged': unchanged,
+        'errors': errors,
+    }
+
+
+# ── Phase 3: apply ──
+
+def apply(plan):
+    """Write a plan with bulk inserts and updates inside one transaction."""
+    now = timezone.now()
+    with transaction.atomic():
+        categories, tags = plan['categories'], plan['tags']
+
+        if plan['new_categories']:
+            taken = set(Category.objects.values_list('slug', flat=True))
+            for category in plan['new_categories'].values():
+                category.slug = _unique_slug(category.name, taken, 'category')
+            Category.objects.bulk_create(plan['new_categories'].values(), batch_size=BATCH_SIZE)
+            categories.update(plan['new_categories'])
+        if plan['new_tags']:
+            Tag.objects.bulk_create(plan['new_tags'].values(), batch_size=BATCH_SIZE)
+            tags.update(plan['new_tags'])
+
+        # Items
+        new_items = []
+        if plan['created']:
+            taken = set(MenuItem.objects.values_list('slug', flat=True))
+            for row in plan['created']:
+                item = MenuItem(
+                    slug=_unique_slug(row['name'], taken, 'item'),
+                    created_at=now, updated_at=now,
+                    **{field: row[field] for field in ITEM_FIELDS if field != 'category'},
+                    category=categories[row['category'].lower()],
+                )
+                new_items.append((row, item))
+            MenuItem.objects.bulk_create([item for _, item in new_items], batch_size=BATCH_SIZE)
+
+        # Update only the columns that changed, one bulk_update per combination —
+        # a price-only re-import then writes one CASE per row instead of seven
+        changed_items, by_fields = [], {}
+        for change in plan['updated']:
+            row, item = change['row'], change['item']
+            fields = tuple(field for field in ITEM_FIELDS if field in change['changes'])
+            for field in fields:
+                value = categories[row['category'].lower()] if field == 'category' else row[field]
+                setattr(item, field, value)
+            item.updated_at = now
+            changed_items.append((row, item, change['changes']))
+            by_fields.setdefault(fields + ('updated_at',), []).append(item)
+        for fields, batch in by_fields.items():
+            MenuItem.objects.bulk_update(batch, fields, batch_size=BATCH_SIZE)
+
+        # Tags — a non-empty tags column replaces the item's tags
+        retagged = [(row, item) for row, item, changes in changed_items if 'tags' in changes]
+        TagLink.objects.filter(menuitem_id__in=[item.pk for row, item in retagged]).delete()
+        TagLink.objects.bulk_create([
+            TagLink(menuitem_id=item.pk, tag_id=tags[key].pk)
+            for row, item in new_items + retagged for key in row['tags']
+        ], batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+        # Modifier groups — shared by every dish that offers the same add-ons
+        if plan['new_groups']:
+            ModifierGroup.objects.bulk_create(plan['new_groups'].values(), batch_size=BATCH_SIZE)
+            ModifierOption.objects.bulk_create([
+                ModifierOption(group=group, name=name, additional_price=price, order_position=position)
+                for group in plan['new_groups'].values()
+                for position, (name, price) in enumerate(group.pending_options)
+            ], batch_size=BATCH_SIZE)
+        regrouped = [(row, item) for row, item, changes in changed_items if 'addons' in changes]
+        GroupLink.objects.filter(menuitem_id__in=[item.pk for row, item in regrouped]).delete()
+        GroupLink.objects.bulk_create([
+            GroupLink(menuitem_id=item.pk, modifiergroup_id=group.pk)
+            for row, item in new_items + regrouped for group in row['modifier_groups']
+        ], batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+        # The bulk writes skip save(), so drop the cached menu once for the whole file
+        transaction.on_commit(invalidate_menu)
+
+    return {
+        'created': len(new_items),
+        'updated': len(changed_items),
+        'unchanged': plan['unchanged'],
+    }
+
+
+def import_menu(upload, dry_run=False, fmt='csv', progress=None):
+    """
+    Parse, plan and (unless dry_run) apply a menu file. Returns (plan, result, errors).
+
+    `progress(stage, rows_read)` reports 'parsing' as rows stream in, then
+    'planning' and 'saving'.
+    """
+    report = progress or (lambda stage, rows_read: None)
+    rows, errors = parse(upload, fmt, progress=lambda rows_read: report('parsing', rows_read))
+    report('planning', len(rows) + len(errors))
+    menu_plan = plan(rows)
+    errors = sorted(errors + menu_plan['errors'])
+    result = None
+    if not dry_run:
+        report('saving', len(rows) + len(errors))
+        result = apply(menu_plan)
+    return menu_plan, result, errors
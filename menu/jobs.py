@@ -0,0 +1,115 @@
+import io
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .importer import import_menu
+from .models import ImportJob
+
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_LIMIT = 200
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def enqueue(upload, fmt, dry_run=False, user=None):
+    """Store an upload as a queued job — the request returns before any row is read."""
+    limit = settings.MENU_IMPORT_MAX_BYTES
+    if upload.size and upload.size > limit:
+        raise UploadTooLarge(f'File is larger than {limit // (1024 * 1024)} MB.')
+    data = b''.join(upload.chunks())
+    # Line count is a good enough row estimate for the progress bar
+    lines = data.count(b'\n') + (0 if data.endswith(b'\n') else 1)
+    return ImportJob.objects.create(
+        filename=upload.name[:255],
+        fmt=fmt,
+        dry_run=dry_run,
+        data=data,
+        total_rows=max(lines - (1 if fmt == 'csv' else 0), 0),
+        created_by=user if user and user.is_authenticated else None,
+    )
+
+
+def claim_next():
+    """Oldest queued job, marked running — conditional update so two workers never share one."""
+    for job_id in ImportJob.objects.filter(status='queued').order_by('created_at').values_list('pk', flat=True)[:5]:
+        now = timezone.now()
+        if ImportJob.objects.filter(pk=job_id, status='queued').update(status='running', started_at=now, updated_at=now):
+            return ImportJob.objects.get(pk=job_id)
+    return None
+
+
+def fail_stale():
+    """Jobs whose worker stopped reporting progress — the import rolled back, so say so."""
+    cutoff = timezone.now() - timedelta(minutes=settings.MENU_IMPORT_STALE_MINUTES)
+    return ImportJob.objects.filter(status='running', updated_at__lt=cutoff).update(
+        status='failed', message='The import worker stopped before finishing. Nothing was changed.',
+        finished_at=timezone.now(), data=b'',
+    )
+
+
+def _preview(plan):
+    """The dry-run diff, trimmed and made JSON-safe for the job row."""
+    return {
+        'created_count': len(plan['created']),
+        'updated_count': len(plan['updated']),
+        'unchanged': plan['unchanged'],
+        'new_categories': len(plan['new_categories']),
+        'new_tags': len(plan['new_tags']),
+        'new_groups': len(plan['new_groups']),
+        'created': [
+            {'name': row['name'], 'category': row['category'], 'price': str(row['price'])}
+            for row in plan['created'][:PREVIEW_LIMIT]
+        ],
+        'updated': [
+            {
+                'name': change['item'].name,
+                'changes': [[field, str(old), str(new)] for field, (old, new) in change['changes'].items()],
+            }
+            for change in plan['updated'][:PREVIEW_LIMIT]
+        ],
+    }
+
+
+def run(job):
+    """Import one claimed job, reporting progress on the job row as it goes."""
+    def progress(stage, rows_read):
+        ImportJob.objects.filter(pk=job.pk).update(stage=stage, processed_rows=rows_read, updated_at=timezone.now())
+
+    now = timezone.now()
+    fields = {'data': b'', 'finished_at': now, 'updated_at': now}
+    result = None
+    try:
+        plan, result, errors = import_menu(
+            io.BytesIO(bytes(job.data)), dry_run=job.dry_run, fmt=job.fmt, progress=progress,
+        )
+    except Exception as e:
+        logger.exception('Menu import job %s failed', job.pk)
+        fields.update(status='failed', message=f'Import failed, nothing was changed: {e}')
+    else:
+        fields.update(
+            status='done',
+            errors=[[row_num, error] for row_num, error in errors],
+            processed_rows=len(plan['rows']) + len(errors),
+        )
+        if result:
+            fields.update(created=result['created'], updated=result['updated'], unchanged=result['unchanged'])
+        else:
+            fields['preview'] = _preview(plan)
+
+    # Result columns only, so the stage the callback wrote stays — and only while
+    # still running: fail_stale() may have given up on a save that outran it
+    if not ImportJob.objects.filter(pk=job.pk, status='running').update(**fields):
+        logger.error('Menu import job %s finished after it was marked failed', job.pk)
+        if result:
+            ImportJob.objects.filter(pk=job.pk, status='failed').update(
+                message='The import was reported stalled but did finish — its changes were saved.',
+            )
+    job.refresh_from_db()
+    return job
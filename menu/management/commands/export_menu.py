@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from menu.exporter import csv_lines, jsonl_lines
+
+
+class Command(BaseCommand):
+    help = 'Writes the whole menu to stdout in the import format (CSV or JSON Lines)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+
+    def handle(self, *args, **options):
+        lines = jsonl_lines() if options['format'] == 'jsonl' else csv_lines()
+        for line in lines:
+            self.stdout.write(line, ending='')
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from menu.importer import import_menu
+
+
+class Command(BaseCommand):
+    help = 'Imports a menu CSV or JSON Lines file (same format as the dashboard import) in one transaction'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to import')
+        parser.add_argument('--dry-run', action='store_true', help='Show what would change without saving')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as f:
+                fmt = options['format'] or ('jsonl' if options['path'].endswith('.jsonl') else 'csv')
+                plan, result, errors = import_menu(f, dry_run=options['dry_run'], fmt=fmt)
+        except OSError as e:
+            raise CommandError(e)
+
+        for row_num, error in errors:
+            self.stderr.write(f'Row {row_num}: {error}')
+
+        if options['dry_run']:
+            for change in plan['updated']:
+                for field, (old, new) in change['changes'].items():
+                    self.stdout.write(f"~ {change['item'].name}: {field} {old!r} -> {new!r}")
+            for row in plan['created']:
+                self.stdout.write(f"+ {row['name']} ({row['category']}, {row['price']})")
+            self.stdout.write(self.style.WARNING(
+                f"Dry run — {len(plan['created'])} to create, {len(plan['updated'])} to update, "
+                f"{plan['unchanged']} unchanged, {len(errors)} error(s). Nothing was saved."
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported — {result['created']} created, {result['updated']} updated, "
+            f"{result['unchanged']} unchanged, {len(errors)} error(s)."
+        ))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from menu.jobs import claim_next, fail_stale, run
+
+
+class Command(BaseCommand):
+    help = 'Runs queued menu import jobs; keeps polling unless --once is given'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds between polls when idle')
+
+    def handle(self, *args, **options):
+        while True:
+            stale = fail_stale()
+            if stale:
+                self.stdout.write(self.style.WARNING(f'Marked {stale} stalled job(s) as failed.'))
+
+            job = claim_next()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+
+            job = run(job)
+            style = self.style.SUCCESS if job.status == 'done' else self.style.ERROR
+            self.stdout.write(style(
+                f'Job {job.pk} ({job.filename}): {job.get_status_display()} — '
+                f'{job.created} created, {job.updated} updated, {len(job.errors)} error(s).'
+            ))
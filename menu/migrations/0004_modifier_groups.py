@@ -0,0 +1,107 @@
+# Generated by Django 6.0.2 on 2026-10-19 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _group_name(names, taken):
+    names = ', '.join(names)
+    base = f'Add-ons ({names})' if len(names) <= 88 else f'Add-ons ({names[:85]}...)'
+    name, n = base, 2
+    while name.lower() in taken:
+        name, n = f'{base} {n}', n + 1
+    taken.add(name.lower())
+    return name
+
+
+def addons_to_groups(apps, schema_editor):
+    """One shared group per distinct set of per-dish add-ons, linked to every dish that had it."""
+    AddOn = apps.get_model('menu', 'AddOn')
+    ModifierGroup = apps.get_model('menu', 'ModifierGroup')
+    ModifierOption = apps.get_model('menu', 'ModifierOption')
+    GroupLink = apps.get_model('menu', 'MenuItem').modifier_groups.through
+
+    per_dish = {}
+    for dish_id, name, price in AddOn.objects.order_by('id').values_list('dish_id', 'name', 'additional_price').iterator(chunk_size=2000):
+        per_dish.setdefault(dish_id, {}).setdefault(name.strip().lower(), (name.strip(), price))
+
+    groups, dishes = {}, {}
+    for dish_id, options in per_dish.items():
+        options = sorted(options.values(), key=lambda option: option[0].lower())
+        signature = tuple((name.lower(), price) for name, price in options)
+        groups.setdefault(signature, options)
+        dishes.setdefault(signature, []).append(dish_id)
+
+    taken = set()
+    created = {
+        signature: ModifierGroup(name=_group_name([name for name, price in options], taken))
+        for signature, options in groups.items()
+    }
+    ModifierGroup.objects.bulk_create(created.values(), batch_size=1000)
+    ModifierOption.objects.bulk_create([
+        ModifierOption(group=created[signature], name=name, additional_price=price, order_position=position)
+        for signature, options in groups.items()
+        for position, (name, price) in enumerate(options)
+    ], batch_size=1000)
+    GroupLink.objects.bulk_create([
+        GroupLink(menuitem_id=dish_id, modifiergroup_id=created[signature].pk)
+        for signature, dish_ids in dishes.items() for dish_id in dish_ids
+    ], batch_size=1000)
+
+
+def groups_to_addons(apps, schema_editor):
+    AddOn = apps.get_model('menu', 'AddOn')
+    ModifierOption = apps.get_model('menu', 'ModifierOption')
+    GroupLink = apps.get_model('menu', 'MenuItem').modifier_groups.through
+
+    options = {}
+    for group_id, name, price in ModifierOption.objects.values_list('group_id', 'name', 'additional_price'):
+        options.setdefault(group_id, []).append((name, price))
+    AddOn.objects.bulk_create([
+        AddOn(dish_id=dish_id, name=name, additional_price=price)
+        for dish_id, group_id in GroupLink.objects.values_list('menuitem_id', 'modifiergroup_id')
+        for name, price in options.get(group_id, [])
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0003_import_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModifierGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('min_selections', models.PositiveSmallIntegerField(default=0)),
+                ('max_selections', models.PositiveSmallIntegerField(default=1, help_text='0 means no limit.')),
+                ('order_position', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['order_position', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='modifier_groups',
+            field=models.ManyToManyField(blank=True, related_name='items', to='menu.modifiergroup'),
+        ),
+        migrations.CreateModel(
+            name='ModifierOption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('additional_price', models.DecimalField(decimal_places=2, default=0.0, max_digits=6)),
+                ('order_position', models.PositiveIntegerField(default=0)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='options', to='menu.modifiergroup')),
+            ],
+            options={
+                'ordering': ['order_position', 'name'],
+                'constraints': [models.UniqueConstraint(fields=('group', 'name'), name='modifier_option_name_unique')],
+            },
+        ),
+        migrations.RunPython(addons_to_groups, groups_to_addons),
+    ]
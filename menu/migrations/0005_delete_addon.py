@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-19 17:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0004_modifier_groups'),
+        ('orders', '0007_remove_orderitem_addon'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='AddOn',
+        ),
+    ]
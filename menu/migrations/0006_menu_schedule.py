@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0005_delete_addon'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='e.g. Breakfast, Lunch, Dinner', max_length=50)),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField(help_text='Earlier than the start time means the window runs past midnight.')),
+                ('categories', models.ManyToManyField(blank=True, related_name='schedules', to='menu.category')),
+                ('items', models.ManyToManyField(blank=True, related_name='schedules', to='menu.menuitem')),
+            ],
+            options={
+                'ordering': ['weekday', 'start_time'],
+            },
+        ),
+    ]
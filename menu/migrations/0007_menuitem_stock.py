@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0006_menu_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='stock',
+            field=models.PositiveIntegerField(blank=True, help_text='Portions left. Leave empty for no limit; at 0 the dish shows as sold out.', null=True),
+        ),
+    ]
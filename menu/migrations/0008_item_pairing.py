@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-19 20:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0007_menuitem_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemPairing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('lift', models.FloatField()),
+                ('together', models.PositiveIntegerField(help_text='Orders that had both dishes.')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pairings', to='menu.menuitem')),
+                ('paired', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='menu.menuitem')),
+            ],
+            options={
+                'ordering': ['item', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('item', 'rank'), name='item_pairing_rank_unique')],
+            },
+        ),
+    ]
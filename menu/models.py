@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.utils.text import slugify
 
@@ -37,8 +38,12 @@ class MenuItem(models.Model):
     price = models.DecimalField(max_digits=8, decimal_places=2)
     image = models.ImageField(upload_to="menu_images/", blank=True, null=True)
     tags = models.ManyToManyField(Tag, blank=True, related_name="items")
+    modifier_groups = models.ManyToManyField("ModifierGroup", blank=True, related_name="items")
     is_available = models.BooleanField(default=True, db_index=True)
     is_featured = models.BooleanField(default=False, db_index=True)
+    stock = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Portions left. Leave empty for no limit; at 0 the dish shows as sold out.",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -56,11 +61,124 @@ class MenuItem(models.Model):
     def get_base_price(self):
         return self.price
 
+    @property
+    def is_sold_out(self):
+        return self.stock == 0
 
-class AddOn(models.Model):
-    dish = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name="addons")
+
+class ModifierGroup(models.Model):
+    """Options shared by any number of dishes, e.g. "Rice" or "Extras"."""
+    name = models.CharField(max_length=100, unique=True)
+    min_selections = models.PositiveSmallIntegerField(default=0)
+    max_selections = models.PositiveSmallIntegerField(default=1, help_text="0 means no limit.")
+    order_position = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["order_position", "name"]
+
+    def __str__(self):
+        return self.name
+
+
+class ModifierOption(models.Model):
+    group = models.ForeignKey(ModifierGroup, on_delete=models.CASCADE, related_name="options")
     name = models.CharField(max_length=100)
     additional_price = models.DecimalField(max_digits=6, decimal_places=2, default=0.00)
+    order_position = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["order_position", "name"]
+        constraints = [
+            models.UniqueConstraint(fields=["group", "name"], name="modifier_option_name_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.group.name} — {self.name} (+${self.additional_price})"
+
+
+class MenuSchedule(models.Model):
+    """A weekly window when some categories or dishes are served, e.g. Breakfast 7–11 on Mondays."""
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'),
+        (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday'),
+    ]
+
+    name = models.CharField(max_length=50, help_text="e.g. Breakfast, Lunch, Dinner")
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField(help_text="Earlier than the start time means the window runs past midnight.")
+    categories = models.ManyToManyField(Category, blank=True, related_name="schedules")
+    items = models.ManyToManyField(MenuItem, blank=True, related_name="schedules")
+
+    class Meta:
+        ordering = ["weekday", "start_time"]
 
     def __str__(self):
-        return f"{self.dish.name} — {self.name} (+${self.additional_price})"
\ No newline at end of file
+        return f"{self.name} — {self.get_weekday_display()} {self.start_time:%H:%M}–{self.end_time:%H:%M}"
+
+
+class ItemPairing(models.Model):
+    """One of a dish's top "frequently ordered together" neighbours, rebuilt nightly by build_pairings."""
+    item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name="pairings")
+    paired = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    lift = models.FloatField()
+    together = models.PositiveIntegerField(help_text="Orders that had both dishes.")
+
+    class Meta:
+        ordering = ["item", "rank"]
+        constraints = [
+            models.UniqueConstraint(fields=["item", "rank"], name="item_pairing_rank_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} → {self.paired_id} (lift {self.lift:.2f})"
+
+
+class ImportJob(models.Model):
+    """A menu upload waiting for, or being run by, the process_import_jobs worker."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    stage = models.CharField(max_length=20, blank=True)
+    filename = models.CharField(max_length=255)
+    fmt = models.CharField(max_length=10, default='csv')
+    dry_run = models.BooleanField(default=False)
+    # Kept in the database so a worker on another machine can read it; cleared once run
+    data = models.BinaryField(editable=False)
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    preview = models.JSONField(null=True, blank=True)
+    message = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.filename} ({self.get_status_display()})"
+
+    @property
+    def percent(self):
+        if self.status == 'done':
+            return 100
+        if not self.total_rows:
+            return 0
+        # Parsing is most of the work; planning and saving share the last stretch
+        parsed = min(self.processed_rows / self.total_rows, 1) * 80
+        return int(parsed + {'planning': 5, 'saving': 10}.get(self.stage, 0))
+
@@ -0,0 +1,88 @@
+import bisect
+from collections import namedtuple
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import MenuSchedule
+
+
+DAY_MINUTES = 24 * 60
+
+# One stretch of a weekday during which the same categories and dishes are served
+Segment = namedtuple('Segment', 'weekday index hidden_categories hidden_items ends_at')
+
+# Week timelines built in this process, keyed by menu version — rebuilt once after any change
+_timelines = {}
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _windows():
+    """{weekday: [(start, end, category ids, item ids)]}, with overnight windows split at midnight."""
+    Categories, Items = MenuSchedule.categories.through, MenuSchedule.items.through
+    categories, items = {}, {}
+    for schedule_id, category_id in Categories.objects.values_list('menuschedule_id', 'category_id'):
+        categories.setdefault(schedule_id, set()).add(category_id)
+    for schedule_id, item_id in Items.objects.values_list('menuschedule_id', 'menuitem_id'):
+        items.setdefault(schedule_id, set()).add(item_id)
+
+    windows = {weekday: [] for weekday in range(7)}
+    for pk, weekday, start_time, end_time in MenuSchedule.objects.values_list('pk', 'weekday', 'start_time', 'end_time'):
+        scope = (categories.get(pk, set()), items.get(pk, set()))
+        start, end = _minutes(start_time), _minutes(end_time)
+        if end > start:
+            windows[weekday].append((start, end, *scope))
+        else:
+            windows[weekday].append((start, DAY_MINUTES, *scope))
+            if end:
+                windows[(weekday + 1) % 7].append((0, end, *scope))
+    return windows
+
+
+def build_week():
+    """
+    For each weekday, the minutes where the served menu changes and what is hidden from each one on.
+
+    A category or dish with no schedule is always served; one with schedules
+    only inside them. Returns [(starts, [(hidden categories, hidden items)])]
+    indexed by weekday, with starts sorted for bisect.
+    """
+    windows = _windows()
+    scheduled_categories = frozenset(pk for day in windows.values() for window in day for pk in window[2])
+    scheduled_items = frozenset(pk for day in windows.values() for window in day for pk in window[3])
+
+    week = []
+    for weekday in range(7):
+        day = windows[weekday]
+        starts = sorted({0} | {minute for start, end, *_ in day for minute in (start, end) if minute < DAY_MINUTES})
+        segments = []
+        for point in starts:
+            live = [window for window in day if window[0] <= point < window[1]]
+            segments.append((
+                scheduled_categories.difference(*(window[2] for window in live)),
+                scheduled_items.difference(*(window[3] for window in live)),
+            ))
+        week.append((starts, segments))
+    return week
+
+
+def timeline(version):
+    """The week's interval table for this menu version, built at most once per process."""
+    week = _timelines.get(version)
+    if week is None:
+        _timelines.clear()
+        week = _timelines[version] = build_week()
+    return week
+
+
+def segment_at(week, when):
+    """The segment of the week covering `when` — one bisect over that day's boundaries."""
+    when = timezone.localtime(when)
+    starts, segments = week[when.weekday()]
+    index = bisect.bisect_right(starts, _minutes(when)) - 1
+    end = starts[index + 1] if index + 1 < len(starts) else DAY_MINUTES
+    midnight = when.replace(hour=0, minute=0, second=0, microsecond=0)
+    return Segment(when.weekday(), index, *segments[index], ends_at=midnight + timedelta(minutes=end))
@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models import F
+
+from .cache import invalidate_menu
+from .models import MenuItem
+
+
+class SoldOut(Exception):
+    """Not enough portions left of one or more dishes."""
+
+    def __init__(self, names):
+        self.names = names
+        super().__init__(f"Sold out: {', '.join(names)}")
+
+
+def _tracked(quantities):
+    """{item id: stock} for the dishes in `quantities` that have a stock count."""
+    return dict(
+        MenuItem.objects.filter(pk__in=quantities, stock__isnull=False).values_list('pk', 'stock')
+    )
+
+
+def take(quantities):
+    """
+    Claim portions for an order — {item id: quantity} — or raise SoldOut.
+
+    Each dish is one conditional UPDATE ... SET stock = stock - n WHERE
+    stock >= n, so concurrent checkouts can never oversell, and nothing is
+    read-then-written. Call it inside the order's transaction, as late as
+    possible: the row lock is held until commit. Dishes are claimed in id
+    order so two orders sharing several dishes can't deadlock.
+    """
+    tracked = _tracked(quantities)
+    short = []
+    for pk in sorted(tracked):
+        claimed = MenuItem.objects.filter(pk=pk, stock__gte=quantities[pk]).update(stock=F('stock') - quantities[pk])
+        if not claimed:
+            short.append(pk)
+    if short:
+        names = MenuItem.objects.filter(pk__in=short).order_by('name').values_list('name', flat=True)
+        raise SoldOut(list(names))
+
+    if tracked and MenuItem.objects.filter(pk__in=tracked, stock=0).exists():
+        # Someone just bought the last portion — drop it from the cached menu
+        transaction.on_commit(invalidate_menu)
+
+
+def restore(quantities):
+    """Put portions back after an order was cancelled, refunded or abandoned."""
+    tracked = _tracked(quantities)
+    for pk in sorted(tracked):
+        MenuItem.objects.filter(pk=pk, stock__isnull=False).update(stock=F('stock') + quantities[pk])
+    if 0 in tracked.values():
+        transaction.on_commit(invalidate_menu)
+
@@ -1,3 +1,305 @@
+import csv
+import io
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from dashboard.models import StaffProfile
+
+from . import bulk
+from .cache import is_served, menu_categories, off_menu
+from .exporter import csv_lines, jsonl_lines
+from .importer import import_menu
+from .jobs import claim_next, fail_stale, run
+from .models import Category, ImportJob, MenuItem, MenuSchedule, ModifierGroup, ModifierOption, Tag
+
+
+HEADER = 'name,category,price,description,is_available,is_featured,tags,addons,image\n'
+
+
+def _csv(*lines):
+    return io.BytesIO((HEADER + '\n'.join(lines) + '\n').encode('utf-8'))
+
+
+class MenuImportTests(TestCase):
+    """CSV import plans from preloaded lookups and writes in bulk, all or nothing."""
+
+    def setUp(self):
+        self.mains = Category.objects.create(name='Mains')
+        self.spicy = Tag.objects.create(name='Spicy')
+        self.adobo = MenuItem.objects.create(name='Adobo', category=self.mains, price=Decimal('10.00'))
+        self.rice = ModifierGroup.objects.create(name='Rice')
+        ModifierOption.objects.create(group=self.rice, name='Extra Rice', additional_price=Decimal('1.00'))
+        self.adobo.modifier_groups.add(self.rice)
+
+    def test_creates_and_updates_in_bulk(self):
+        upload = _csv(
+            'adobo,Mains,12.50,Braised pork,true,false,Spicy|Classic,Extra Rice:1.50|Egg:0.75,',
+            'Sinigang,Soups,9.00,,true,true,Sour,,',
+            ',Soups,1.00,,,,,,',
+            'Halo-Halo,Desserts,abc,,,,,,',
+        )
+        with self.assertNumQueries(21):
+            plan, result, errors = import_menu(upload)
+        self.assertEqual(result, {'created': 1, 'updated': 1, 'unchanged': 0})
+        self.assertEqual([row for row, _ in errors], [4, 5])
+
+        self.adobo.refresh_from_db()
+        self.assertEqual(self.adobo.name, 'adobo')
+        self.assertEqual(self.adobo.price, Decimal('12.50'))
+        self.assertEqual(sorted(self.adobo.tags.values_list('name', flat=True)), ['Classic', 'Spicy'])
+        group = self.adobo.modifier_groups.get()
+        self.assertEqual(
+            dict(group.options.values_list('name', 'additional_price')),
+            {'Extra Rice': Decimal('1.50'), 'Egg': Decimal('0.75')},
+        )
+        sinigang = MenuItem.objects.get(name='Sinigang')
+        self.assertEqual((sinigang.category.name, sinigang.slug, sinigang.is_featured), ('Soups', 'sinigang', True))
+
+    def test_dry_run_reports_diff_without_writing(self):
+        plan, result, errors = import_menu(_csv('Adobo,Mains,11.00,,true,false,,,', 'Pancit,Noodles,8,,,,,,'), dry_run=True)
+        self.assertIsNone(result)
+        self.assertEqual(plan['updated'][0]['changes'], {'price': (Decimal('10.00'), Decimal('11.00'))})
+        self.assertEqual([row['name'] for row in plan['created']], ['Pancit'])
+        self.assertEqual(list(plan['new_categories']), ['noodles'])
+        self.assertFalse(MenuItem.objects.filter(name='Pancit').exists())
+        self.assertEqual(MenuItem.objects.get(pk=self.adobo.pk).price, Decimal('10.00'))
+
+    def test_add_ons_are_shared_between_dishes(self):
+        plan, result, errors = import_menu(_csv(
+            'Adobo,Mains,10.00,,,,,Rice,',
+            'Tapa,Mains,9.00,,,,,Garlic Rice:1.00|Egg:0.50,',
+            'Tocino,Mains,9.00,,,,,egg:0.50|Garlic Rice:1.00,',
+            'Longganisa,Mains,9.00,,,,,Sauces,',
+        ))
+        self.assertEqual(errors, [(5, 'unknown add-on group "Sauces" for "Longganisa".')])
+        self.assertEqual(result, {'created': 2, 'updated': 0, 'unchanged': 1})
+        tapa, tocino = MenuItem.objects.get(name='Tapa'), MenuItem.objects.get(name='Tocino')
+        self.assertEqual(list(tapa.modifier_groups.all()), list(tocino.modifier_groups.all()))
+        self.assertEqual(ModifierGroup.objects.count(), 2)
+        self.assertEqual(ModifierOption.objects.count(), 3)
+
+    def test_reimport_is_a_no_op(self):
+        line = 'Lumpia,Starters,5.00,Spring rolls,true,false,Spicy,Vinegar:0.25,'
+        import_menu(_csv(line))
+        plan, result, errors = import_menu(_csv(line))
+        self.assertEqual(result, {'created': 0, 'updated': 0, 'unchanged': 1})
+
+
+class MenuExportTests(TestCase):
+    """Exports use the import schema, so exporting and re-importing changes nothing."""
+
+    def setUp(self):
+        drinks = Category.objects.create(name='Drinks, Cold', order_position=2)
+        mains = Category.objects.create(name='Mains', order_position=1)
+        spicy, vegan = Tag.objects.create(name='Spicy'), Tag.objects.create(name='Vegan')
+        curry = MenuItem.objects.create(
+            name='Kare-Kare', category=mains, price=Decimal('15.50'),
+            description='Oxtail in "peanut" sauce,\nwith bagoong', is_featured=True,
+        )
+        curry.tags.set([spicy, vegan])
+        extras, rice = ModifierGroup.objects.create(name='Extras'), ModifierGroup.objects.create(name='Rice')
+        ModifierOption.objects.create(group=extras, name='Extra Bagoong', additional_price=Decimal('0.50'))
+        ModifierOption.objects.create(group=rice, name='Garlic Rice', additional_price=Decimal('1.00'))
+        curry.modifier_groups.set([rice, extras])
+        MenuItem.objects.create(name='Calamansi Juice', category=drinks, price=Decimal('3.00'), is_available=False)
+
+    def _reimport(self, lines, fmt):
+        upload = io.BytesIO(''.join(lines).encode('utf-8'))
+        plan, result, errors = import_menu(upload, dry_run=True, fmt=fmt)
+        self.assertEqual(errors, [])
+        return plan
+
+    def test_csv_round_trip_is_a_no_op(self):
+        with self.assertNumQueries(3):
+            lines = list(csv_lines())
+        self.assertEqual(lines[0].strip(), HEADER.strip())
+        self.assertIn('Extras|Rice', lines[1])
+        plan = self._reimport(lines, 'csv')
+        self.assertEqual((plan['created'], plan['updated'], plan['unchanged']), ([], [], 2))
+
+    def test_jsonl_round_trip_is_a_no_op(self):
+        plan = self._reimport(jsonl_lines(), 'jsonl')
+        self.assertEqual((plan['created'], plan['updated'], plan['unchanged']), ([], [], 2))
+
+
+class ImportJobTests(TestCase):
+    """Uploads are queued and run by the worker command, never inside the request."""
+
+    def setUp(self):
+        user = User.objects.create_user('manager', password='pw')
+        StaffProfile.objects.create(user=user, role='manager')
+        self.client.force_login(user)
+        Category.objects.create(name='Mains')
+
+    def _upload(self, *lines, **extra):
+        content = (HEADER + '\n'.join(lines) + '\n').encode('utf-8')
+        response = self.client.post(reverse('dashboard:menu_csv_import'), {
+            'csv_file': SimpleUploadedFile('menu.csv', content, content_type='text/csv'), **extra,
+        })
+        return ImportJob.objects.get(pk=response.url.rsplit('=', 1)[1])
+
+    def _status(self, job):
+        return self.client.get(reverse('dashboard:menu_import_status', args=[job.pk])).json()
+
+    def test_upload_is_queued_then_run_by_worker(self):
+        job = self._upload('Adobo,Mains,10,,,,,,', 'Broken,Mains,oops,,,,,,')
+        self.assertFalse(MenuItem.objects.exists())
+        self.assertEqual(self._status(job)['status'], 'queued')
+
+        call_command('process_import_jobs', '--once', stdout=io.StringIO())
+        status = self._status(job)
+        self.assertEqual((status['status'], status['percent'], status['created'], status['errors']), ('done', 100, 1, 1))
+        self.assertTrue(MenuItem.objects.filter(name='Adobo').exists())
+        job.refresh_from_db()
+        self.assertEqual((bytes(job.data), job.stage), (b'', 'saving'))
+
+        report = self.client.get(reverse('dashboard:menu_import_errors', args=[job.pk]))
+        self.assertEqual(
+            list(csv.reader(io.StringIO(report.content.decode()))),
+            [['row', 'error'], ['3', 'Price "oops" is not a number.']],
+        )
+
+    def test_finish_after_stale_sweep_keeps_failure(self):
+        self._upload('Adobo,Mains,10,,,,,,')
+        job = claim_next()
+
+        def outran_the_sweep(*args, **kwargs):
+            outcome = import_menu(*args, **kwargs)
+            ImportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+            fail_stale()  # another worker gives up on the slow save
+            return outcome
+
+        with mock.patch('menu.jobs.import_menu', side_effect=outran_the_sweep), self.assertLogs('menu.jobs', 'ERROR'):
+            job = run(job)
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('did finish', job.message)
+
+    def test_dry_run_job_stores_preview(self):
+        job = self._upload('Adobo,Mains,10,,,,,,', dry_run='1')
+        call_command('process_import_jobs', '--once', stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.preview['created'], [{'name': 'Adobo', 'category': 'Mains', 'price': '10.00'}])
+        self.assertFalse(MenuItem.objects.exists())
+        page = self.client.get(reverse('dashboard:menu_csv_import'), {'job': job.pk})
+        self.assertContains(page, 'Nothing has been saved')
+
+
+
+class BulkMenuTests(TestCase):
+    """Bulk changes are previewed, then written as one UPDATE with one cache invalidation."""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('manager', password='pw')
+        StaffProfile.objects.create(user=user, role='manager')
+        self.client.force_login(user)
+        pasta = Category.objects.create(name='Pasta')
+        mains = Category.objects.create(name='Mains')
+        self.carbonara = MenuItem.objects.create(category=pasta, name='Carbonara', price=Decimal('12.50'))
+        self.pesto = MenuItem.objects.create(category=pasta, name='Pesto', price=Decimal('9.99'))
+        self.adobo = MenuItem.objects.create(category=mains, name='Adobo', price=Decimal('10.00'))
+        self.pasta = pasta
+
+    def test_preview_writes_nothing(self):
+        response = self.client.post(reverse('dashboard:menu_bulk'), {'action': 'price', 'percent': '5', 'scope': self.pasta.pk})
+        self.assertContains(response, '$13.13')
+        self.assertContains(response, '$10.49')
+        self.carbonara.refresh_from_db()
+        self.assertEqual(self.carbonara.price, Decimal('12.50'))
+
+    def test_confirm_raises_category_prices_in_one_update(self):
+        with mock.patch('menu.bulk.invalidate_menu') as invalidate, self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                self.assertEqual(bulk.apply([self.carbonara.pk, self.pesto.pk], 'price', Decimal('5')), 2)
+        invalidate.assert_called_once()
+        prices = dict(MenuItem.objects.values_list('name', 'price'))
+        self.assertEqual(prices, {'Carbonara': Decimal('13.13'), 'Pesto': Decimal('10.49'), 'Adobo': Decimal('10.00')})
+
+    def test_hide_selected_skips_rows_already_hidden(self):
+        MenuItem.objects.filter(pk=self.pesto.pk).update(is_available=False)
+        response = self.client.post(reverse('dashboard:menu_bulk'), {
+            'action': 'hide', 'ids': [self.carbonara.pk, self.pesto.pk, self.adobo.pk], 'confirm': '1',
+        })
+        self.assertRedirects(response, reverse('dashboard:menu_list'))
+        self.assertFalse(MenuItem.objects.filter(is_available=True).exists())
+
+    def test_public_menu_cache_follows_changes(self):
+        def carbonara():
+            pasta = next(category for category in menu_categories() if category.name == 'Pasta')
+            return next(item for item in pasta.items.all() if item.pk == self.carbonara.pk)
+
+        self.assertEqual(carbonara().price, Decimal('12.50'))
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.apply([self.carbonara.pk], 'price', Decimal('-10'))
+        self.assertEqual(carbonara().price, Decimal('11.25'))
+        self.carbonara.refresh_from_db()
+        self.carbonara.name = 'Carbonara Classica'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.carbonara.save()
+            # Version only moves on commit, so nothing stale is cached under the new one
+            self.assertEqual(carbonara().name, 'Carbonara')
+        self.assertEqual(carbonara().name, 'Carbonara Classica')
+
+
+class MenuScheduleTests(TestCase):
+    """Scheduled categories and dishes come and go at their window boundaries."""
+
+    def setUp(self):
+        cache.clear()
+        self.breakfast = Category.objects.create(name='Breakfast')
+        mains = Category.objects.create(name='Mains')
+        self.tapsilog = MenuItem.objects.create(category=self.breakfast, name='Tapsilog', price=Decimal('8.00'))
+        self.adobo = MenuItem.objects.create(category=mains, name='Adobo', price=Decimal('10.00'))
+        self.sisig = MenuItem.objects.create(category=mains, name='Sisig', price=Decimal('9.00'))
+        morning = MenuSchedule.objects.create(name='Breakfast', weekday=0, start_time=time(7), end_time=time(11))
+        morning.categories.add(self.breakfast)
+        late = MenuSchedule.objects.create(name='Late night', weekday=0, start_time=time(22), end_time=time(2))
+        late.items.add(self.sisig)
+
+    def _at(self, day, hour, minute=0):
+        return timezone.make_aware(datetime(2026, 10, day, hour, minute))  # the 19th is a Monday
+
+    def _served(self, when):
+        return sorted(item.name for category in menu_categories(when) for item in category.items.all())
+
+    def test_menu_rolls_over_at_boundaries(self):
+        self.assertEqual(self._served(self._at(19, 8)), ['Adobo', 'Tapsilog'])
+        self.assertEqual(self._served(self._at(19, 11)), ['Adobo'])
+        self.assertEqual(self._served(self._at(19, 23, 30)), ['Adobo', 'Sisig'])
+        # The late-night window carries past midnight into Tuesday
+        self.assertEqual(self._served(self._at(20, 1, 59)), ['Adobo', 'Sisig'])
+        self.assertEqual(self._served(self._at(20, 8)), ['Adobo'])
+
+    def test_add_to_cart_outside_window_only_warns(self):
+        # Ordering tonight for tomorrow's breakfast — checkout checks the pickup time instead
+        url = reverse('orders:add_to_cart', args=[self.tapsilog.pk])
+        with mock.patch('menu.cache.timezone.now', return_value=self._at(19, 12)):
+            data = self.client.post(url, {'quantity': 1}).json()
+        self.assertTrue(data['success'])
+        self.assertIn("isn't on the menu right now", data['notice'])
+        with mock.patch('menu.cache.timezone.now', return_value=self._at(19, 9)):
+            self.assertEqual(self.client.post(url, {'quantity': 1}).json()['notice'], '')
+
+    def test_lookups_do_not_query_once_built(self):
+        is_served(self.adobo, self._at(19, 8))
+        with self.assertNumQueries(0):
+            self.assertTrue(is_served(self.tapsilog, self._at(19, 10, 59)))
+            self.assertFalse(is_served(self.tapsilog, self._at(19, 11)))
+        self.assertEqual(off_menu([self.tapsilog.pk, self.sisig.pk, self.adobo.pk], self._at(19, 12)), {self.tapsilog.pk, self.sisig.pk})
 
-# Create your tests here.
+    def test_schedule_change_rebuilds_timeline(self):
+        self.assertFalse(is_served(self.sisig, self._at(19, 12)))
+        lunch = MenuSchedule.objects.create(name='Lunch', weekday=0, start_time=time(11), end_time=time(14))
+        self.assertFalse(is_served(self.sisig, self._at(19, 12)))  # timeline rebuilt, window still empty
+        with self.captureOnCommitCallbacks(execute=True):
+            lunch.items.add(self.sisig)
+        self.assertTrue(is_served(self.sisig, self._at(19, 12)))
@@ -1,14 +1,17 @@
 from django.shortcuts import render, get_object_or_404
-from .models import Category, MenuItem
+from .cache import menu_categories, menu_modifiers, paired_with
+from .models import MenuItem
 
 
 def menu_page(request):
-    categories = Category.objects.filter(is_active=True).prefetch_related(
-        "items__tags", "items__addons"
-    )
-    return render(request, "menu/menu.html", {"categories": categories})
+    return render(request, "menu/menu.html", {
+        "categories": menu_categories(),
+        "modifiers": menu_modifiers(),
+    })
 
 
 def dish_detail(request, slug):
-    dish = get_object_or_404(MenuItem, slug=slug, is_available=True)
-    return render(request, "menu/dish_detail.html", {"dish": dish})
\ No newline at end of file
+    dish = get_object_or_404(
+        MenuItem.objects.prefetch_related("modifier_groups__options"), slug=slug, is_available=True
+    )
+    return render(request, "menu/dish_detail.html", {"dish": dish, "pairs": paired_with([dish.pk])})
\ No newline at end of file
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Order, OrderItem, PromoCode
+from django.utils import timezone
+from .models import Order, OrderItem, OrderStatusEvent, PromoCode
+from .status import status_changed
 
 
 class OrderItemInline(admin.TabularInline):
@@ -8,6 +10,16 @@ class OrderItemInline(admin.TabularInline):
     readonly_fields = ('name', 'price', 'quantity', 'item_total')
 
 
+class OrderStatusEventInline(admin.TabularInline):
+    model = OrderStatusEvent
+    extra = 0
+    can_delete = False
+    readonly_fields = ('from_status', 'to_status', 'created_at')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('order_number_short', 'name', 'status', 'total', 'pickup_time', 'created_at')
@@ -15,7 +27,15 @@ class OrderAdmin(admin.ModelAdmin):
     list_editable = ('status',)
     search_fields = ('name', 'email', 'phone')
     readonly_fields = ('order_number', 'subtotal', 'discount_amount', 'total', 'created_at', 'updated_at')
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, OrderStatusEventInline]
+
+    def save_model(self, request, obj, form, change):
+        status_edited = change and 'status' in form.changed_data
+        if status_edited:
+            obj.status_changed_at = timezone.now()
+        super().save_model(request, obj, form, change)
+        if status_edited:
+            status_changed([(obj, form.initial['status'])])
 
     def order_number_short(self, obj):
         return str(obj.order_number)[:8].upper()
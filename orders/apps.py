@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class OrdersConfig(AppConfig):
     name = 'orders'
+
+    def ready(self):
+        from django.db.models.signals import post_delete
+        from .models import DeletedOrder, Order
+        post_delete.connect(DeletedOrder.record, sender=Order, dispatch_uid='orders.deleted_order')
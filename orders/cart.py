@@ -1,4 +1,4 @@
-from menu.models import MenuItem, AddOn
+from menu.models import MenuItem
 from decimal import Decimal
 
 
@@ -13,22 +13,25 @@ class Cart:
             cart = self.session[CART_SESSION_KEY] = {}
         self.cart = cart
 
-    def _get_item_key(self, item_id, addon_id=None):
-        return f"{item_id}_addon_{addon_id}" if addon_id else str(item_id)
+    def _get_item_key(self, item_id, option_ids=()):
+        return f"{item_id}_opts_{'-'.join(str(pk) for pk in sorted(option_ids))}" if option_ids else str(item_id)
 
-    def add(self, menu_item, quantity=1, addon=None):
-        key = self._get_item_key(menu_item.id, addon.id if addon else None)
-        price = menu_item.price + (addon.additional_price if addon else Decimal('0'))
+    def add(self, menu_item, quantity=1, options=()):
+        options = list(options)
+        key = self._get_item_key(menu_item.id, [option.id for option in options])
+        addon_price = sum((option.additional_price for option in options), Decimal('0'))
+        price = menu_item.price + addon_price
 
         if key in self.cart:
             self.cart[key]['quantity'] += quantity
         else:
             self.cart[key] = {
                 'item_id': menu_item.id,
-                'addon_id': addon.id if addon else None,
+                'option_ids': [option.id for option in options],
                 'name': menu_item.name,
-                'addon_name': addon.name if addon else None,
+                'addon_name': ', '.join(option.name for option in options) or None,
                 'price': str(price),
+                'addon_price': str(addon_price),
                 'quantity': quantity,
             }
         self.save()
@@ -58,6 +61,7 @@ class Cart:
             item = item.copy()
             item['key'] = key
             item['price'] = Decimal(item['price'])
+            item['addon_price'] = Decimal(item.get('addon_price', '0'))
             item['total'] = item['price'] * item['quantity']
             yield item
 
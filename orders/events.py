@@ -0,0 +1,138 @@
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'orders:events'
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def order_payload(order):
+    """JSON-ready snapshot of an order for live dashboards."""
+    items = [
+        {'name': item.name, 'quantity': item.quantity}
+        for item in order.items.all()
+    ]
+    return {
+        'id': order.id,
+        'code': str(order.order_number)[:8].upper(),
+        'name': order.name,
+        'email': order.email,
+        'status': order.status,
+        'status_label': order.get_status_display(),
+        'total': str(order.total),
+        'pickup_time': order.pickup_time.isoformat() if order.pickup_time else None,
+        'created_at': order.created_at.isoformat() if order.created_at else None,
+        'items': items,
+        'items_count': len(items),
+    }
+
+
+class InProcessBroker:
+    """Fans events out to every SSE connection held by this process."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, message):
+        self._deliver(message)
+
+    def _deliver(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            # Publishers run in request threads, subscribers on the ASGI loop
+            loop.call_soon_threadsafe(_offer, queue, message)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self):
+        """Queue of raw JSON messages for as long as the block is open."""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.add(entry)
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                self._subscribers.discard(entry)
+
+
+class RedisBroker(InProcessBroker):
+    """Publishes through Redis pub/sub so every worker process sees every event."""
+
+    def __init__(self, url):
+        super().__init__()
+        self._url = url
+        self._client = None
+        self._listener = None
+
+    def publish(self, message):
+        import redis
+        if self._client is None:
+            self._client = redis.Redis.from_url(self._url)
+        try:
+            self._client.publish(CHANNEL, message)
+        except redis.RedisError:
+            logger.exception('Could not publish order event to Redis')
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self):
+        # One Redis connection per process, shared by all local subscribers
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        async with super().subscribe() as queue:
+            yield queue
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+        while True:
+            try:
+                client = aioredis.Redis.from_url(self._url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    async for item in pubsub.listen():
+                        if item['type'] == 'message':
+                            self._deliver(item['data'].decode('utf-8'))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Order event listener lost Redis, retrying')
+                await asyncio.sleep(2)
+
+
+def _offer(queue, message):
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        pass  # Slow client — it resyncs on reconnect
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        url = getattr(settings, 'ORDER_EVENTS_REDIS_URL', None)
+        _broker = RedisBroker(url) if url else InProcessBroker()
+    return _broker
+
+
+def publish_order_event(event, order):
+    """Broadcast an order event once the surrounding transaction commits."""
+    message = json.dumps({'event': event, 'order': order_payload(order)})
+    transaction.on_commit(lambda: get_broker().publish(message))
+
+
+def publish_order_removed(order_id):
+    message = json.dumps({'event': 'order_removed', 'order': {'id': order_id}})
+    transaction.on_commit(lambda: get_broker().publish(message))
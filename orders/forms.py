@@ -1,20 +1,41 @@
 from django import forms
 from .models import Order
-from menu.models import AddOn
+from .slots import has_room
+from menu.cache import off_menu
+from menu.models import ModifierOption
 import datetime
 
 
 class AddToCartForm(forms.Form):
     quantity = forms.IntegerField(min_value=1, max_value=20, initial=1)
-    addon = forms.ModelChoiceField(queryset=AddOn.objects.none(), required=False, label="Add-on (optional)")
+    options = forms.ModelMultipleChoiceField(
+        queryset=ModifierOption.objects.none(), required=False, label="Add-ons",
+        widget=forms.CheckboxSelectMultiple,
+    )
 
     def __init__(self, *args, **kwargs):
         menu_item = kwargs.pop('menu_item', None)
         super().__init__(*args, **kwargs)
+        self.groups = []
         if menu_item:
-            self.fields['addon'].queryset = menu_item.addons.all()
-            if not menu_item.addons.exists():
-                self.fields.pop('addon')
+            self.groups = list(menu_item.modifier_groups.prefetch_related('options'))
+            self.fields['options'].queryset = (
+                ModifierOption.objects.filter(group__in=self.groups).select_related('group')
+                .order_by('group__order_position', 'group__name', 'order_position', 'name')
+            )
+            if not self.groups:
+                self.fields.pop('options')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        chosen = cleaned_data.get('options') or []
+        for group in self.groups:
+            count = sum(1 for option in chosen if option.group_id == group.pk)
+            if count < group.min_selections:
+                self.add_error('options', f'Choose at least {group.min_selections} from {group.name}.')
+            elif group.max_selections and count > group.max_selections:
+                self.add_error('options', f'Choose at most {group.max_selections} from {group.name}.')
+        return cleaned_data
 
 
 class CheckoutForm(forms.ModelForm):
@@ -40,11 +61,23 @@ class CheckoutForm(forms.ModelForm):
             'order_notes': forms.Textarea(attrs={'rows': 3, 'placeholder': 'Allergies, special prep requests...'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        self.items = kwargs.pop('items', 0)
+        self.dishes = kwargs.pop('dishes', {})
+        super().__init__(*args, **kwargs)
+
     def clean_pickup_time(self):
         from django.utils import timezone
         pickup_time = self.cleaned_data.get('pickup_time')
         if pickup_time and pickup_time < timezone.now():
             raise forms.ValidationError("Pickup time cannot be in the past.")
+        if pickup_time and not has_room(pickup_time, self.items):
+            raise forms.ValidationError("That pickup slot is fully booked. Please choose another time.")
+        if pickup_time and self.dishes:
+            off = off_menu(self.dishes, pickup_time)
+            if off:
+                names = ', '.join(sorted(self.dishes[pk] for pk in off))
+                raise forms.ValidationError(f"Not served at that pickup time: {names}. Choose another time or remove them.")
         return pickup_time
 
 
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from orders.pairings import CHUNK_ORDERS, rebuild_pairings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild "frequently ordered together" suggestions from paid orders (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk', type=int, default=CHUNK_ORDERS, help='Order ids read per query')
+
+    def handle(self, *args, **options):
+        result = rebuild_pairings(options['chunk'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {result['baskets']} order(s), {result['pairs']} dish pair(s); "
+            f"stored {result['pairings']} suggestion(s)."
+        ))
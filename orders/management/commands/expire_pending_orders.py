@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.models import Order
+from orders.status import bulk_transition
+
+
+class Command(BaseCommand):
+    help = 'Cancel unpaid orders whose checkout has lapsed so their pickup slots free up'
+
+    def handle(self, *args, **kwargs):
+        # Stripe sessions expire after the hold (30 min minimum); allow a little slack
+        hold = max(settings.PICKUP_PENDING_HOLD_MINUTES, 30) + 5
+        cutoff = timezone.now() - timedelta(minutes=hold)
+        stale = Order.objects.filter(status='pending', created_at__lt=cutoff).values_list('pk', flat=True)
+        moved = bulk_transition(list(stale), 'cancelled')
+        self.stdout.write(self.style.SUCCESS(f'Cancelled {len(moved)} unpaid order(s).'))
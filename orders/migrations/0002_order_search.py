@@ -0,0 +1,75 @@
+# Generated by Django 6.0.2 on 2026-10-19 07:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from restaurant_site.search import build_search_document, document_tokens
+
+
+def backfill_search(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderSearchToken = apps.get_model('orders', 'OrderSearchToken')
+    use_tokens = schema_editor.connection.vendor != 'postgresql'
+
+    batch = []
+    for obj in Order.objects.only('name', 'email', 'phone', 'order_number').iterator(chunk_size=2000):
+        obj.search_document = build_search_document(obj.name, obj.email, obj.phone, str(obj.order_number)[:8])
+        batch.append(obj)
+        if len(batch) == 2000:
+            _flush(batch, Order, OrderSearchToken, use_tokens)
+            batch = []
+    _flush(batch, Order, OrderSearchToken, use_tokens)
+
+
+def _flush(batch, Order, OrderSearchToken, use_tokens):
+    Order.objects.bulk_update(batch, ['search_document'])
+    if use_tokens:
+        OrderSearchToken.objects.bulk_create([
+            OrderSearchToken(order_id=obj.pk, token=token[:254])
+            for obj in batch
+            for token in document_tokens(obj.search_document)
+        ])
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS orders_order_search_trgm '
+        'ON orders_order USING gin (search_document gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS orders_order_search_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.CreateModel(
+            name='OrderSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=254)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='orders.order')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'order'], name='orders_orde_token_87308f_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_search, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-19 08:05
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+def backfill_email_normalized(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    Order.objects.update(email_normalized=Lower(Trim('email')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_order_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='email_normalized',
+            field=models.EmailField(db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.RunPython(backfill_email_normalized, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 17:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0004_modifier_groups'),
+        ('orders', '0006_orderstatusevent'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='addon',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_remove_orderitem_addon'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='addon_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-19 21:30
+
+from django.db import migrations
+
+from restaurant_site.search import build_search_document, document_tokens
+
+
+def reindex(apps, schema_editor):
+    """Search documents now carry the whole order number, not just its first 8 characters."""
+    Order = apps.get_model('orders', 'Order')
+    OrderSearchToken = apps.get_model('orders', 'OrderSearchToken')
+    use_tokens = schema_editor.connection.vendor != 'postgresql'
+
+    batch = []
+    for obj in Order.objects.only('name', 'email', 'phone', 'order_number').iterator(chunk_size=2000):
+        obj.search_document = build_search_document(obj.name, obj.email, obj.phone, str(obj.order_number))
+        batch.append(obj)
+        if len(batch) == 2000:
+            _flush(batch, Order, OrderSearchToken, use_tokens)
+            batch = []
+    _flush(batch, Order, OrderSearchToken, use_tokens)
+
+
+def _flush(batch, Order, OrderSearchToken, use_tokens):
+    Order.objects.bulk_update(batch, ['search_document'])
+    if use_tokens:
+        OrderSearchToken.objects.filter(order_id__in=[obj.pk for obj in batch]).delete()
+        OrderSearchToken.objects.bulk_create([
+            OrderSearchToken(order_id=obj.pk, token=token[:254])
+            for obj in batch
+            for token in document_tokens(obj.search_document)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_orderitem_addon_price'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
-from menu.models import MenuItem, AddOn
+from menu.models import MenuItem
+from restaurant_site.search import build_search_document, normalize_email, sync_search_tokens
 import uuid
 
 
@@ -26,6 +27,15 @@ class PromoCode(models.Model):
         return True
 
 
+class OrderQuerySet(models.QuerySet):
+    def with_item_counts(self):
+        """Annotate items_count and items_quantity in the same query."""
+        return self.annotate(
+            items_count=models.Count('items'),
+            items_quantity=models.Sum('items__quantity'),
+        )
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -35,6 +45,7 @@ class Order(models.Model):
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
     ]
+    PAID_STATUSES = ['confirmed', 'preparing', 'ready', 'completed']
 
     # Identity
     order_number = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
@@ -43,6 +54,7 @@ class Order(models.Model):
     # Customer Info
     name = models.CharField(max_length=150)
     email = models.EmailField()
+    email_normalized = models.EmailField(db_index=True, editable=False, default='')
     phone = models.CharField(max_length=20)
 
     # Pickup Info
@@ -57,22 +69,92 @@ class Order(models.Model):
 
     # Status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    status_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Search — lowercased name, email, phone digits and short code
+    search_document = models.TextField(blank=True, editable=False)
+
+    objects = OrderQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['updated_at', 'id'], name='order_updated_cursor_idx')]
 
     def __str__(self):
         return f"Order #{str(self.order_number)[:8].upper()} — {self.name}"
 
+    @property
+    def short_code(self):
+        return str(self.order_number)[:8].upper()
+
+    def save(self, *args, **kwargs):
+        self.email_normalized = normalize_email(self.email)
+        document = build_search_document(self.name, self.email, self.phone, str(self.order_number))
+        reindex = document != self.search_document or self._state.adding
+        self.search_document = document
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and reindex:
+            kwargs['update_fields'] = {*update_fields, 'search_document', 'email_normalized'}
+        super().save(*args, **kwargs)
+        if reindex:
+            sync_search_tokens(self)
+
+
+class OrderSearchToken(models.Model):
+    """Token table backing dashboard search where pg_trgm is unavailable."""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=254)
+
+    class Meta:
+        indexes = [models.Index(fields=['token', 'order'])]
+
+    def __str__(self):
+        return self.token
+
+
+class DeletedOrder(models.Model):
+    """Tombstone for a deleted order, so delta-sync clients drop it too. Kept for TOMBSTONE_DAYS."""
+    TOMBSTONE_DAYS = 7
+
+    order_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Order {self.order_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+    @classmethod
+    def record(cls, sender, instance, **kwargs):
+        """post_delete receiver for Order — also sees admin and queryset deletes."""
+        from datetime import timedelta
+        from django.utils import timezone
+        now = timezone.now()
+        cls.objects.create(order_id=instance.pk, deleted_at=now)
+        cls.objects.filter(deleted_at__lt=now - timedelta(days=cls.TOMBSTONE_DAYS)).delete()
+
+
+class OrderStatusEvent(models.Model):
+    """Append-only log of status changes, used for kitchen throughput analytics."""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_events')
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    created_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['order', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.from_status} → {self.to_status}"
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     menu_item = models.ForeignKey(MenuItem, on_delete=models.SET_NULL, null=True)
-    addon = models.ForeignKey(AddOn, on_delete=models.SET_NULL, null=True, blank=True)
     name = models.CharField(max_length=150)  # snapshot at time of order
     price = models.DecimalField(max_digits=8, decimal_places=2)  # snapshot
+    addon_price = models.DecimalField(max_digits=8, decimal_places=2, default=0)  # snapshot, part of price
     quantity = models.PositiveIntegerField(default=1)
     item_total = models.DecimalField(max_digits=10, decimal_places=2)
 
@@ -0,0 +1,132 @@
+import numpy as np
+from django.db import transaction
+from django.db.models import Max, Min
+
+from menu.cache import invalidate_menu
+from menu.models import ItemPairing, MenuItem
+from .models import Order, OrderItem
+
+
+TOP_K = 6            # neighbours kept per dish
+MIN_TOGETHER = 3     # pairs seen in fewer orders are noise, however high their lift
+MAX_BASKET = 25      # catering-size orders pair everything with everything — left out
+CHUNK_ORDERS = 20000  # order ids per query; memory is bounded by distinct pairs, not order lines
+
+
+def _chunks(size):
+    """(order id, item id) arrays for paid orders, one order-id range at a time — orders never straddle two."""
+    bounds = Order.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return
+    lines = OrderItem.objects.filter(order__status__in=Order.PAID_STATUSES, menu_item__isnull=False)
+    for start in range(bounds['low'], bounds['high'] + 1, size):
+        rows = lines.filter(order_id__gte=start, order_id__lt=start + size).values_list('order_id', 'menu_item_id')
+        rows = np.array(list(rows), dtype=np.int64).reshape(-1, 2)
+        if len(rows):
+            yield rows[:, 0], rows[:, 1]
+
+
+def _starts(keys):
+    """Where each run of equal values begins in a sorted array."""
+    return np.flatnonzero(np.diff(keys, prepend=keys[:1] - 1))
+
+
+def _baskets(orders, items):
+    """Sort by order then dish and drop repeat dishes and oversized orders. Returns (items, basket starts)."""
+    order = np.lexsort((items, orders))
+    orders, items = orders[order], items[order]
+    first = (np.diff(orders, prepend=orders[:1] - 1) != 0) | (np.diff(items, prepend=items[:1] - 1) != 0)
+    orders, items = orders[first], items[first]
+
+    sizes = np.diff(np.r_[_starts(orders), len(orders)])
+    keep = np.repeat(sizes <= MAX_BASKET, sizes)
+    orders, items = orders[keep], items[keep]
+    return items, _starts(orders)
+
+
+def _pairs(items, starts):
+    """Every pair of dishes sharing a basket as (lower, higher) index arrays — no Python loop per order."""
+    sizes = np.diff(np.r_[starts, len(items)])
+    ends = np.repeat(starts + sizes, sizes)
+    later = ends - np.arange(len(items)) - 1  # rows after this one in the same basket
+    left = np.repeat(np.arange(len(items)), later)
+    right = left + 1 + np.arange(len(left)) - np.repeat(np.cumsum(later) - later, later)
+    return items[left], items[right]
+
+
+def _merge(keys, counts, new_keys, new_counts):
+    keys, inverse = np.unique(np.concatenate([keys, new_keys]), return_inverse=True)
+    return keys, np.bincount(inverse, weights=np.concatenate([counts, new_counts])).astype(np.int64)
+
+
+def co_occurrence(chunk=CHUNK_ORDERS):
+    """
+    Sparse dish-by-dish co-occurrence over all paid orders.
+
+    Each pair is one int64 key (lower index * n + higher index) with a count;
+    chunks are folded in as they are read. Returns (dish ids, per-dish basket
+    counts, pair keys, pair counts, number of baskets).
+    """
+    ids = np.array(sorted(MenuItem.objects.values_list('pk', flat=True)), dtype=np.int64)
+    n = len(ids)
+    item_counts = np.zeros(n, dtype=np.int64)
+    keys = np.array([], dtype=np.int64)
+    counts = np.array([], dtype=np.int64)
+    baskets = 0
+    if not n:
+        return ids, item_counts, keys, counts, baskets
+
+    for orders, raw in _chunks(chunk):
+        index = np.minimum(np.searchsorted(ids, raw), n - 1)
+        known = ids[index] == raw  # dishes added since the id list was read wait for the next run
+        items, starts = _baskets(orders[known], index[known])
+        if not len(items):
+            continue
+        baskets += len(starts)
+        item_counts += np.bincount(items, minlength=n)
+        low, high = _pairs(items, starts)
+        new_keys, new_counts = np.unique(low * n + high, return_counts=True)
+        keys, counts = _merge(keys, counts, new_keys, new_counts)
+    return ids, item_counts, keys, counts, baskets
+
+
+def top_neighbours(ids, item_counts, keys, counts, baskets, k=TOP_K):
+    """
+    Each dish's best k partners by lift, as (item ids, partner ids, rank, lift, together) arrays.
+
+    lift = P(a and b) / (P(a) P(b)): how much more often the pair shows up
+    than if the two were ordered independently. Only pairs with lift above 1
+    and at least MIN_TOGETHER shared orders qualify.
+    """
+    n = len(ids)
+    low, high = keys // n, keys % n
+    lift = counts * baskets / (item_counts[low] * item_counts[high])
+    keep = (counts >= MIN_TOGETHER) & (lift > 1)
+    low, high, lift, together = low[keep], high[keep], lift[keep], counts[keep]
+
+    # Both directions: b is a's neighbour and a is b's
+    src, dst = np.r_[low, high], np.r_[high, low]
+    lift, together = np.r_[lift, lift], np.r_[together, together]
+    order = np.lexsort((dst, -together, -lift, src))
+    src, dst, lift, together = src[order], dst[order], lift[order], together[order]
+
+    starts = _starts(src)
+    rank = np.arange(len(src)) - np.repeat(starts, np.diff(np.r_[starts, len(src)]))
+    top = rank < k
+    return ids[src[top]], ids[dst[top]], rank[top], lift[top], together[top]
+
+
+def rebuild_pairings(chunk=CHUNK_ORDERS):
+    """Recompute every dish's "frequently ordered together" list and swap it in one transaction."""
+    ids, item_counts, keys, counts, baskets = co_occurrence(chunk)
+    items, partners, ranks, lifts, together = top_neighbours(ids, item_counts, keys, counts, baskets)
+    with transaction.atomic():
+        ItemPairing.objects.all().delete()
+        ItemPairing.objects.bulk_create([
+            ItemPairing(item_id=item, paired_id=partner, rank=rank, lift=round(lift, 4), together=count)
+            for item, partner, rank, lift, count in zip(
+                items.tolist(), partners.tolist(), ranks.tolist(), lifts.tolist(), together.tolist(),
+            )
+        ], batch_size=1000)
+        transaction.on_commit(invalidate_menu)
+    return {'baskets': baskets, 'pairs': len(keys), 'pairings': len(items)}
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMinute, Floor, TruncHour
+
+from .models import OrderItem
+
+
+PREP_STATUSES = ['confirmed', 'preparing']
+WINDOW_MINUTES = 15
+CACHE_KEY = 'orders:prep-list'
+CACHE_TIMEOUT = 300  # the status service invalidates it; this is only a backstop
+
+
+def _grouped_rows():
+    """Quantity per dish per pickup window, for every open order, in one grouped query."""
+    return (
+        OrderItem.objects
+        .filter(order__status__in=PREP_STATUSES)
+        .annotate(
+            hour=TruncHour('order__pickup_time'),
+            window=Floor(ExtractMinute('order__pickup_time') / WINDOW_MINUTES),
+        )
+        .values('menu_item', 'name', 'hour', 'window')
+        .annotate(quantity=Sum('quantity'), tickets=Count('order', distinct=True))
+        .order_by('hour', 'window', '-quantity', 'name')
+    )
+
+
+def build_prep_list():
+    """Pickup windows with the dishes to cook in each, plus totals across all windows."""
+    windows = []
+    totals = {}
+    for row in _grouped_rows():
+        start = row['hour'] + timedelta(minutes=int(row['window']) * WINDOW_MINUTES)
+        if not windows or windows[-1]['start'] != start:
+            windows.append({
+                'start': start,
+                'end': start + timedelta(minutes=WINDOW_MINUTES),
+                'dishes': [],
+                'quantity': 0,
+            })
+        dish = {
+            'menu_item': row['menu_item'],
+            'name': row['name'],
+            'quantity': row['quantity'],
+            'tickets': row['tickets'],
+        }
+        windows[-1]['dishes'].append(dish)
+        windows[-1]['quantity'] += row['quantity']
+
+        total = totals.setdefault((row['menu_item'], row['name']), {**dish, 'quantity': 0, 'tickets': 0})
+        total['quantity'] += row['quantity']
+        total['tickets'] += row['tickets']
+
+    return {
+        'windows': windows,
+        'totals': sorted(totals.values(), key=lambda dish: (-dish['quantity'], dish['name'])),
+    }
+
+
+def prep_list():
+    """Cached prep list — rebuilt after the status service changes an open order."""
+    data = cache.get(CACHE_KEY)
+    if data is None:
+        data = build_prep_list()
+        cache.set(CACHE_KEY, data, CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_prep_list():
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,166 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Order, OrderItem
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'pickup-slot'
+# Every status except cancelled keeps its place in the slot
+HOLDING_STATUSES = ['pending', 'confirmed', 'preparing', 'ready', 'completed']
+
+
+def slot_minutes():
+    return settings.PICKUP_SLOT_MINUTES
+
+
+def slot_start(when):
+    """Start of the pickup slot `when` falls in, in local time."""
+    local = timezone.localtime(when)
+    minutes = local.hour * 60 + local.minute
+    minutes -= minutes % slot_minutes()
+    return local.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+
+def day_slots(day):
+    """Every slot start between opening and closing on `day`."""
+    hours = settings.PICKUP_HOURS.get(day.weekday())
+    if not hours:
+        return []
+    opens, closes = (datetime.strptime(f'{day} {t}', '%Y-%m-%d %H:%M') for t in hours)
+    zone = timezone.get_current_timezone()
+    start, end = timezone.make_aware(opens, zone), timezone.make_aware(closes, zone)
+
+    slots = []
+    while start < end:
+        slots.append(start)
+        start += timedelta(minutes=slot_minutes())
+    return slots
+
+
+def _keys(start):
+    stamp = int(start.timestamp())
+    return f'{KEY_PREFIX}:{stamp}:orders', f'{KEY_PREFIX}:{stamp}:items'
+
+
+def _timeout(start):
+    # Keep counters until an hour after the slot ends
+    end = start + timedelta(minutes=slot_minutes())
+    return max(int((end - timezone.now()).total_seconds()), 0) + 3600
+
+
+def _counts_from_db(starts):
+    """(orders, items) per slot start, from the orders table — used to seed missing counters."""
+    span = timedelta(minutes=slot_minutes())
+    rows = (
+        Order.objects
+        .filter(pickup_time__gte=min(starts), pickup_time__lt=max(starts) + span, status__in=HOLDING_STATUSES)
+        .annotate(quantity=Sum('items__quantity'))
+        .values_list('pickup_time', 'quantity')
+    )
+    counts = {}
+    for pickup_time, quantity in rows:
+        orders, items = counts.get(slot_start(pickup_time), (0, 0))
+        counts[slot_start(pickup_time)] = (orders + 1, items + (quantity or 0))
+    return counts
+
+
+def slot_counts(starts):
+    """Current (orders, items) for each slot start — cache reads, seeded from the DB once."""
+    keys = {start: _keys(start) for start in starts}
+    cached = cache.get_many([key for pair in keys.values() for key in pair])
+    missing = [start for start, pair in keys.items() if not all(key in cached for key in pair)]
+
+    if missing:
+        fresh = _counts_from_db(missing)
+        for start in missing:
+            timeout = _timeout(start)
+            # add() never overwrites, so a counter a concurrent checkout already seeded wins
+            for key, value in zip(keys[start], fresh.get(start, (0, 0))):
+                cache.add(key, value, timeout)
+        cached.update(cache.get_many([key for start in missing for key in keys[start]]))
+
+    return {start: tuple(cached.get(key, 0) for key in keys[start]) for start in starts}
+
+
+def is_full(orders, items, extra_items=0):
+    """Would one more order of `extra_items` items overflow the slot?"""
+    max_orders, max_items = settings.PICKUP_SLOT_MAX_ORDERS, settings.PICKUP_SLOT_MAX_ITEMS
+    if max_orders and orders + 1 > max_orders:
+        return True
+    if max_items and items + extra_items > max_items:
+        return True
+    return False
+
+
+def has_room(pickup_time, items):
+    """Read-only capacity check for form validation; reserve() is the authority."""
+    orders, current_items = slot_counts([slot_start(pickup_time)])[slot_start(pickup_time)]
+    return not is_full(orders, current_items, items)
+
+
+def reserve(pickup_time, items):
+    """
+    Claim room for one order of `items` items in its slot. Returns False if full.
+
+    The increments are atomic in the cache, so two checkouts racing for the
+    last place can't both get it — the loser sees the overflow and rolls back.
+    """
+    orders_key, items_key = _keys(slot_start(pickup_time))
+    for _ in range(2):
+        slot_counts([slot_start(pickup_time)])
+        try:
+            orders = cache.incr(orders_key)
+        except ValueError:
+            continue  # Evicted between seeding and incr — seed again
+        try:
+            total_items = cache.incr(items_key, items)
+        except ValueError:
+            _decr(orders_key)
+            continue
+
+        if orders is None or total_items is None:
+            break  # Cache unavailable
+        if is_full(orders - 1, total_items - items, items):
+            _decr(orders_key)
+            _decr(items_key, items)
+            return False
+        return True
+
+    logger.warning('Pickup slot counters unavailable, accepting order without a capacity check')
+    return True
+
+
+def release(pickup_time, items):
+    """Give a slot place back once the transaction that freed it commits."""
+    orders_key, items_key = _keys(slot_start(pickup_time))
+
+    def _release():
+        _decr(orders_key)
+        _decr(items_key, items)
+
+    transaction.on_commit(_release)
+
+
+def release_orders(orders):
+    """Release the slots held by several orders, with one query for their item counts."""
+    quantities = dict(
+        OrderItem.objects.filter(order__in=orders)
+        .values_list('order').annotate(total=Sum('quantity'))
+    )
+    for order in orders:
+        release(order.pickup_time, quantities.get(order.pk, 0))
+
+
+def _decr(key, delta=1):
+    try:
+        cache.decr(key, delta)
+    except ValueError:
+        pass  # Already expired — it reseeds from the DB
@@ -0,0 +1,156 @@
+from django.db import transaction
+from django.utils import timezone
+
+from dashboard.models import Customer, ItemDailySales
+from menu.stock import restore
+from .events import publish_order_event
+from .models import Order, OrderItem, OrderStatusEvent
+from .prep import PREP_STATUSES, invalidate_prep_list
+from .slots import HOLDING_STATUSES, release_orders
+
+
+STATUS_FLOW = {
+    'pending':   'confirmed',
+    'confirmed': 'preparing',
+    'preparing': 'ready',
+    'ready':     'completed',
+}
+
+STATUS_LABELS = {
+    'pending':   'Pending',
+    'confirmed': 'Confirmed',
+    'preparing': 'Preparing',
+    'ready':     'Ready',
+    'completed': 'Completed',
+    'cancelled': 'Cancelled',
+}
+
+CANCELLABLE_STATUSES = ['pending', 'confirmed', 'preparing', 'ready']
+RESTOCK_STATUSES = ['pending', 'confirmed']
+
+
+def allowed_sources(to_status):
+    """Statuses an order may be moved to to_status from."""
+    if to_status == 'cancelled':
+        return CANCELLABLE_STATUSES
+    return [source for source, target in STATUS_FLOW.items() if target == to_status]
+
+
+def transition(order, to_status, from_statuses=None):
+    """
+    Move one order to to_status only if it is still in one of from_statuses.
+
+    The check and the write are a single UPDATE ... WHERE id=? AND status IN (...),
+    so two staff acting on the same ticket can't skip or revert a state. The
+    side effects commit with it, as in bulk_transition.
+    Returns False when someone else got there first.
+    """
+    if from_statuses is None:
+        from_statuses = allowed_sources(to_status)
+    if order.status not in from_statuses:
+        return False
+
+    now = timezone.now()
+    with transaction.atomic():
+        updated = Order.objects.filter(pk=order.pk, status=order.status).update(
+            status=to_status, status_changed_at=now, updated_at=now,
+        )
+        if not updated:
+            return False
+
+        previous = order.status
+        order.status = to_status
+        order.status_changed_at = now
+        order.updated_at = now
+        status_changed([(order, previous)])
+    return True
+
+
+def advance(order):
+    """Move an order one step along STATUS_FLOW."""
+    next_status = STATUS_FLOW.get(order.status)
+    if not next_status:
+        return False
+    return transition(order, next_status, [order.status])
+
+
+def bulk_transition(order_ids, to_status):
+    """Move every eligible order in order_ids to to_status. Returns the orders moved."""
+    sources = allowed_sources(to_status)
+    now = timezone.now()
+
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update()
+            .filter(pk__in=order_ids, status__in=sources)
+            .prefetch_related('items')
+        )
+        if not orders:
+            return []
+        Order.objects.filter(pk__in=[order.pk for order in orders]).update(
+            status=to_status, status_changed_at=now, updated_at=now,
+        )
+
+        changes = []
+        for order in orders:
+            changes.append((order, order.status))
+            order.status = to_status
+            order.status_changed_at = now
+            order.updated_at = now
+        status_changed(changes)
+    return orders
+
+
+def status_changed(changes):
+    """Side effects for (order, previous_status) pairs that just changed status."""
+    OrderStatusEvent.objects.bulk_create([
+        OrderStatusEvent(
+            order=order, from_status=previous, to_status=order.status,
+            created_at=order.status_changed_at or timezone.now(),
+        )
+        for order, previous in changes
+    ])
+
+    freed = [
+        order for order, previous in changes
+        if order.status == 'cancelled' and previous in HOLDING_STATUSES
+    ]
+    if freed:
+        release_orders(freed)
+    # Portions only go back on sale if the kitchen hadn't started on them
+    unmade = [
+        order for order, previous in changes
+        if order.status == 'cancelled' and previous in RESTOCK_STATUSES
+    ]
+    if unmade:
+        restore_stock(unmade)
+
+    if any(order.status in PREP_STATUSES or previous in PREP_STATUSES for order, previous in changes):
+        transaction.on_commit(invalidate_prep_list)
+
+    paid = set(Order.PAID_STATUSES)
+    refresh = set()
+    for order, previous in changes:
+        if (previous in paid) != (order.status in paid):
+            refresh.add(order.email)
+        publish_order_event('order_status', order)
+    for email in refresh:
+        Customer.refresh(email)
+
+    sold = [order for order, previous in changes if order.status in paid and previous not in paid]
+    refunded = [order for order, previous in changes if previous in paid and order.status not in paid]
+    if sold:
+        ItemDailySales.record(sold)
+    if refunded:
+        ItemDailySales.record(refunded, sign=-1)
+
+
+def restore_stock(orders):
+    """Give back the portions several cancelled or abandoned orders had claimed."""
+    quantities = {}
+    for item_id, quantity in OrderItem.objects.filter(
+        order__in=orders, menu_item__isnull=False,
+    ).values_list('menu_item_id', 'quantity'):
+        quantities[item_id] = quantities.get(item_id, 0) + quantity
+    if quantities:
+        restore(quantities)
@@ -1,3 +1,393 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from menu.cache import menu_categories, paired_with
+from menu.models import Category, ItemPairing, MenuItem, ModifierGroup, ModifierOption
+from menu.stock import SoldOut, take
+
+from .events import InProcessBroker, publish_order_event
+from .models import Order, OrderItem, OrderStatusEvent
+from .pairings import rebuild_pairings
+from .prep import build_prep_list, prep_list
+from .slots import has_room, reserve, slot_start
+from .status import advance, bulk_transition, transition
+
+
+class StatusTransitionTests(TestCase):
+    """Status changes are conditional on the status the caller saw."""
+
+    def _order(self, status='confirmed'):
+        return Order.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            pickup_time=timezone.now(), total=Decimal('10.00'), status=status,
+        )
+
+    def test_advance_records_transition_time(self):
+        order = self._order()
+        self.assertTrue(advance(order))
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'preparing')
+        self.assertIsNotNone(order.status_changed_at)
+
+    def test_stale_copy_cannot_advance_twice(self):
+        order = self._order()
+        stale = Order.objects.get(pk=order.pk)
+        self.assertTrue(advance(order))
+        self.assertFalse(advance(stale))
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'preparing')
+
+    def test_confirm_happens_once(self):
+        order = self._order(status='pending')
+        self.assertTrue(transition(order, 'confirmed', ['pending']))
+        self.assertFalse(transition(Order.objects.get(pk=order.pk), 'confirmed', ['pending']))
+
+    def test_failed_side_effect_rolls_back_the_status(self):
+        order = self._order(status='pending')
+        with mock.patch('orders.status.Customer.refresh', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            transition(order, 'confirmed', ['pending'])
+        self.assertEqual(Order.objects.get(pk=order.pk).status, 'pending')
+        self.assertFalse(OrderStatusEvent.objects.exists())
+
+    def test_bulk_transition_skips_ineligible(self):
+        confirmed = [self._order() for _ in range(3)]
+        done = self._order(status='completed')
+        moved = bulk_transition([o.pk for o in confirmed] + [done.pk], 'preparing')
+        self.assertEqual({o.pk for o in moved}, {o.pk for o in confirmed})
+        self.assertEqual(Order.objects.filter(status='preparing').count(), 3)
+        self.assertEqual(Order.objects.get(pk=done.pk).status, 'completed')
+
+
+@override_settings(PICKUP_SLOT_MINUTES=15, PICKUP_SLOT_MAX_ORDERS=2, PICKUP_SLOT_MAX_ITEMS=5)
+class PickupSlotTests(TestCase):
+    """Slot counters live in the cache and are seeded from the orders table."""
+
+    def setUp(self):
+        cache.clear()
+        tomorrow = timezone.localtime() + timedelta(days=1)
+        self.pickup = tomorrow.replace(hour=12, minute=5, second=0, microsecond=0)
+
+    def _order(self, quantity=1):
+        order = Order.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            pickup_time=self.pickup, total=Decimal('10.00'), status='confirmed',
+        )
+        OrderItem.objects.create(
+            order=order, name='Adobo', price=Decimal('10.00'), quantity=quantity, item_total=Decimal('10.00'),
+        )
+        return order
+
+    def test_order_limit(self):
+        self.assertTrue(reserve(self.pickup, 1))
+        self.assertTrue(reserve(self.pickup + timedelta(minutes=9), 1))
+        self.assertFalse(reserve(self.pickup, 1))
+        self.assertTrue(reserve(self.pickup + timedelta(minutes=15), 1))
+
+    def test_item_limit_rolls_back(self):
+        self.assertTrue(reserve(self.pickup, 4))
+        self.assertFalse(reserve(self.pickup, 2))
+        self.assertTrue(reserve(self.pickup, 1))
+
+    def test_seeded_from_existing_orders(self):
+        self._order(quantity=3)
+        self.assertFalse(has_room(self.pickup, 3))
+        self.assertTrue(has_room(self.pickup, 2))
+
+    def test_cancel_frees_the_slot(self):
+        first = self._order()
+        self._order()
+        self.assertFalse(has_room(self.pickup, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(first, 'cancelled')
+        self.assertTrue(reserve(self.pickup, 1))
+
+    def test_slots_endpoint(self):
+        self._order()
+        self._order()
+        response = self.client.get(reverse('orders:pickup_slots'), {'date': self.pickup.date().isoformat()})
+        slots = {slot['value']: slot for slot in response.json()['slots']}
+        self.assertTrue(slots[slot_start(self.pickup).strftime('%Y-%m-%dT%H:%M')]['full'])
+
+
+class CheckoutSessionTests(TestCase):
+    """The Stripe session is created with an expiry Stripe will accept."""
+
+    def setUp(self):
+        cache.clear()
+        mains = Category.objects.create(name='Mains')
+        self.adobo = MenuItem.objects.create(category=mains, name='Adobo', price=Decimal('10.00'))
+
+    @override_settings(PICKUP_PENDING_HOLD_MINUTES=30)
+    @mock.patch('orders.views.stripe.checkout.Session.create')
+    def test_expiry_clears_stripe_minimum(self, create):
+        create.return_value = mock.Mock(url='https://checkout.stripe.test/session')
+        self.client.post(reverse('orders:add_to_cart', args=[self.adobo.pk]), {'quantity': 1})
+        pickup = (timezone.localtime() + timedelta(days=1)).replace(hour=12, minute=0)
+        before = int(time.time())
+        response = self.client.post(reverse('orders:checkout'), {
+            'name': 'Guest', 'email': 'guest@example.com', 'phone': '0912',
+            'pickup_time': pickup.strftime('%Y-%m-%dT%H:%M'),
+        })
+        self.assertRedirects(response, 'https://checkout.stripe.test/session', fetch_redirect_response=False)
+        self.assertGreaterEqual(create.call_args.kwargs['expires_at'] - before, 31 * 60)
+
+
+class OrderEventTests(TestCase):
+    """Events reach subscribers on the event loop from any thread, and only after commit."""
+
+    def test_publish_from_request_thread_reaches_subscriber(self):
+        broker = InProcessBroker()
+
+        async def listen():
+            async with broker.subscribe() as queue:
+                publisher = threading.Thread(target=broker.publish, args=('{"event": "order_created"}',))
+                publisher.start()
+                message = await asyncio.wait_for(queue.get(), timeout=2)
+                publisher.join()
+            return message
+
+        self.assertEqual(asyncio.run(listen()), '{"event": "order_created"}')
+        broker.publish('after unsubscribe')  # nobody left to deliver to
+
+    def test_published_on_commit(self):
+        order = Order.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            pickup_time=timezone.now(), total=Decimal('10.00'), status='confirmed',
+        )
+        with mock.patch('orders.events.get_broker') as broker:
+            with self.captureOnCommitCallbacks(execute=True):
+                publish_order_event('order_updated', order)
+                broker.return_value.publish.assert_not_called()
+        message = json.loads(broker.return_value.publish.call_args.args[0])
+        self.assertEqual((message['event'], message['order']['id']), ('order_updated', order.pk))
+
+
+class PrepListTests(TestCase):
+    """Open orders are summed per dish and 15-minute pickup window."""
+
+    def setUp(self):
+        cache.clear()
+        self.noon = (timezone.localtime() + timedelta(days=1)).replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def _order(self, minute, dishes, status='confirmed'):
+        order = Order.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            pickup_time=self.noon + timedelta(minutes=minute), total=Decimal('10.00'), status=status,
+        )
+        for name, quantity in dishes:
+            OrderItem.objects.create(
+                order=order, name=name, price=Decimal('5.00'), quantity=quantity, item_total=Decimal('5.00'),
+            )
+        return order
+
+    def test_windows_and_totals(self):
+        self._order(2, [('Adobo', 2), ('Rice', 1)])
+        self._order(14, [('Adobo', 3)], status='preparing')
+        self._order(20, [('Adobo', 1)])
+        self._order(5, [('Adobo', 9)], status='ready')
+
+        with self.assertNumQueries(1):
+            data = build_prep_list()
+        first, second = data['windows']
+        self.assertEqual(first['start'], self.noon)
+        self.assertEqual([(d['name'], d['quantity'], d['tickets']) for d in first['dishes']], [('Adobo', 5, 2), ('Rice', 1, 1)])
+        self.assertEqual(second['start'], self.noon + timedelta(minutes=15))
+        self.assertEqual(data['totals'][0]['quantity'], 6)
+
+    def test_status_change_invalidates_cache(self):
+        order = self._order(2, [('Adobo', 2)])
+        self.assertEqual(len(prep_list()['windows']), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(order, 'ready', ['confirmed'])
+        self.assertEqual(prep_list()['windows'], [])
+
+
+class ModifierCartTests(TestCase):
+    """Shared modifier groups allow several options per dish within each group's limits."""
+
+    def setUp(self):
+        mains = Category.objects.create(name='Mains')
+        self.adobo = MenuItem.objects.create(category=mains, name='Adobo', price=Decimal('10.00'))
+        rice = ModifierGroup.objects.create(name='Rice', min_selections=1, max_selections=1)
+        extras = ModifierGroup.objects.create(name='Extras', max_selections=2, order_position=1)
+        self.adobo.modifier_groups.set([rice, extras])
+        self.garlic = ModifierOption.objects.create(group=rice, name='Garlic Rice', additional_price=Decimal('1.00'))
+        self.egg = ModifierOption.objects.create(group=extras, name='Egg', additional_price=Decimal('0.75'))
+        self.atchara = ModifierOption.objects.create(group=extras, name='Atchara', additional_price=Decimal('0.50'))
+
+    def _add(self, *options):
+        return self.client.post(
+            reverse('orders:add_to_cart', args=[self.adobo.pk]),
+            {'quantity': 2, 'options': [option.pk for option in options]},
+        )
+
+    def test_several_options_priced_into_one_line(self):
+        data = self._add(self.garlic, self.egg, self.atchara).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['cart_subtotal'], '24.50')
+        self.assertEqual(data['cart_items'][0]['addon_name'], 'Garlic Rice, Atchara, Egg')
+
+        # Same choices in another order land on the same cart line
+        data = self._add(self.atchara, self.garlic, self.egg).json()
+        self.assertEqual((len(data['cart_items']), data['cart_items'][0]['quantity']), (1, 4))
+
+    def test_long_option_list_fits_the_order_line(self):
+        sides = ModifierGroup.objects.create(name='Sides', max_selections=0, order_position=2)
+        self.adobo.modifier_groups.add(sides)
+        options = [
+            ModifierOption.objects.create(group=sides, name=f'Extra helping of house-pickled vegetables no. {n}')
+            for n in range(4)
+        ]
+        self._add(self.garlic, *options)
+        pickup = (timezone.localtime() + timedelta(days=1)).replace(hour=12, minute=0)
+        with mock.patch('orders.views.stripe.checkout.Session.create', return_value=mock.Mock(url='https://stripe.test/')):
+            self.client.post(reverse('orders:checkout'), {
+                'name': 'Guest', 'email': 'guest@example.com', 'phone': '0912',
+                'pickup_time': pickup.strftime('%Y-%m-%dT%H:%M'),
+            })
+        name = OrderItem.objects.get().name
+        self.assertEqual(len(name), OrderItem._meta.get_field('name').max_length)
+        self.assertTrue(name.startswith('Adobo + ') and name.endswith('…'))
+
+    def test_group_limits_are_enforced(self):
+        response = self._add(self.egg)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Choose at least 1 from Rice.')
+        self.assertTrue(self._add(self.garlic).json()['success'])
+
+
+class StockTests(TestCase):
+    """Tracked dishes are claimed with conditional decrements and given back on early cancels."""
+
+    def setUp(self):
+        cache.clear()
+        mains = Category.objects.create(name='Mains')
+        self.adobo = MenuItem.objects.create(category=mains, name='Adobo', price=Decimal('10.00'), stock=3)
+        self.sinigang = MenuItem.objects.create(category=mains, name='Sinigang', price=Decimal('12.00'))
+
+    def _order(self, status='pending', quantity=2):
+        order = Order.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            pickup_time=timezone.now() + timedelta(days=1), total=Decimal('20.00'), status=status,
+        )
+        OrderItem.objects.create(
+            order=order, menu_item=self.adobo, name='Adobo', price=Decimal('10.00'),
+            quantity=quantity, item_total=Decimal('20.00'),
+        )
+        return order
+
+    def test_take_decrements_tracked_dishes_only(self):
+        take({self.adobo.pk: 2, self.sinigang.pk: 5})
+        self.adobo.refresh_from_db()
+        self.sinigang.refresh_from_db()
+        self.assertEqual((self.adobo.stock, self.sinigang.stock), (1, None))
+
+    def test_short_dish_raises_and_leaves_stock(self):
+        with self.assertRaises(SoldOut) as raised:
+            take({self.adobo.pk: 4})
+        self.assertEqual(raised.exception.names, ['Adobo'])
+        self.adobo.refresh_from_db()
+        self.assertEqual(self.adobo.stock, 3)
+
+    def test_sold_out_dish_leaves_the_menu(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            take({self.adobo.pk: 3})
+        items = [item.name for category in menu_categories() for item in category.items.all()]
+        self.assertEqual(items, ['Sinigang'])
+        response = self.client.post(reverse('orders:add_to_cart', args=[self.adobo.pk]), {'quantity': 1})
+        self.assertEqual(response.json()['error'], 'Adobo is sold out.')
+
+    def test_checkout_rolls_back_when_stock_ran_out(self):
+        self.client.post(reverse('orders:add_to_cart', args=[self.adobo.pk]), {'quantity': 2})
+        MenuItem.objects.filter(pk=self.adobo.pk).update(stock=1)  # someone else got there first
+        pickup = (timezone.localtime() + timedelta(days=1)).replace(hour=12, minute=0)
+        response = self.client.post(reverse('orders:checkout'), {
+            'name': 'Guest', 'email': 'guest@example.com', 'phone': '0912',
+            'pickup_time': pickup.strftime('%Y-%m-%dT%H:%M'),
+        })
+        self.assertContains(response, 'Sold out: Adobo')
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(MenuItem.objects.get(pk=self.adobo.pk).stock, 1)
+        self.assertTrue(has_room(pickup, 20))
+
+    def test_cancel_before_preparing_restores(self):
+        order = self._order()
+        MenuItem.objects.filter(pk=self.adobo.pk).update(stock=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(order, 'cancelled')
+        self.assertEqual(MenuItem.objects.get(pk=self.adobo.pk).stock, 2)
+
+    def test_cancel_after_preparing_keeps_stock(self):
+        transition(self._order(status='preparing'), 'cancelled')
+        self.assertEqual(MenuItem.objects.get(pk=self.adobo.pk).stock, 3)
+
+
+class PairingTests(TestCase):
+    """Co-occurrence is counted per paid order and ranked by lift."""
+
+    def setUp(self):
+        cache.clear()
+        mains = Category.objects.create(name='Mains')
+        self.dishes = {
+            name: MenuItem.objects.create(category=mains, name=name, price=Decimal('10.00'))
+            for name in ['Adobo', 'Rice', 'Halo-halo', 'Lumpia', 'Sinigang']
+        }
+        baskets = (
+            [['Adobo', 'Rice']] * 4 + [['Sinigang', 'Rice']] * 4 + [['Adobo', 'Halo-halo', 'Lumpia']] * 3
+            + [['Lumpia', 'Sinigang']] * 2
+        )
+        for names in baskets:
+            self._order(names)
+        self._order(['Adobo', 'Sinigang'] * 3, status='cancelled')
+
+    def _order(self, names, status='completed'):
+        order = Order.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            pickup_time=timezone.now(), total=Decimal('10.00'), status=status,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, menu_item=self.dishes[name], name=name, price=Decimal('10.00'), quantity=1, item_total=Decimal('10.00'))
+            for name in names
+        ])
+
+    def _neighbours(self, name):
+        return [pairing.paired.name for pairing in ItemPairing.objects.filter(item=self.dishes[name]).select_related('paired')]
+
+    def test_ranked_by_lift_with_minimum_support(self):
+        result = rebuild_pairings()
+        self.assertEqual(result['baskets'], 13)
+        # Rice comes with Adobo often, but with everything else too — lift below 1
+        self.assertEqual(self._neighbours('Adobo'), ['Halo-halo', 'Lumpia'])
+        self.assertEqual(self._neighbours('Halo-halo'), ['Lumpia', 'Adobo'])
+        # Lumpia + Sinigang twice is below the support floor; Adobo + Sinigang was never paid for
+        self.assertEqual(self._neighbours('Sinigang'), ['Rice'])
+
+    def test_small_chunks_match_one_pass(self):
+        rebuild_pairings()
+        whole = list(ItemPairing.objects.values_list('item_id', 'paired_id', 'rank', 'lift', 'together'))
+        rebuild_pairings(chunk=2)
+        self.assertEqual(list(ItemPairing.objects.values_list('item_id', 'paired_id', 'rank', 'lift', 'together')), whole)
+
+    def test_served_from_cache_without_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_pairings()
+        adobo, halo = self.dishes['Adobo'], self.dishes['Halo-halo']
+        self.assertEqual([dish['name'] for dish in paired_with([adobo.pk])], ['Halo-halo', 'Lumpia'])
+        with self.assertNumQueries(0):
+            self.assertEqual([dish['name'] for dish in paired_with([adobo.pk, halo.pk])], ['Lumpia'])
+
+        MenuItem.objects.filter(pk=self.dishes['Lumpia'].pk).update(stock=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dishes['Lumpia'].refresh_from_db()
+            self.dishes['Lumpia'].save()
+        self.assertEqual([dish['name'] for dish in paired_with([adobo.pk])], ['Halo-halo'])
@@ -8,6 +8,7 @@ urlpatterns = [
     path('cart/count/', views.cart_count, name='cart_count'),
     path('add/<int:item_id>/', views.add_to_cart, name='add_to_cart'),
     path('checkout/', views.checkout_view, name='checkout'),
+    path('slots/', views.pickup_slots, name='pickup_slots'),
     path('payment/success/', views.payment_success, name='payment_success'),
     path('payment/cancel/', views.payment_cancel, name='payment_cancel'),
     path('webhook/', views.stripe_webhook, name='stripe_webhook'),
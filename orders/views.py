@@ -4,33 +4,53 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse, HttpResponse
 from django.contrib import messages
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
+from datetime import datetime, timedelta
 from decimal import Decimal
 from django_ratelimit.decorators import ratelimit
 import stripe
+import time
 
 from dashboard.models import BlockedCustomer
+from menu.cache import is_served, paired_with
 from menu.models import MenuItem
+from menu.stock import SoldOut, take
+from restaurant_site.search import normalize_email
 from .cart import Cart
 from .models import Order, OrderItem, PromoCode
 from .forms import CheckoutForm, AddToCartForm, PromoCodeForm
 from .emails import send_customer_confirmation, send_restaurant_notification
+from .events import publish_order_event, publish_order_removed
+from .slots import day_slots, is_full, release, reserve, slot_counts, slot_minutes
+from .status import restore_stock, transition
 
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 
+def _line_name(item):
+    """Dish plus chosen options, cut to fit OrderItem.name — unlimited groups can pick many."""
+    name = item['name'] + (f" + {item['addon_name']}" if item['addon_name'] else '')
+    limit = OrderItem._meta.get_field('name').max_length
+    return name if len(name) <= limit else name[:limit - 1] + '…'
+
+
 def add_to_cart(request, item_id):
     menu_item = get_object_or_404(MenuItem, id=item_id, is_available=True)
     cart = Cart(request)
 
     if request.method == 'POST':
+        if menu_item.is_sold_out:
+            return JsonResponse({'success': False, 'error': f'{menu_item.name} is sold out.'}, status=400)
         form = AddToCartForm(request.POST, menu_item=menu_item)
         if form.is_valid():
-            addon = form.cleaned_data.get('addon')
+            options = form.cleaned_data.get('options') or []
             quantity = form.cleaned_data.get('quantity', 1)
-            cart.add(menu_item, quantity=quantity, addon=addon)
+            cart.add(menu_item, quantity=quantity, options=options)
             cart_items = []
             for item in cart:
                 cart_items.append({
@@ -41,13 +61,19 @@ def add_to_cart(request, item_id):
                     'quantity': item['quantity'],
                     'total': str(item['total']),
                 })
+            # Checkout holds the dish to the pickup time's menu; here it's only a heads-up
+            notice = '' if is_served(menu_item) else f"{menu_item.name} isn't on the menu right now — choose a pickup time when it's served."
             return JsonResponse({
                 'success': True,
                 'added_item': menu_item.name,
+                'notice': notice,
                 'cart_count': cart.get_total_items(),
                 'cart_subtotal': str(cart.get_subtotal()),
                 'cart_items': cart_items,
+                'suggestions': paired_with([item['item_id'] for item in cart]),
             })
+        errors = [error for field_errors in form.errors.values() for error in field_errors]
+        return JsonResponse({'success': False, 'error': errors[0]}, status=400)
 
     form = AddToCartForm(menu_item=menu_item)
     return render(request, 'orders/add_to_cart.html', {'form': form, 'item': menu_item})
@@ -139,61 +165,90 @@ def checkout_view(request):
         if request.POST.get('website'):
             return redirect('orders:cart')
 
-        form = CheckoutForm(request.POST)
+        items_count = cart.get_total_items()
+        form = CheckoutForm(request.POST, items=items_count, dishes={item['item_id']: item['name'] for item in cart})
         if form.is_valid():
             email = form.cleaned_data['email']  # ← email is now defined
 
             # ── Blocked customer check ──
-            if BlockedCustomer.objects.filter(email__iexact=email).exists():
+            if BlockedCustomer.objects.filter(email_normalized=normalize_email(email)).exists():
                 messages.error(request, 'Unable to process your order.')
                 return redirect('orders:checkout')
-            
-            order = form.save(commit=False)
-            order.user = request.user if request.user.is_authenticated else None
-            order.subtotal = subtotal
-            order.discount_amount = promo_discount
-            order.total = total
-            order.promo_code = promo_code_obj
-            order.status = 'pending'
-            order.save()
-
-            for item in cart:
-                OrderItem.objects.create(
-                    order=order,
-                    menu_item=MenuItem.objects.filter(id=item['item_id']).first(),
-                    name=item['name'] + (f" + {item['addon_name']}" if item['addon_name'] else ''),
-                    price=item['price'],
-                    quantity=item['quantity'],
-                    item_total=item['total'],
-                )
 
-            request.session['pending_order_id'] = order.pk
-
-            try:
-                checkout_session = stripe.checkout.Session.create(
-                    payment_method_types=['card'],
-                    line_items=[{
-                        'price_data': {
-                            'currency': 'usd',
-                            'product_data': {
-                                'name': f'Warm Vibe Bistro — Order #{str(order.order_number)[:8].upper()}',
-                                'description': f'Pickup at {order.pickup_time.strftime("%b %d, %Y %I:%M %p")}',
+            # ── Pickup slot capacity — the atomic claim, the form only pre-checked ──
+            order = None
+            if not reserve(form.cleaned_data['pickup_time'], items_count):
+                form.add_error('pickup_time', 'That pickup slot just filled up. Please choose another time.')
+            else:
+                order = form.save(commit=False)
+                order.user = request.user if request.user.is_authenticated else None
+                order.subtotal = subtotal
+                order.discount_amount = promo_discount
+                order.total = total
+                order.promo_code = promo_code_obj
+                order.status = 'pending'
+
+                quantities = {}
+                for item in cart:
+                    quantities[item['item_id']] = quantities.get(item['item_id'], 0) + item['quantity']
+                existing = set(MenuItem.objects.filter(pk__in=quantities).values_list('pk', flat=True))
+                try:
+                    with transaction.atomic():
+                        order.save()
+                        OrderItem.objects.bulk_create([
+                            OrderItem(
+                                order=order,
+                                menu_item_id=item['item_id'] if item['item_id'] in existing else None,
+                                name=_line_name(item),
+                                price=item['price'],
+                                addon_price=item['addon_price'],
+                                quantity=item['quantity'],
+                                item_total=item['total'],
+                            )
+                            for item in cart
+                        ])
+                        # ── Stock — claimed last, so the row locks are held only until commit ──
+                        take(quantities)
+                except SoldOut as e:
+                    release(form.cleaned_data['pickup_time'], items_count)
+                    form.add_error(None, f"{e}. Please remove {'it' if len(e.names) == 1 else 'them'} from your cart.")
+                    order = None
+
+            if order is not None:
+                publish_order_event('order_created', order)
+                request.session['pending_order_id'] = order.pk
+
+                try:
+                    checkout_session = stripe.checkout.Session.create(
+                        payment_method_types=['card'],
+                        line_items=[{
+                            'price_data': {
+                                'currency': 'usd',
+                                'product_data': {
+                                    'name': f'Warm Vibe Bistro — Order #{str(order.order_number)[:8].upper()}',
+                                    'description': f'Pickup at {order.pickup_time.strftime("%b %d, %Y %I:%M %p")}',
+                                },
+                                'unit_amount': int(total * 100),
                             },
-                            'unit_amount': int(total * 100),
-                        },
-                        'quantity': 1,
-                    }],
-                    mode='payment',
-                    customer_email=order.email,
-                    success_url=request.build_absolute_uri('/orders/payment/success/'),
-                    cancel_url=request.build_absolute_uri('/orders/payment/cancel/'),
-                    metadata={'order_id': str(order.pk)},
-                )
-                return redirect(checkout_session.url, code=303)
-
-            except stripe.error.StripeError as e:
-                order.delete()
-                messages.error(request, f'Payment error: {str(e)}. Please try again.')
+                            'quantity': 1,
+                        }],
+                        mode='payment',
+                        customer_email=order.email,
+                        # Unpaid orders hold a pickup slot — let the session lapse with the hold. Stripe
+                        # wants 30+ minutes by its own clock; the spare minute covers latency and skew.
+                        expires_at=int(time.time()) + max(settings.PICKUP_PENDING_HOLD_MINUTES, 31) * 60,
+                        success_url=request.build_absolute_uri('/orders/payment/success/'),
+                        cancel_url=request.build_absolute_uri('/orders/payment/cancel/'),
+                        metadata={'order_id': str(order.pk)},
+                    )
+                    return redirect(checkout_session.url, code=303)
+
+                except stripe.error.StripeError as e:
+                    publish_order_removed(order.pk)
+                    release(order.pickup_time, items_count)
+                    restore_stock([order])
+                    order.delete()
+                    messages.error(request, f'Payment error: {str(e)}. Please try again.')
 
     else:
         initial = {}
@@ -231,20 +286,19 @@ def payment_success(request):
     except Order.DoesNotExist:
         return redirect('orders:cart')
 
-    # Confirm the order
-    order.status = 'confirmed'
-    order.save()
+    # Confirm the order — the webhook may already have done it
+    if transition(order, 'confirmed', ['pending']):
+        # Update promo usage
+        if order.promo_code:
+            order.promo_code.times_used += 1
+            order.promo_code.save()
 
-    # Update promo usage
-    if order.promo_code:
-        order.promo_code.times_used += 1
-        order.promo_code.save()
-        if 'promo_code' in request.session:
-            del request.session['promo_code']
+        # Send both emails
+        send_customer_confirmation(order)
+        send_restaurant_notification(order)
 
-    # Send both emails
-    send_customer_confirmation(order)
-    send_restaurant_notification(order)
+    if 'promo_code' in request.session:
+        del request.session['promo_code']
 
     # Clear cart and session
     cart = Cart(request)
@@ -263,7 +317,11 @@ def payment_cancel(request):
     order_id = request.session.get('pending_order_id')
     if order_id:
         try:
-            Order.objects.get(pk=order_id, status='pending').delete()
+            order = Order.objects.get(pk=order_id, status='pending')
+            release(order.pickup_time, order.items.aggregate(total=Sum('quantity'))['total'] or 0)
+            restore_stock([order])
+            order.delete()
+            publish_order_removed(order_id)
         except Order.DoesNotExist:
             pass
         del request.session['pending_order_id']
@@ -293,14 +351,19 @@ def stripe_webhook(request):
         if order_id:
             try:
                 order = Order.objects.get(pk=order_id)
-                if order.status == 'pending':
-                    order.status = 'confirmed'
-                    order.save()
+                if transition(order, 'confirmed', ['pending']):
                     send_customer_confirmation(order)
                     send_restaurant_notification(order)
             except Order.DoesNotExist:
                 pass
 
+    elif event['type'] == 'checkout.session.expired':
+        # Never paid — cancel the order so its pickup slot frees up
+        order_id = event['data']['object'].get('metadata', {}).get('order_id')
+        order = Order.objects.filter(pk=order_id, status='pending').first() if order_id else None
+        if order:
+            transition(order, 'cancelled', ['pending'])
+
     return HttpResponse(status=200)
 
 
@@ -316,7 +379,7 @@ def order_history(request):
 
     if email_query:
         orders = Order.objects.filter(
-            email__iexact=email_query,
+            email_normalized=normalize_email(email_query),
             status__in=['confirmed', 'preparing', 'ready', 'completed']
         ).prefetch_related('items').order_by('-id')
         looked_up = True
@@ -346,4 +409,31 @@ def cart_count(request):
         'count': cart.get_total_items(),
         'subtotal': str(cart.get_subtotal()),
         'cart_items': cart_items,
-    })
\ No newline at end of file
+        'suggestions': paired_with([item['item_id'] for item in cart]),
+    })
+
+def pickup_slots(request):
+    """Pickup slots for one day and whether each can still take an order."""
+    try:
+        day = datetime.strptime(request.GET.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        day = timezone.localdate()
+
+    starts = day_slots(day)
+    counts = slot_counts(starts) if starts else {}
+    items = Cart(request).get_total_items()
+    now = timezone.now()
+
+    return JsonResponse({
+        'date': day.isoformat(),
+        'slot_minutes': slot_minutes(),
+        'slots': [
+            {
+                'value': start.strftime('%Y-%m-%dT%H:%M'),
+                'label': start.strftime('%I:%M %p').lstrip('0'),
+                'full': is_full(*counts[start], items),
+                'past': start + timedelta(minutes=slot_minutes()) <= now,
+            }
+            for start in starts
+        ],
+    })
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Reservation
+from .models import Reservation, SeatingCapacity, Table, TurnTime, WaitlistEntry
 
 
 @admin.register(Reservation)
@@ -9,4 +9,33 @@ class ReservationAdmin(admin.ModelAdmin):
     list_editable = ('status',)
     search_fields = ('name', 'email', 'phone')
     ordering = ('-date', '-time')
-    readonly_fields = ('created_at', 'updated_at')
\ No newline at end of file
+    readonly_fields = ('created_at', 'updated_at')
+    filter_horizontal = ('tables',)
+
+
+@admin.register(SeatingCapacity)
+class SeatingCapacityAdmin(admin.ModelAdmin):
+    list_display = ('weekday', 'name', 'first_seating', 'last_seating', 'covers')
+    list_editable = ('covers',)
+    list_filter = ('weekday',)
+
+
+@admin.register(TurnTime)
+class TurnTimeAdmin(admin.ModelAdmin):
+    list_display = ('max_party_size', 'minutes')
+    list_editable = ('minutes',)
+
+
+@admin.register(Table)
+class TableAdmin(admin.ModelAdmin):
+    list_display = ('name', 'seats', 'combine_group', 'is_active')
+    list_editable = ('seats', 'combine_group', 'is_active')
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'date', 'earliest_time', 'latest_time', 'party_size', 'status', 'offered_time', 'created_at')
+    list_filter = ('status', 'date')
+    search_fields = ('name', 'email', 'phone')
+    readonly_fields = ('token', 'offered_at', 'reservation', 'created_at')
+
@@ -0,0 +1,153 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Reservation, SeatingCapacity, TurnTime
+
+
+# Statuses that hold seats — pending bookings keep theirs until rejected
+HOLDING_STATUSES = ['pending', 'confirmed']
+VERSION_KEY = 'reservations:availability-version'
+GRID_TIMEOUT = 60 * 60 * 24
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _as_time(minutes):
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+def _grid_key(day):
+    return f'reservations:grid:{cache.get(VERSION_KEY, 0)}:{day.isoformat()}'
+
+
+def invalidate_day(day):
+    """Drop the cached grid for one date after a booking on it changed."""
+    cache.delete(_grid_key(day))
+
+
+def invalidate_all():
+    """Capacity or turn times changed — every cached grid is stale."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def turn_minutes(party_size, turns):
+    """Minutes a party of this size holds its table, from (max_party_size, minutes) rows."""
+    for max_party_size, minutes in turns:
+        if party_size <= max_party_size:
+            return minutes
+    return turns[-1][1] if turns else settings.RESERVATION_DEFAULT_TURN_MINUTES
+
+
+def _build_grid(day):
+    """Seats taken at every slot of every service on `day`, from one reservations query."""
+    step = settings.RESERVATION_SLOT_MINUTES
+    turns = list(TurnTime.objects.values_list('max_party_size', 'minutes'))
+    longest = max([minutes for _, minutes in turns] + [settings.RESERVATION_DEFAULT_TURN_MINUTES])
+
+    # (start, end, guests) for every booking still holding seats that day
+    bookings = [
+        (_minutes(time), _minutes(time) + turn_minutes(guests, turns), guests)
+        for time, guests in Reservation.objects.filter(
+            date=day, status__in=HOLDING_STATUSES,
+        ).values_list('time', 'number_of_guests')
+    ]
+
+    services = []
+    for service in SeatingCapacity.objects.filter(weekday=day.weekday()):
+        first, last = _minutes(service.first_seating), _minutes(service.last_seating)
+        # Sample until the latest seating could still be at the table
+        points = list(range(first, last + longest, step))
+        booked = [
+            sum(guests for start, end, guests in bookings if start <= point < end)
+            for point in points
+        ]
+        services.append({
+            'name': service.name,
+            'covers': service.covers,
+            'points': points,
+            'booked': booked,
+            'last_seating': last,
+        })
+    return {'services': services, 'turns': turns, 'step': step}
+
+
+def day_grid(day):
+    """Cached slot grid for one date."""
+    key = _grid_key(day)
+    grid = cache.get(key)
+    if grid is None:
+        grid = _build_grid(day)
+        cache.set(key, grid, GRID_TIMEOUT)
+    return grid
+
+
+def _fits(grid, service, index, party_size):
+    span = -(-turn_minutes(party_size, grid['turns']) // grid['step'])  # ceil
+    window = service['booked'][index:index + span]
+    return max(window) + party_size <= service['covers']
+
+
+def _bookable_slots(day, fresh=False):
+    """(service, index) for every seating time on `day` that is not already past."""
+    grid = _build_grid(day) if fresh else day_grid(day)
+    now = timezone.localtime()
+    cutoff = _minutes(now) if day == now.date() else -1
+    for service in grid['services']:
+        for index, point in enumerate(service['points']):
+            if point > service['last_seating']:
+                break
+            if point > cutoff:
+                yield grid, service, index
+
+
+def free_covers(day):
+    """Seats still free at each seating time on `day`."""
+    return [
+        {
+            'time': _as_time(service['points'][index]),
+            'service': service['name'],
+            'free': max(service['covers'] - service['booked'][index], 0),
+        }
+        for grid, service, index in _bookable_slots(day)
+    ]
+
+
+def bookable_times(day, party_size, fresh=False):
+    """Seating times on `day` where a party of this size fits for its whole turn."""
+    return [
+        _as_time(service['points'][index])
+        for grid, service, index in _bookable_slots(day, fresh)
+        if _fits(grid, service, index, party_size)
+    ]
+
+
+def requestable_times(day, party_size):
+    """
+    Seating times a booking request may ask for.
+
+    Where the party fits, as bookable_times — or any seating of a service
+    that never seats that many at once, left pending for staff to arrange.
+    """
+    return [
+        _as_time(service['points'][index])
+        for grid, service, index in _bookable_slots(day)
+        if party_size > service['covers'] or _fits(grid, service, index, party_size)
+    ]
+
+
+def lock_day(day):
+    """Row-lock `day`'s services until the transaction ends, so seat checks and inserts can't interleave."""
+    list(SeatingCapacity.objects.select_for_update().filter(weekday=day.weekday()))
+
+
+def can_seat(day, time, party_size, fresh=False):
+    """Is there room for this party at exactly this seating time? `fresh` skips the cached grid."""
+    return time.replace(second=0, microsecond=0) in bookable_times(day, party_size, fresh)
@@ -0,0 +1,90 @@
+import datetime
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractHour, ExtractMinute, Floor
+
+from .availability import HOLDING_STATUSES
+from .models import Reservation
+
+
+BUCKET_MINUTES = 30
+VERSION_KEY = 'reservations:calendar-version'
+CACHE_TIMEOUT = 60 * 60  # every booking save bumps the version; this is only a backstop
+
+
+def _grouped_rows(start, end):
+    """Bookings and covers per date per bucket, in one grouped query on the (date, time, …) index."""
+    return (
+        Reservation.objects
+        .filter(date__range=(start, end), status__in=HOLDING_STATUSES)
+        .annotate(hour=ExtractHour('time'), bucket=Floor(ExtractMinute('time') / BUCKET_MINUTES))
+        .values('date', 'hour', 'bucket')
+        .annotate(
+            bookings=Count('id'),
+            covers=Sum('number_of_guests'),
+            pending=Count('id', filter=Q(status='pending')),
+        )
+        .order_by('date', 'hour', 'bucket')
+    )
+
+
+def _label(minute):
+    hour = minute // 60
+    return f"{(hour - 1) % 12 + 1}:{minute % 60:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def build_calendar(start, end):
+    """
+    Load grid for start..end inclusive: one row per bucket that has bookings,
+    one cell per day, plus per-day totals.
+    """
+    days = [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+    cells = {}
+    for row in _grouped_rows(start, end):
+        minute = row['hour'] * 60 + int(row['bucket']) * BUCKET_MINUTES
+        cells[(row['date'], minute)] = {
+            'bookings': row['bookings'],
+            'covers': row['covers'],
+            'pending': row['pending'],
+        }
+
+    peak = max((cell['covers'] for cell in cells.values()), default=0)
+    totals = {day: {'date': day, 'bookings': 0, 'covers': 0, 'pending': 0} for day in days}
+    for (day, _), cell in cells.items():
+        cell['level'] = -(-cell['covers'] * 4 // peak)  # 1-4, for shading
+        for field in ('bookings', 'covers', 'pending'):
+            totals[day][field] += cell[field]
+
+    return {
+        'start': start,
+        'end': end,
+        'days': list(totals.values()),
+        'rows': [
+            {
+                'minute': minute,
+                'label': _label(minute),
+                'cells': [cells.get((day, minute)) for day in days],
+            }
+            for minute in sorted({minute for _, minute in cells})
+        ],
+        'peak': peak,
+    }
+
+
+def calendar(start, end):
+    """Cached load grid for a date range."""
+    key = f'reservations:calendar:{cache.get(VERSION_KEY, 0)}:{start.isoformat()}:{end.isoformat()}'
+    data = cache.get(key)
+    if data is None:
+        data = build_calendar(start, end)
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_calendar():
+    """A booking changed — every cached range may include it."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
@@ -0,0 +1,69 @@
+from django.core.mail import EmailMultiAlternatives
+from django.conf import settings
+from django.urls import reverse
+from django.utils.html import escape
+import datetime
+import os
+import threading
+
+
+def _open_template(filename):
+    """Read an email HTML template from the reservations/email_templates directory."""
+    template_dir = os.path.join(os.path.dirname(__file__), 'email_templates')
+    path = os.path.join(template_dir, filename)
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def send_waitlist_offer(entry):
+    """Tell a waitlisted guest a table opened up — non-blocking."""
+
+    # Pre-fetch all data before threading
+    offered_time = datetime.datetime.combine(entry.date, entry.offered_time).strftime('%B %d, %Y at %I:%M %p')
+    claim_url = settings.SITE_URL.rstrip('/') + reverse('reservations:waitlist_claim', args=[entry.token])
+    guest_name = entry.name
+    guest_email = entry.email
+    party_size = str(entry.party_size)
+    hold_minutes = str(settings.WAITLIST_OFFER_MINUTES)
+
+    subject = f'A table opened up — {offered_time} | Warm Vibe Bistro'
+
+    plain_text = f"""
+Hi {guest_name},
+
+A cancellation freed a table for your party of {party_size}:
+
+{offered_time}
+
+Book it here: {claim_url}
+
+It goes to whoever books it first, and the offer lapses after {hold_minutes} minutes.
+If it's gone, you stay on the waitlist.
+
+Warm Vibe Bistro
+123 Bistro Lane, Makati City, Metro Manila
+    """.strip()
+
+    html = _open_template('waitlist_offer.html')
+    html = html.replace('{{ name }}', escape(guest_name))
+    html = html.replace('{{ party_size }}', party_size)
+    html = html.replace('{{ offered_time }}', offered_time)
+    html = html.replace('{{ claim_url }}', claim_url)
+    html = html.replace('{{ hold_minutes }}', hold_minutes)
+
+    def _send():
+        try:
+            msg = EmailMultiAlternatives(
+                subject=subject,
+                body=plain_text,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[guest_email],
+            )
+            msg.attach_alternative(html, 'text/html')
+            msg.send(fail_silently=True)
+        except Exception:
+            pass  # Never crash the cancellation flow due to email failure
+
+    thread = threading.Thread(target=_send)
+    thread.daemon = True
+    thread.start()
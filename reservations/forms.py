@@ -1,5 +1,6 @@
 from django import forms
-from .models import Reservation
+from .availability import requestable_times
+from .models import Reservation, WaitlistEntry
 import datetime
 
 
@@ -43,4 +44,59 @@ class ReservationForm(forms.ModelForm):
             raise forms.ValidationError("Must have at least 1 guest.")
         if guests and guests > 50:
             raise forms.ValidationError("For groups over 50 please call us directly.")
-        return guests
\ No newline at end of file
+        return guests
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date = cleaned_data.get('date')
+        time = cleaned_data.get('time')
+        guests = cleaned_data.get('number_of_guests')
+        if date and time and guests and time.replace(second=0) not in requestable_times(date, guests):
+            self.add_error('time', "That time is fully booked for your party size. Please choose another.")
+        return cleaned_data
+
+
+class WaitlistForm(forms.ModelForm):
+    date = forms.DateField(
+        widget=forms.DateInput(attrs={'type': 'date', 'min': str(datetime.date.today())}),
+        label="Date"
+    )
+    earliest_time = forms.TimeField(widget=forms.TimeInput(attrs={'type': 'time'}), label="Earliest")
+    latest_time = forms.TimeField(widget=forms.TimeInput(attrs={'type': 'time'}), label="Latest")
+
+    class Meta:
+        model = WaitlistEntry
+        fields = ['name', 'email', 'phone', 'date', 'earliest_time', 'latest_time', 'party_size']
+        labels = {
+            'name': 'Full Name',
+            'email': 'Email Address',
+            'phone': 'Phone Number',
+            'party_size': 'Number of Guests',
+        }
+        widgets = {
+            'name': forms.TextInput(attrs={'placeholder': 'Juan dela Cruz'}),
+            'email': forms.EmailInput(attrs={'placeholder': 'you@example.com'}),
+            'phone': forms.TextInput(attrs={'placeholder': '+63 912 345 6789'}),
+            'party_size': forms.NumberInput(attrs={'min': 1, 'max': 50}),
+        }
+
+    def clean_date(self):
+        date = self.cleaned_data.get('date')
+        if date and date < datetime.date.today():
+            raise forms.ValidationError("Date cannot be in the past.")
+        return date
+
+    def clean_party_size(self):
+        guests = self.cleaned_data.get('party_size')
+        if guests is not None and not 1 <= guests <= 50:
+            raise forms.ValidationError("Party size must be between 1 and 50.")
+        return guests
+
+    def clean(self):
+        cleaned_data = super().clean()
+        earliest = cleaned_data.get('earliest_time')
+        latest = cleaned_data.get('latest_time')
+        if earliest and latest and earliest > latest:
+            self.add_error('latest_time', "Latest time must be after the earliest time.")
+        return cleaned_data
+
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from reservations.waitlist import expire_offers
+
+
+class Command(BaseCommand):
+    help = 'Lapse waitlist offers nobody claimed in time and offer their seats onward (run every few minutes)'
+
+    def handle(self, *args, **kwargs):
+        count = expire_offers()
+        self.stdout.write(self.style.SUCCESS(f'Expired {count} waitlist offer(s).'))
@@ -0,0 +1,75 @@
+# Generated by Django 6.0.2 on 2026-10-19 07:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from restaurant_site.search import build_search_document, document_tokens
+
+
+def backfill_search(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    ReservationSearchToken = apps.get_model('reservations', 'ReservationSearchToken')
+    use_tokens = schema_editor.connection.vendor != 'postgresql'
+
+    batch = []
+    for obj in Reservation.objects.only('name', 'email', 'phone').iterator(chunk_size=2000):
+        obj.search_document = build_search_document(obj.name, obj.email, obj.phone)
+        batch.append(obj)
+        if len(batch) == 2000:
+            _flush(batch, Reservation, ReservationSearchToken, use_tokens)
+            batch = []
+    _flush(batch, Reservation, ReservationSearchToken, use_tokens)
+
+
+def _flush(batch, Reservation, ReservationSearchToken, use_tokens):
+    Reservation.objects.bulk_update(batch, ['search_document'])
+    if use_tokens:
+        ReservationSearchToken.objects.bulk_create([
+            ReservationSearchToken(reservation_id=obj.pk, token=token[:254])
+            for obj in batch
+            for token in document_tokens(obj.search_document)
+        ])
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS reservations_reservation_search_trgm '
+        'ON reservations_reservation USING gin (search_document gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS reservations_reservation_search_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0003_reservation_staff_note'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ReservationSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=254)),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='reservations.reservation')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'reservation'], name='reservation_token_34e8f4_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_search, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
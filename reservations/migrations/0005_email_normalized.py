@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-19 08:05
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+def backfill_email_normalized(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    Reservation.objects.update(email_normalized=Lower(Trim('email')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0004_reservation_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='email_normalized',
+            field=models.EmailField(db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.RunPython(backfill_email_normalized, migrations.RunPython.noop),
+    ]
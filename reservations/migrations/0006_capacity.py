@@ -0,0 +1,68 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:02
+
+import datetime
+
+from django.db import migrations, models
+
+
+# Matches the lunch and dinner times the booking form offered before capacity existed
+DEFAULT_SERVICES = [
+    ('Lunch', datetime.time(11, 0), datetime.time(14, 30)),
+    ('Dinner', datetime.time(17, 0), datetime.time(21, 0)),
+]
+DEFAULT_COVERS = 40
+DEFAULT_TURNS = [(2, 75), (4, 90), (6, 120), (12, 150), (50, 180)]
+
+
+def seed_capacity(apps, schema_editor):
+    SeatingCapacity = apps.get_model('reservations', 'SeatingCapacity')
+    TurnTime = apps.get_model('reservations', 'TurnTime')
+    SeatingCapacity.objects.bulk_create([
+        SeatingCapacity(weekday=weekday, name=name, first_seating=first, last_seating=last, covers=DEFAULT_COVERS)
+        for weekday in range(7)
+        for name, first, last in DEFAULT_SERVICES
+    ])
+    TurnTime.objects.bulk_create([
+        TurnTime(max_party_size=size, minutes=minutes) for size, minutes in DEFAULT_TURNS
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0005_email_normalized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatingCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('name', models.CharField(blank=True, help_text='e.g. Lunch, Dinner', max_length=50)),
+                ('first_seating', models.TimeField()),
+                ('last_seating', models.TimeField()),
+                ('covers', models.PositiveIntegerField(help_text='Guests seated at the same time')),
+            ],
+            options={
+                'verbose_name_plural': 'seating capacities',
+                'ordering': ['weekday', 'first_seating'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TurnTime',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('max_party_size', models.PositiveIntegerField(unique=True)),
+                ('minutes', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ['max_party_size'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['date', 'time', 'number_of_guests', 'status'], name='reservation_availability_idx'),
+        ),
+        migrations.RunPython(seed_capacity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0006_capacity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Table',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=20, unique=True)),
+                ('seats', models.PositiveIntegerField()),
+                ('combine_group', models.CharField(blank=True, help_text='Tables with the same group can be joined', max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='tables',
+            field=models.ManyToManyField(blank=True, related_name='reservations', to='reservations.table'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-19 15:20
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0007_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(max_length=20)),
+                ('date', models.DateField()),
+                ('earliest_time', models.TimeField()),
+                ('latest_time', models.TimeField()),
+                ('party_size', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('offered', 'Offered'), ('booked', 'Booked'), ('cancelled', 'Cancelled')], default='waiting', max_length=20)),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('offered_time', models.TimeField(blank=True, null=True)),
+                ('offered_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reservation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='reservations.reservation')),
+            ],
+            options={
+                'verbose_name_plural': 'waitlist entries',
+                'ordering': ['date', 'created_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'waiting')), fields=['date', 'party_size'], name='waitlist_match_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 21:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0008_waitlist'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='waitlistentry',
+            name='status',
+            field=models.CharField(choices=[('waiting', 'Waiting'), ('offered', 'Offered'), ('expired', 'Offer expired'), ('booked', 'Booked'), ('cancelled', 'Cancelled')], default='waiting', max_length=20),
+        ),
+    ]
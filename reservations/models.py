@@ -1,4 +1,66 @@
-from django.db import models
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from restaurant_site.search import build_search_document, normalize_email, sync_search_tokens
+
+
+class SeatingCapacity(models.Model):
+    """Covers the dining room can seat at once during one service on one weekday."""
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'),
+        (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday'),
+    ]
+
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    name = models.CharField(max_length=50, blank=True, help_text="e.g. Lunch, Dinner")
+    first_seating = models.TimeField()
+    last_seating = models.TimeField()
+    covers = models.PositiveIntegerField(help_text="Guests seated at the same time")
+
+    class Meta:
+        ordering = ['weekday', 'first_seating']
+        verbose_name_plural = 'seating capacities'
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.name or ''} {self.first_seating:%H:%M}–{self.last_seating:%H:%M} ({self.covers} covers)"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .availability import invalidate_all
+        invalidate_all()
+
+
+class TurnTime(models.Model):
+    """How long a table is held for parties up to a given size."""
+    max_party_size = models.PositiveIntegerField(unique=True)
+    minutes = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['max_party_size']
+
+    def __str__(self):
+        return f"Up to {self.max_party_size} guests — {self.minutes} min"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .availability import invalidate_all
+        invalidate_all()
+
+
+class Table(models.Model):
+    """A dining table. Tables sharing a combine group can be pushed together for big parties."""
+    name = models.CharField(max_length=20, unique=True)
+    seats = models.PositiveIntegerField()
+    combine_group = models.CharField(max_length=20, blank=True, help_text="Tables with the same group can be joined")
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} ({self.seats} seats)"
 
 
 class Reservation(models.Model):
@@ -21,6 +83,7 @@ class Reservation(models.Model):
     # Customer Info
     name = models.CharField(max_length=150)
     email = models.EmailField()
+    email_normalized = models.EmailField(db_index=True, editable=False, default='')
     phone = models.CharField(max_length=20)
 
     # Booking Info
@@ -29,6 +92,7 @@ class Reservation(models.Model):
     number_of_guests = models.PositiveIntegerField()
     special_request = models.TextField(blank=True)
     occasion = models.CharField(max_length=20, choices=OCCASION_CHOICES, blank=True)
+    tables = models.ManyToManyField(Table, blank=True, related_name='reservations')
 
     # System Fields
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
@@ -37,18 +101,133 @@ class Reservation(models.Model):
 
     class Meta:
         ordering = ['-date', '-time']
+        indexes = [
+            models.Index(fields=['date', 'time', 'number_of_guests', 'status'], name='reservation_availability_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} — {self.date} {self.time} ({self.number_of_guests} guests)"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so saves can tell what moved
+        instance._loaded = instance._booking_key()
+        return instance
+
+    def _booking_key(self):
+        return (
+            getattr(self, 'date', None), getattr(self, 'time', None),
+            getattr(self, 'number_of_guests', None), getattr(self, 'status', None),
+        )
+
     def save(self, *args, **kwargs):
-        # Auto-confirm small groups (1-4), pending for large groups (5+)
-        if not self.pk:  # only on creation
-            if self.number_of_guests <= 4:
-                self.status = 'confirmed'
-            else:
-                self.status = 'pending'
+        from .availability import can_seat, lock_day
+        if self.pk:
+            return self._save(*args, **kwargs)
+        # Auto-confirm small groups when there is room, pending otherwise
+        with transaction.atomic():
+            small = self.number_of_guests <= settings.RESERVATION_AUTO_CONFIRM_MAX_PARTY
+            if small:
+                lock_day(self.date)  # two bookings can't both take the last seats
+            confirm = small and can_seat(self.date, self.time, self.number_of_guests, fresh=True)
+            self.status = 'confirmed' if confirm else 'pending'
+            self._save(*args, **kwargs)
+
+    def _save(self, *args, **kwargs):
+        from .availability import invalidate_day
+        from .calendar import invalidate_calendar
+        self.email_normalized = normalize_email(self.email)
+        document = build_search_document(self.name, self.email, self.phone)
+        reindex = document != self.search_document or self._state.adding
+        self.search_document = document
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and reindex:
+            kwargs['update_fields'] = {*update_fields, 'search_document', 'email_normalized'}
         super().save(*args, **kwargs)
+        if reindex:
+            sync_search_tokens(self)
+        loaded = getattr(self, '_loaded', None)
+        invalidate_day(self.date)
+        invalidate_calendar()
+        if loaded and loaded[0] and loaded[0] != self.date:
+            invalidate_day(loaded[0])
+        if loaded != self._booking_key():
+            from .tables import sync_assignment
+            sync_assignment(self, was_confirmed=bool(loaded) and loaded[3] == 'confirmed')
+        if loaded and loaded[3] in ('pending', 'confirmed') and self.status == 'cancelled':
+            # Seats just came free — offer them to the waitlist once the cancel commits
+            from .waitlist import offer_freed_seats
+            transaction.on_commit(lambda: offer_freed_seats(self))
+        self._loaded = self._booking_key()
+
+    def delete(self, *args, **kwargs):
+        from .availability import invalidate_day
+        from .calendar import invalidate_calendar
+        result = super().delete(*args, **kwargs)
+        invalidate_day(self.date)
+        invalidate_calendar()
+        return result
     
     staff_note = models.TextField(blank=True, default='')
 
+    # Search — lowercased name, email and phone digits
+    search_document = models.TextField(blank=True, editable=False)
+
+
+class ReservationSearchToken(models.Model):
+    """Token table backing dashboard search where pg_trgm is unavailable."""
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=254)
+
+    class Meta:
+        indexes = [models.Index(fields=['token', 'reservation'])]
+
+    def __str__(self):
+        return self.token
+
+
+class WaitlistEntry(models.Model):
+    """A guest waiting for seats on a fully booked date, offered the first that fit."""
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('offered', 'Offered'),
+        ('expired', 'Offer expired'),
+        ('booked', 'Booked'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    name = models.CharField(max_length=100)
+    email = models.EmailField()
+    phone = models.CharField(max_length=20)
+    date = models.DateField()
+    earliest_time = models.TimeField()
+    latest_time = models.TimeField()
+    party_size = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    offered_time = models.TimeField(null=True, blank=True)
+    offered_at = models.DateTimeField(null=True, blank=True)
+    reservation = models.ForeignKey(Reservation, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['date', 'created_at']
+        verbose_name_plural = 'waitlist entries'
+        indexes = [
+            # Only waiting entries are ever matched, so the index stays small
+            models.Index(
+                fields=['date', 'party_size'], name='waitlist_match_idx',
+                condition=models.Q(status='waiting'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} — {self.date} {self.earliest_time:%H:%M}–{self.latest_time:%H:%M} ({self.party_size} guests)"
+
+    @property
+    def offer_expires_at(self):
+        if self.offered_at is None:
+            return None
+        return self.offered_at + timedelta(minutes=settings.WAITLIST_OFFER_MINUTES)
+
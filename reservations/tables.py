@@ -0,0 +1,152 @@
+import bisect
+from collections import defaultdict
+
+from django.db import transaction
+
+from .availability import turn_minutes
+from .models import Reservation, Table, TurnTime
+
+
+Assignment = Reservation.tables.through
+
+
+class Floor:
+    """Busy intervals per table for one night, kept sorted for bisect lookups."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.busy = {table.id: [] for table in tables}
+
+    def is_free(self, table_id, start, end):
+        intervals = self.busy[table_id]
+        # Bookings on one table never overlap, so only the one just before `end` can clash
+        i = bisect.bisect_left(intervals, (end,))
+        return i == 0 or intervals[i - 1][1] <= start
+
+    def idle_before(self, table_id, start):
+        """Minutes the table sits empty before `start` — smaller packs the night tighter."""
+        intervals = self.busy[table_id]
+        i = bisect.bisect_left(intervals, (start,))
+        return start - intervals[i - 1][1] if i else start
+
+    def book(self, table_ids, start, end):
+        for table_id in table_ids:
+            bisect.insort(self.busy[table_id], (start, end))
+
+    def place(self, party_size, start, end):
+        """Best-fit table(s) for a party over [start, end), or None."""
+        free = [table for table in self.tables if self.is_free(table.id, start, end)]
+
+        # One table: fewest empty seats, then the one idle for the shortest time
+        singles = [table for table in free if table.seats >= party_size]
+        if singles:
+            best = min(singles, key=lambda t: (t.seats - party_size, self.idle_before(t.id, start)))
+            return [best.id]
+
+        # Joined tables: per combine group, largest first until the party fits
+        best = None
+        groups = defaultdict(list)
+        for table in free:
+            if table.combine_group:
+                groups[table.combine_group].append(table)
+        for group in groups.values():
+            group.sort(key=lambda t: -t.seats)
+            picked, seats = [], 0
+            for table in group:
+                if seats >= party_size:
+                    break
+                picked.append(table)
+                seats += table.seats
+            if seats < party_size:
+                continue
+            # Swap the last table for the smallest one that still covers the party
+            rest = seats - picked[-1].seats
+            spare = [t for t in group if t not in picked and rest + t.seats >= party_size]
+            if spare:
+                smallest = min(spare, key=lambda t: t.seats)
+                if smallest.seats < picked[-1].seats:
+                    picked[-1] = smallest
+            total = sum(t.seats for t in picked)
+            if best is None or (total, len(picked)) < (sum(t.seats for t in best), len(best)):
+                best = picked
+        return [table.id for table in best] if best else None
+
+
+def _window(time, party_size, turns):
+    start = time.hour * 60 + time.minute
+    return start, start + turn_minutes(party_size, turns)
+
+
+def _tables():
+    return list(Table.objects.filter(is_active=True))
+
+
+def assign_night(day):
+    """
+    Re-pack every confirmed booking on `day` from scratch.
+
+    Bookings are taken in start-time order (biggest party first on ties) and each
+    goes to its best-fit table, so the whole night is O(bookings x tables).
+    Returns the ids of bookings that could not be seated.
+    """
+    tables = _tables()
+    turns = list(TurnTime.objects.values_list('max_party_size', 'minutes'))
+    bookings = list(
+        Reservation.objects.filter(date=day, status='confirmed')
+        .order_by('time', '-number_of_guests', 'id')
+        .values_list('id', 'time', 'number_of_guests')
+    )
+
+    floor = Floor(tables)
+    rows, unassigned = [], []
+    for reservation_id, time, guests in bookings:
+        start, end = _window(time, guests, turns)
+        placed = floor.place(guests, start, end) if tables else None
+        if placed is None:
+            unassigned.append(reservation_id)
+            continue
+        floor.book(placed, start, end)
+        rows.extend(Assignment(reservation_id=reservation_id, table_id=table_id) for table_id in placed)
+
+    with transaction.atomic():
+        Assignment.objects.filter(reservation__date=day).delete()
+        Assignment.objects.bulk_create(rows)
+    return unassigned
+
+
+def assign_one(reservation):
+    """Fit one newly confirmed booking around the night's existing assignments."""
+    tables = _tables()
+    if not tables:
+        return False
+    turns = list(TurnTime.objects.values_list('max_party_size', 'minutes'))
+
+    floor = Floor(tables)
+    taken = defaultdict(list)
+    for reservation_id, table_id, time, guests in (
+        Assignment.objects
+        .filter(reservation__date=reservation.date, reservation__status='confirmed', table__is_active=True)
+        .exclude(reservation_id=reservation.pk)
+        .values_list('reservation_id', 'table_id', 'reservation__time', 'reservation__number_of_guests')
+    ):
+        taken[(reservation_id, time, guests)].append(table_id)
+    for (reservation_id, time, guests), table_ids in taken.items():
+        floor.book(table_ids, *_window(time, guests, turns))
+
+    start, end = _window(reservation.time, reservation.number_of_guests, turns)
+    placed = floor.place(reservation.number_of_guests, start, end)
+    if placed is None:
+        # No gap left around the current plan — re-pack the whole night
+        return reservation.pk not in assign_night(reservation.date)
+    Assignment.objects.bulk_create([
+        Assignment(reservation_id=reservation.pk, table_id=table_id) for table_id in placed
+    ])
+    return True
+
+
+def sync_assignment(reservation, was_confirmed):
+    """Keep table assignments in step after a booking was added, moved or cancelled."""
+    if was_confirmed:
+        reservation.tables.clear()
+    if reservation.status == 'confirmed':
+        assign_one(reservation)
@@ -1,3 +1,232 @@
+import datetime
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .availability import bookable_times, free_covers
+from .forms import ReservationForm
+from .models import Reservation, SeatingCapacity, Table, TurnTime, WaitlistEntry
+from .tables import assign_night
+from .waitlist import claim_offer, expire_offers
+
+
+class AvailabilityTests(TestCase):
+    """Seats are held for a party's whole turn and counted per seating time."""
+
+    def setUp(self):
+        cache.clear()
+        SeatingCapacity.objects.all().delete()
+        TurnTime.objects.all().delete()
+        self.day = datetime.date.today() + datetime.timedelta(days=7)
+        SeatingCapacity.objects.create(
+            weekday=self.day.weekday(), name='Dinner',
+            first_seating=datetime.time(18, 0), last_seating=datetime.time(20, 0), covers=10,
+        )
+        TurnTime.objects.create(max_party_size=4, minutes=60)
+        TurnTime.objects.create(max_party_size=10, minutes=120)
+
+    def _book(self, time, guests):
+        return Reservation.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            date=self.day, time=time, number_of_guests=guests,
+        )
+
+    def test_turn_time_blocks_overlapping_slots(self):
+        self._book(datetime.time(18, 0), 4)
+        self._book(datetime.time(18, 0), 4)
+        free = {slot['time']: slot['free'] for slot in free_covers(self.day)}
+        self.assertEqual(free[datetime.time(18, 0)], 2)
+        self.assertEqual(free[datetime.time(18, 30)], 2)
+        self.assertEqual(free[datetime.time(19, 0)], 10)
+        # A party of 4 at 17:30 would overlap the full 18:00 tables; 19:00 is clear
+        self.assertNotIn(datetime.time(18, 0), bookable_times(self.day, 4))
+        self.assertIn(datetime.time(19, 0), bookable_times(self.day, 4))
+
+    def test_auto_confirm_respects_capacity(self):
+        self.assertEqual(self._book(datetime.time(19, 0), 4).status, 'confirmed')
+        self.assertEqual(self._book(datetime.time(19, 0), 4).status, 'confirmed')
+        self.assertEqual(self._book(datetime.time(19, 0), 4).status, 'pending')
+
+    def test_cancelling_frees_seats(self):
+        booking = self._book(datetime.time(20, 0), 4)
+        self._book(datetime.time(20, 0), 4)
+        self.assertNotIn(datetime.time(20, 0), bookable_times(self.day, 4))
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertIn(datetime.time(20, 0), bookable_times(self.day, 4))
+
+    def test_party_over_covers_goes_to_staff(self):
+        form = ReservationForm(data={
+            'name': 'Guest', 'email': 'guest@example.com', 'phone': '0912',
+            'date': self.day.isoformat(), 'time': '18:00', 'number_of_guests': 12,
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().status, 'pending')
+
+    def test_auto_confirm_reads_past_a_stale_grid(self):
+        self.assertIn(datetime.time(19, 0), bookable_times(self.day, 4))  # grid now cached
+        Reservation.objects.bulk_create([
+            Reservation(name='Walk-in', email='w@example.com', phone='0912', date=self.day,
+                        time=datetime.time(19, 0), number_of_guests=4, status='confirmed')
+            for _ in range(2)
+        ])  # written behind the cache's back, as a concurrent request would be
+        self.assertEqual(self._book(datetime.time(19, 0), 4).status, 'pending')
+
+    def test_availability_endpoint(self):
+        self._book(datetime.time(18, 0), 10)
+        response = self.client.get(reverse('reservations:availability'), {'date': self.day.isoformat(), 'guests': 2})
+        times = {t['value']: t['available'] for t in response.json()['times']}
+        self.assertFalse(times['18:00'])
+        self.assertTrue(times['20:00'])
+
+
+class TableAssignmentTests(TestCase):
+    """Confirmed bookings land on the tightest free table, joined tables as a fallback."""
+
+    def setUp(self):
+        cache.clear()
+        SeatingCapacity.objects.all().delete()
+        TurnTime.objects.all().delete()
+        self.day = datetime.date.today() + datetime.timedelta(days=7)
+        SeatingCapacity.objects.create(
+            weekday=self.day.weekday(), name='Dinner',
+            first_seating=datetime.time(18, 0), last_seating=datetime.time(21, 0), covers=40,
+        )
+        TurnTime.objects.create(max_party_size=10, minutes=90)
+        self.two = Table.objects.create(name='T1', seats=2)
+        self.four = Table.objects.create(name='T2', seats=4, combine_group='window')
+        self.six = Table.objects.create(name='T3', seats=6, combine_group='window')
+
+    def _book(self, time, guests):
+        reservation = Reservation.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            date=self.day, time=time, number_of_guests=guests,
+        )
+        if reservation.status != 'confirmed':
+            reservation.status = 'confirmed'  # Staff approval for large parties
+            reservation.save()
+        return reservation
+
+    def _tables(self, reservation):
+        return sorted(reservation.tables.values_list('name', flat=True))
+
+    def test_best_fit_single_table(self):
+        self.assertEqual(self._tables(self._book(datetime.time(18, 0), 3)), ['T2'])
+        self.assertEqual(self._tables(self._book(datetime.time(18, 0), 2)), ['T1'])
+        # The 4-top is busy until 19:30, so the next party of 3 gets the 6-top
+        self.assertEqual(self._tables(self._book(datetime.time(19, 0), 3)), ['T3'])
+        self.assertEqual(self._tables(self._book(datetime.time(19, 30), 4)), ['T2'])
+
+    def test_large_party_joins_tables(self):
+        self.assertEqual(self._tables(self._book(datetime.time(18, 0), 9)), ['T2', 'T3'])
+
+    def test_cancel_frees_table(self):
+        first = self._book(datetime.time(18, 0), 6)
+        first.status = 'cancelled'
+        first.save()
+        self.assertEqual(self._tables(first), [])
+        self.assertEqual(self._tables(self._book(datetime.time(18, 30), 5)), ['T3'])
+
+    def test_repack_night(self):
+        bookings = [self._book(datetime.time(18, 0), n) for n in (2, 4, 6)]
+        bookings.append(self._book(datetime.time(19, 30), 8))
+        Reservation.tables.through.objects.all().delete()
+        self.assertEqual(assign_night(self.day), [])
+        self.assertEqual([self._tables(b) for b in bookings], [['T1'], ['T2'], ['T3'], ['T2', 'T3']])
+
+
+@mock.patch('reservations.waitlist.send_waitlist_offer')
+class WaitlistTests(TestCase):
+    """Cancellations offer the freed seats to the best-fitting waiting guest."""
+
+    def setUp(self):
+        cache.clear()
+        SeatingCapacity.objects.all().delete()
+        TurnTime.objects.all().delete()
+        self.day = datetime.date.today() + datetime.timedelta(days=7)
+        SeatingCapacity.objects.create(
+            weekday=self.day.weekday(), name='Dinner',
+            first_seating=datetime.time(18, 0), last_seating=datetime.time(20, 0), covers=10,
+        )
+        TurnTime.objects.create(max_party_size=4, minutes=60)
+        TurnTime.objects.create(max_party_size=10, minutes=120)
+        self.first = self._book(datetime.time(19, 0), 4)
+        self._book(datetime.time(19, 0), 4)
+
+    def _book(self, time, guests):
+        return Reservation.objects.create(
+            name='Guest', email='guest@example.com', phone='0912',
+            date=self.day, time=time, number_of_guests=guests,
+        )
+
+    def _wait(self, guests, earliest, latest):
+        return WaitlistEntry.objects.create(
+            name='Waiting', email='wait@example.com', phone='0912', date=self.day,
+            earliest_time=earliest, latest_time=latest, party_size=guests,
+        )
+
+    def _cancel(self, reservation):
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.status = 'cancelled'
+            reservation.save()
+
+    def test_cancel_offers_largest_party_that_fits(self, send):
+        small = self._wait(2, datetime.time(19, 0), datetime.time(19, 0))
+        large = self._wait(6, datetime.time(18, 30), datetime.time(19, 30))
+        self._wait(9, datetime.time(19, 0), datetime.time(19, 0))  # Never fits
+        self._cancel(self.first)
+        large.refresh_from_db()
+        small.refresh_from_db()
+        self.assertEqual(large.status, 'offered')
+        self.assertEqual(large.offered_time, datetime.time(19, 0))
+        self.assertEqual(small.status, 'waiting')
+        send.assert_called_once()
+
+    def test_claim_books_once(self, send):
+        entry = self._wait(2, datetime.time(19, 0), datetime.time(20, 0))
+        self._cancel(self.first)
+        entry.refresh_from_db()
+        reservation = claim_offer(entry)
+        self.assertEqual(reservation.number_of_guests, 2)
+        self.assertEqual(reservation.status, 'confirmed')
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'booked')
+        self.assertIsNone(claim_offer(entry))
+
+    def test_lost_race_returns_to_waiting(self, send):
+        entry = self._wait(4, datetime.time(19, 0), datetime.time(19, 0))
+        self._cancel(self.first)
+        self._book(datetime.time(19, 0), 4)  # Someone else takes the seats
+        entry.refresh_from_db()
+        self.assertIsNone(claim_offer(entry))
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'waiting')
+
+    def test_unclaimed_offer_passes_to_next_guest(self, send):
+        large = self._wait(6, datetime.time(18, 30), datetime.time(19, 30))
+        small = self._wait(2, datetime.time(19, 0), datetime.time(19, 0))
+        self._cancel(self.first)
+        WaitlistEntry.objects.filter(pk=large.pk).update(
+            offered_at=timezone.now() - datetime.timedelta(minutes=settings.WAITLIST_OFFER_MINUTES + 1),
+        )
+        large.refresh_from_db()
+        self.assertIsNone(claim_offer(large))
+        large.refresh_from_db()
+        small.refresh_from_db()
+        self.assertEqual((large.status, small.status), ('expired', 'offered'))
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(expire_offers(), 0)
+
+    def test_claim_page(self, send):
+        entry = self._wait(2, datetime.time(19, 0), datetime.time(19, 30))
+        self._cancel(self.first)
+        url = reverse('reservations:waitlist_claim', args=[entry.token])
+        self.assertContains(self.client.get(url), 'A table opened up')
+        response = self.client.post(url)
+        entry.refresh_from_db()
+        self.assertRedirects(response, reverse('reservations:confirmation', args=[entry.reservation_id]))
 
-# Create your tests here.
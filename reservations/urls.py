@@ -6,4 +6,7 @@ app_name = 'reservations'
 urlpatterns = [
     path('', views.reservation_page, name='reservation'),
     path('confirmation/<int:pk>/', views.confirmation_page, name='confirmation'),
+    path('availability/', views.availability, name='availability'),
+    path('waitlist/', views.waitlist_page, name='waitlist'),
+    path('waitlist/<uuid:token>/', views.waitlist_claim, name='waitlist_claim'),
 ]
\ No newline at end of file
@@ -1,9 +1,14 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.http import JsonResponse
+from django.utils import timezone
 from django_ratelimit.decorators import ratelimit
 from django_ratelimit.exceptions import Ratelimited
-from .forms import ReservationForm
-from .models import Reservation
+import datetime
+from .availability import free_covers, requestable_times
+from .forms import ReservationForm, WaitlistForm
+from .models import Reservation, WaitlistEntry
+from .waitlist import claim_offer
 
 
 def get_email(group, request):
@@ -33,6 +38,79 @@ def reservation_page(request):
     return render(request, 'reservations/reservation.html', {'form': form})
 
 
+@ratelimit(key=get_email, rate='5/h', method='POST', block=False)
+def waitlist_page(request):
+    """Join the waitlist for a fully booked date."""
+    if getattr(request, 'limited', False) and request.method == 'POST':
+        messages.error(request, "Too many requests from this email. Please wait an hour before trying again.")
+        return redirect('reservations:waitlist')
+
+    # Prefill from the reservation form when a time was fully booked
+    form = WaitlistForm(initial={
+        'date': request.GET.get('date', ''),
+        'earliest_time': request.GET.get('time', ''),
+        'latest_time': request.GET.get('time', ''),
+        'party_size': request.GET.get('guests', ''),
+    })
+    entry = None
+
+    if request.method == 'POST':
+        if request.POST.get('website'):
+            return redirect('reservations:waitlist')
+
+        form = WaitlistForm(request.POST)
+        if form.is_valid():
+            entry = form.save()
+
+    return render(request, 'reservations/waitlist.html', {'form': form, 'entry': entry})
+
+
+def waitlist_claim(request, token):
+    """Book the table a waitlist offer points at, if it is still free."""
+    entry = get_object_or_404(WaitlistEntry, token=token)
+
+    if request.method == 'POST':
+        reservation = claim_offer(entry)
+        if reservation:
+            messages.success(request, "Your reservation was successfully submitted!")
+            return redirect('reservations:confirmation', pk=reservation.pk)
+        entry.refresh_from_db()
+        if entry.status == 'booked' and entry.reservation_id:
+            return redirect('reservations:confirmation', pk=entry.reservation_id)
+
+    return render(request, 'reservations/waitlist_claim.html', {'entry': entry})
+
+
 def confirmation_page(request, pk):
     reservation = get_object_or_404(Reservation, pk=pk)
-    return render(request, 'reservations/confirmation.html', {'reservation': reservation})
\ No newline at end of file
+    return render(request, 'reservations/confirmation.html', {'reservation': reservation})
+
+
+def availability(request):
+    """Bookable seating times for a date and party size."""
+    try:
+        day = datetime.datetime.strptime(request.GET.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        day = timezone.localdate()
+    try:
+        guests = max(int(request.GET.get('guests', 2)), 1)
+    except ValueError:
+        guests = 2
+
+    if day < timezone.localdate():
+        return JsonResponse({'date': day.isoformat(), 'guests': guests, 'times': []})
+
+    bookable = set(requestable_times(day, guests))
+    return JsonResponse({
+        'date': day.isoformat(),
+        'guests': guests,
+        'times': [
+            {
+                'value': slot['time'].strftime('%H:%M'),
+                'label': slot['time'].strftime('%I:%M %p').lstrip('0'),
+                'service': slot['service'],
+                'available': slot['time'] in bookable,
+            }
+            for slot in free_covers(day)
+        ],
+    })
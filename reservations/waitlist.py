@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .availability import bookable_times, can_seat, free_covers, lock_day
+from .emails import send_waitlist_offer
+from .models import Reservation, WaitlistEntry
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _candidates(day, room):
+    """
+    Waiting entries on `day` small enough to fit the largest gap, biggest party first.
+
+    Served from the partial (date, party_size) index and capped, so a long
+    waitlist never turns a cancellation into a table scan.
+    """
+    return list(
+        WaitlistEntry.objects
+        .filter(date=day, status='waiting', party_size__lte=room)
+        .order_by('-party_size', 'created_at')[:settings.WAITLIST_MATCH_CANDIDATES]
+    )
+
+
+def best_match(day, near):
+    """(entry, time) for the waiting guest the free seats on `day` suit best, or (None, None)."""
+    room = max((slot['free'] for slot in free_covers(day)), default=0)
+    if not room:
+        return None, None
+
+    times_by_size = {}
+    for entry in _candidates(day, room):
+        if entry.party_size not in times_by_size:
+            times_by_size[entry.party_size] = bookable_times(day, entry.party_size)
+        fits = [t for t in times_by_size[entry.party_size] if entry.earliest_time <= t <= entry.latest_time]
+        if fits:
+            return entry, min(fits, key=lambda t: abs(_minutes(t) - _minutes(near)))
+    return None, None
+
+
+def offer_seats(day, near):
+    """Offer free seats on `day` to the best waitlist match, nearest `near` in time."""
+    if day < timezone.localdate():
+        return None
+
+    entry, time = best_match(day, near)
+    if entry is None:
+        return None
+    # Conditional update — a concurrent cancellation can't offer the same guest twice
+    offered = WaitlistEntry.objects.filter(pk=entry.pk, status='waiting').update(
+        status='offered', offered_time=time, offered_at=timezone.now(),
+    )
+    if not offered:
+        return None
+    entry.refresh_from_db()
+    send_waitlist_offer(entry)
+    return entry
+
+
+def offer_freed_seats(reservation):
+    """Offer the seats a cancelled booking gave back to the best waitlist match."""
+    expire_offers(reservation.date)
+    return offer_seats(reservation.date, reservation.time)
+
+
+def expire_offers(day=None):
+    """
+    Close offers left unclaimed past WAITLIST_OFFER_MINUTES and offer their seats to the next guest.
+
+    Runs for one date on every cancellation and for all dates from the
+    expire_waitlist_offers command. Returns how many offers lapsed.
+    """
+    cutoff = timezone.now() - timedelta(minutes=settings.WAITLIST_OFFER_MINUTES)
+    stale = WaitlistEntry.objects.filter(status='offered', offered_at__lt=cutoff)
+    if day is not None:
+        stale = stale.filter(date=day)
+
+    expired = 0
+    for entry in stale:
+        if WaitlistEntry.objects.filter(pk=entry.pk, status='offered').update(status='expired'):
+            expired += 1
+            offer_seats(entry.date, entry.offered_time)
+    return expired
+
+
+def claim_offer(entry):
+    """
+    Turn an offer into a reservation if it hasn't lapsed and the seats are still free.
+
+    Offers don't hold seats, so whoever books first wins; a guest who lost the
+    race goes back to waiting for the next cancellation. The seat check runs
+    under the same lock as new bookings, so two claims can't both pass it.
+    """
+    if entry.status != 'offered':
+        return None
+    if entry.offer_expires_at and entry.offer_expires_at <= timezone.now():
+        expire_offers(entry.date)
+        return None
+
+    with transaction.atomic():
+        lock_day(entry.date)
+        offer = WaitlistEntry.objects.filter(pk=entry.pk, status='offered')
+        if entry.date < timezone.localdate() or not can_seat(entry.date, entry.offered_time, entry.party_size, fresh=True):
+            offer.update(status='waiting', offered_time=None, offered_at=None)
+            return None
+        if not offer.update(status='booked'):
+            return None  # Claimed twice, or lapsed meanwhile
+        reservation = Reservation.objects.create(
+            name=entry.name, email=entry.email, phone=entry.phone,
+            date=entry.date, time=entry.offered_time, number_of_guests=entry.party_size,
+        )
+        WaitlistEntry.objects.filter(pk=entry.pk).update(reservation=reservation)
+    return reservation
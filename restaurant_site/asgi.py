@@ -3,6 +3,12 @@ ASGI config for restaurant_site project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live order board (dashboard/orders/stream/) is an async Server-Sent
+Events view and needs this entry point — under WSGI it answers 204 and the
+page falls back to periodic reloads. Run it with e.g.
+
+    uvicorn restaurant_site.asgi:application --host 0.0.0.0 --port $PORT
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -0,0 +1,101 @@
+import re
+
+from django.db import connection
+
+
+PHONE_QUERY_RE = re.compile(r'^[\d\s+().-]+$')
+UUID_QUERY_RE = re.compile(r'^(?=.*\d)[0-9a-f]+(-[0-9a-f]+)+$')
+MIN_PHONE_TOKEN = 4
+
+
+def normalize_email(value):
+    """Lowercased, trimmed email used as a lookup key."""
+    return (value or '').strip().lower()
+
+
+def phone_digits(value):
+    """Strip everything except digits from a phone number."""
+    return re.sub(r'\D', '', value or '')
+
+
+def build_search_document(name='', email='', phone='', code=''):
+    """Single lowercased string the dashboard search boxes match against. Dashes are dropped from the code."""
+    parts = [
+        ' '.join((name or '').lower().split()),
+        normalize_email(email),
+        phone_digits(phone),
+        (code or '').lower().replace('-', ''),
+    ]
+    return ' '.join(p for p in parts if p)
+
+
+def document_tokens(document):
+    """Prefix-searchable tokens for the token table fallback."""
+    tokens = set()
+    for word in document.split():
+        tokens.add(word)
+        if '@' in word:
+            tokens.update(t for t in re.split(r'[^a-z0-9]+', word) if t)
+        elif word.isdigit():
+            # Every suffix of the phone number, so "4567" finds "+63 912 345 4567"
+            tokens.update(word[i:] for i in range(len(word) - MIN_PHONE_TOKEN + 1))
+    return tokens
+
+
+def normalize_query(term):
+    """Split a search box query into lowercased words."""
+    term = (term or '').strip().lower().replace('#', ' ')
+    if PHONE_QUERY_RE.match(term) and phone_digits(term):
+        return [phone_digits(term)]
+    # Order numbers are indexed without dashes, so a pasted UUID matches whole or in part
+    return [word.replace('-', '') if UUID_QUERY_RE.match(word) else word for word in term.split()]
+
+
+def uses_trigram_index():
+    """PostgreSQL serves search from a pg_trgm GIN index, everything else from tokens."""
+    return connection.vendor == 'postgresql'
+
+
+def sync_search_tokens(instance):
+    """Rewrite the token rows for one object after its document changed."""
+    if uses_trigram_index():
+        return
+    tokens = instance.search_tokens
+    tokens.all().delete()
+    tokens.model.objects.bulk_create([
+        tokens.model(**{tokens.field.name: instance, 'token': token[:254]})
+        for token in document_tokens(instance.search_document)
+    ])
+
+
+def _contains(queryset, words):
+    for word in words:
+        queryset = queryset.filter(search_document__contains=word)
+    return queryset
+
+
+def filter_search(queryset, term):
+    """
+    Apply a dashboard search box query — every word must match.
+
+    The token table only matches word prefixes; when that finds nothing, the
+    words are matched anywhere in the document instead (a scan, but only for
+    searches that would otherwise come back empty).
+    """
+    words = normalize_query(term)
+    if uses_trigram_index():
+        return _contains(queryset, words)
+
+    everything = queryset
+    relation = queryset.model._meta.get_field('search_tokens')
+    token_model = relation.related_model
+    fk_column = relation.field.attname
+    for word in words:
+        # Range scan instead of LIKE so SQLite can seek the token index
+        matching = token_model.objects.filter(
+            token__gte=word, token__lt=word + '\uffff'
+        ).values(fk_column)
+        queryset = queryset.filter(pk__in=matching)
+    if words and not queryset.exists():
+        return _contains(everything, words)
+    return queryset
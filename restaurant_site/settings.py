@@ -125,6 +125,64 @@ else:
     }
 
 
+# -------------------------------------------------------------------
+# LIVE ORDER BOARD
+# -------------------------------------------------------------------
+
+# Redis pub/sub fans order events out across worker processes;
+# without it events only reach dashboards connected to the same process.
+ORDER_EVENTS_REDIS_URL = os.environ.get('ORDER_EVENTS_REDIS_URL', REDIS_URL)
+ORDER_EVENTS_HEARTBEAT = 15  # seconds between SSE keep-alive comments
+
+
+# -------------------------------------------------------------------
+# PICKUP SLOTS
+# -------------------------------------------------------------------
+
+# Online orders are throttled per pickup slot; 0 disables a limit.
+PICKUP_SLOT_MINUTES = int(os.environ.get('PICKUP_SLOT_MINUTES', 15))
+PICKUP_SLOT_MAX_ORDERS = int(os.environ.get('PICKUP_SLOT_MAX_ORDERS', 8))
+PICKUP_SLOT_MAX_ITEMS = int(os.environ.get('PICKUP_SLOT_MAX_ITEMS', 40))
+PICKUP_PENDING_HOLD_MINUTES = 30  # unpaid orders release their slot after this
+
+# Pickup hours per weekday (Monday = 0), as (open, close) 24h times
+PICKUP_HOURS = {
+    0: ('11:00', '22:00'),
+    1: ('11:00', '22:00'),
+    2: ('11:00', '22:00'),
+    3: ('11:00', '22:00'),
+    4: ('11:00', '22:00'),
+    5: ('10:00', '23:00'),
+    6: ('10:00', '21:00'),
+}
+
+# Service windows for the prep forecast, as (name, first pickup hour); each runs until the next
+SERVICE_WINDOWS = [
+    ('Lunch', 10),
+    ('Afternoon', 14),
+    ('Dinner', 17),
+]
+
+
+# -------------------------------------------------------------------
+# RESERVATIONS
+# -------------------------------------------------------------------
+
+RESERVATION_SLOT_MINUTES = 30
+RESERVATION_AUTO_CONFIRM_MAX_PARTY = 4   # larger groups always need approval
+RESERVATION_DEFAULT_TURN_MINUTES = 90    # used when no TurnTime row covers the party
+WAITLIST_MATCH_CANDIDATES = 25           # waiting entries checked per cancellation
+WAITLIST_OFFER_MINUTES = 60              # unclaimed offers lapse and pass to the next guest
+
+
+# -------------------------------------------------------------------
+# MENU IMPORTS
+# -------------------------------------------------------------------
+
+MENU_IMPORT_MAX_BYTES = 20 * 1024 * 1024  # uploads are held in the database until the worker runs them
+MENU_IMPORT_STALE_MINUTES = 15            # a running job silent this long is marked failed
+
+
 # -------------------------------------------------------------------
 # PASSWORD VALIDATION
 # -------------------------------------------------------------------
@@ -197,6 +255,7 @@ EMAIL_HOST_USER = 'xhide26x@gmail.com'
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = 'Warm Vibe Bistro <xhide26x@gmail.com>'
 RESTAURANT_EMAIL = 'xhide26x@gmail.com'
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')  # for links in emails sent outside a request
 
 
 # -------------------------------------------------------------------